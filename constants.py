@@ -6,4 +6,3 @@ class Constants:
     VERACRYPT_PATH = '/usr/bin/veracrypt'
     BASE_MOUNT_DIR = '/media/jayces'
     MOUNT_PREFIX = 'veracrypt_'
-    MOUNT_TIMEOUT = 60  # seconds
@@ -0,0 +1,76 @@
+"""
+Pont entre le moteur de commandes asynchrone et la boucle d'événements Qt.
+"""
+
+from concurrent.futures import Future
+from typing import Callable, Coroutine, Optional
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from utils.command_engine import command_engine
+
+class AsyncTask(QObject):
+    """Coroutine exécutée par le moteur de commandes.
+
+    Le résultat revient dans le thread Qt par les signaux finished et failed :
+    l'interface n'est jamais bloquée pendant l'exécution.
+    """
+
+    # Signal émis avec le résultat de la coroutine
+    finished = pyqtSignal(object)
+
+    # Signal émis avec le message d'erreur (exception ou annulation)
+    failed = pyqtSignal(str)
+
+    # Relais interne : émis depuis le thread du moteur, reçu dans le thread Qt
+    _done = pyqtSignal(object)
+
+    # Tâches en cours, conservées jusqu'à leur fin
+    _running = set()
+
+    def __init__(self, coro: Coroutine, parent: QObject = None):
+        super().__init__(parent)
+        # Toujours en file d'attente : même une tâche déjà terminée publie son
+        # résultat après que l'appelant a connecté ses signaux
+        self._done.connect(self._on_done, Qt.ConnectionType.QueuedConnection)
+        AsyncTask._running.add(self)
+        self._future = command_engine.submit(coro)
+        self._future.add_done_callback(self._done.emit)
+
+    def cancel(self):
+        """Annule la tâche ; la commande en cours est interrompue."""
+        self._future.cancel()
+
+    def is_running(self) -> bool:
+        """Indique si la tâche n'est pas encore terminée."""
+        return not self._future.done()
+
+    def _on_done(self, future: Future):
+        """Publie le résultat dans le thread Qt."""
+        AsyncTask._running.discard(self)
+        if future.cancelled():
+            self.failed.emit("Opération annulée")
+        elif future.exception() is not None:
+            self.failed.emit(str(future.exception()))
+        else:
+            self.finished.emit(future.result())
+
+def run_async(coro: Coroutine,
+              on_finished: Optional[Callable[[object], None]] = None,
+              on_failed: Optional[Callable[[str], None]] = None,
+              parent: QObject = None) -> AsyncTask:
+    """Lance une coroutine sur le moteur et connecte ses signaux.
+
+    Args:
+        coro: Coroutine à exécuter
+        on_finished: Fonction appelée avec le résultat, dans le thread Qt
+        on_failed: Fonction appelée avec le message d'erreur, dans le thread Qt
+        parent: Objet Qt parent de la tâche
+
+    Returns:
+        Tâche lancée
+    """
+    task = AsyncTask(coro, parent)
+    if on_finished is not None:
+        task.finished.connect(on_finished)
+    if on_failed is not None:
+        task.failed.connect(on_failed)
+    return task
@@ -11,10 +11,14 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QCheckBox,
     QPushButton,
-    QFileDialog
+    QFileDialog,
+    QSpinBox
 )
 from PyQt6.QtCore import Qt
 from utils.volume_creation import VolumeCreation
+from .pim_selector import PimSelector
+from utils.pim_calibration import validate_pim
+from utils.favorites import Favorites
 import logging
 import os
 
@@ -36,7 +40,9 @@ class ChangePasswordWizard(QWizard):
         self.current_password = None
         self.new_password = None
         self.current_keyfile = None
+        self.current_pim = None
         self.new_keyfile = None
+        self.new_pim = None
 
 class SelectVolumePage(QWizardPage):
     def __init__(self, parent=None):
@@ -100,6 +106,13 @@ class CurrentPasswordPage(QWizardPage):
         layout.addWidget(QLabel("Mot de passe actuel :"))
         layout.addWidget(self.current_password)
         
+        # PIM actuel : l'en-tête ne s'ouvre qu'avec le PIM choisi à la création
+        self.current_pim = QSpinBox()
+        self.current_pim.setRange(0, 100000)
+        self.current_pim.setSpecialValueText("Par défaut")
+        layout.addWidget(QLabel("PIM actuel :"))
+        layout.addWidget(self.current_pim)
+        
         # Option fichier clé actuel
         self.use_keyfile = QCheckBox("Utiliser un fichier clé")
         self.use_keyfile.stateChanged.connect(self._toggle_keyfile)
@@ -122,6 +135,11 @@ class CurrentPasswordPage(QWizardPage):
         
         self.setLayout(layout)
         
+    def initializePage(self):
+        # PIM enregistré si le volume est un favori
+        favorite = Favorites().get_favorite(self.wizard().volume_path)
+        self.current_pim.setValue((favorite or {}).get('pim') or 0)
+        
     def _toggle_keyfile(self, state):
         self.keyfile_edit.setVisible(state)
         self.browse_keyfile.setVisible(state)
@@ -149,6 +167,7 @@ class CurrentPasswordPage(QWizardPage):
             
         self.wizard().current_password = password
         self.wizard().current_keyfile = self.keyfile_edit.text() if self.use_keyfile.isChecked() else None
+        self.wizard().current_pim = self.current_pim.value() or None
         return True
 
 class NewPasswordPage(QWizardPage):
@@ -190,6 +209,11 @@ class NewPasswordPage(QWizardPage):
         self.browse_keyfile.setVisible(False)
         layout.addWidget(self.browse_keyfile)
         
+        # Nouveau PIM : la fonction de hachage du volume n'est pas connue,
+        # l'estimation couvre le cas où toutes sont essayées au montage
+        self.pim_selector = PimSelector()
+        layout.addWidget(self.pim_selector)
+        
         # Option pour afficher les mots de passe
         self.show_password = QCheckBox("Afficher les mots de passe")
         self.show_password.stateChanged.connect(self._toggle_password_visibility)
@@ -256,6 +280,12 @@ class NewPasswordPage(QWizardPage):
         if not self._validate_password():
             return False
             
+        valid, error = validate_pim(self.pim_selector.pim(), self.password_edit.text())
+        if not valid:
+            QMessageBox.warning(self, "Erreur", error)
+            return False
+            
         self.wizard().new_password = self.password_edit.text()
         self.wizard().new_keyfile = self.keyfile_edit.text() if self.use_keyfile.isChecked() else None
+        self.wizard().new_pim = self.pim_selector.pim()
         return True
@@ -20,12 +20,23 @@ from PyQt6.QtWidgets import (
     QCheckBox,
     QWidget
 )
-from PyQt6.QtCore import Qt, QMetaObject, Q_ARG, pyqtSlot, QThread
 from PyQt6.QtGui import QIcon
-from .progress_dialog import ProgressDialog
 from utils.volume_creation import VolumeCreation
-from utils.veracrypt import mount_volume
-from utils.constants import Constants
+from utils.creation_queue import creation_queue, CreationJob
+from utils.mkfs import PROFILES
+from utils.cipher_benchmark import benchmark_ciphers_async, cached_cipher_benchmark
+from utils.filesystem import (
+    COPY_ON_WRITE_FILESYSTEMS,
+    FILESYSTEM_MAGICS,
+    benchmark_allocation_async,
+    cached_benchmark,
+    filesystem_magic,
+    filesystem_type,
+    supports_fast_allocation
+)
+from .async_task import run_async
+from .pim_selector import PimSelector
+from utils.pim_calibration import validate_pim
 from utils import EntropyCollector
 
 class CreateVolumeWizard(QWizard):
@@ -48,7 +59,9 @@ class CreateVolumeWizard(QWizard):
         self.hash_algo = None
         self.filesystem = None
         self.random_data = None
-        self.progress_dialog = None
+        self.quick = False
+        self.pim = None
+        self.mkfs_profile = None
         
         # Ajouter les pages
         self.setPage(self.PAGE_VOLUME, VolumePage(self))
@@ -61,105 +74,30 @@ class CreateVolumeWizard(QWizard):
         self.setOption(QWizard.WizardOption.NoBackButtonOnStartPage, True)
 
     def accept(self):
-        """Appelé quand l'utilisateur clique sur Terminer."""
-        # Récupérer toutes les informations
-        volume_path = self.volume_path
-        size = self.volume_size
-        encryption = self.encryption
-        hash_algo = self.hash_algo
-        filesystem = self.filesystem
-        password = self.password
-        
-        # Créer la boîte de dialogue de progression
-        self.progress_dialog = ProgressDialog(self)
-        self.progress_dialog.show()
-        
-        # Créer le volume
-        def create_volume():
-            success, message = VolumeCreation.create_volume(
-                path=volume_path,
-                password=password,
-                size=size,
-                encryption=encryption,
-                hash_algo=hash_algo,
-                filesystem=filesystem,
-                random_data=self.random_data,
-                progress_callback=self.progress_dialog.update_progress
-            )
-            
-            # Mettre à jour la boîte de dialogue
-            self.progress_dialog.done(success)
-            
-            # Utiliser invokeMethod pour appeler les méthodes Qt depuis le thread
-            if success:
-                QMetaObject.invokeMethod(self, "show_success_and_close", 
-                                       Qt.ConnectionType.QueuedConnection,
-                                       Q_ARG(str, message))
-            else:
-                QMetaObject.invokeMethod(self, "show_error", 
-                                       Qt.ConnectionType.QueuedConnection,
-                                       Q_ARG(str, message))
-        
-        # Lancer la création dans un thread séparé
-        from PyQt6.QtCore import QThread
-        
-        class CreationThread(QThread):
-            def run(self):
-                create_volume()
-        
-        self.creation_thread = CreationThread()
-        self.creation_thread.start()
-    
-    def _generate_mount_point(self):
-        """Génère un point de montage unique."""
-        # Récupérer le nom du volume sans extension
-        base_name = os.path.splitext(os.path.basename(self.volume_path))[0]
-        
-        # Utiliser le répertoire personnel de l'utilisateur
-        base_dir = os.path.expanduser("~")
-        
-        # Créer le point de montage de base
-        mount_point = os.path.join(base_dir, f"{Constants.MOUNT_PREFIX}{base_name}")
-        
-        # Si le point de montage existe déjà, ajouter un numéro
-        counter = 1
-        while os.path.exists(mount_point):
-            mount_point = os.path.join(base_dir,
-                                     f"{Constants.MOUNT_PREFIX}{base_name}_{counter}")
-            counter += 1
-            
-        # Créer le répertoire s'il n'existe pas
-        os.makedirs(mount_point, exist_ok=True)
+        """Appelé quand l'utilisateur clique sur Terminer.
+        
+        La création est confiée à la file d'attente : elle démarre dès que le
+        disque qui portera le volume est libre.
+        """
+        job = CreationJob(
+            path=self.volume_path,
+            size=self.volume_size,
+            password=self.password,
+            encryption=self.encryption,
+            hash_algo=self.hash_algo,
+            filesystem=self.filesystem,
+            random_data=self.random_data,
+            quick=self.quick,
+            pim=self.pim,
+            mkfs_profile=self.mkfs_profile,
+            mount_after=True
+        )
+        creation_queue.submit(job)
         
-        return mount_point
-
-    def mount_volume_after_creation(self):
-        """Monte le volume après sa création."""
-        # Générer un point de montage unique
-        mount_point = self._generate_mount_point()
-        
-        # Monter le volume
-        success, message = mount_volume(self.volume_path, mount_point, self.password)
-        if success:
-            # Rafraîchir la liste des volumes montés
-            if hasattr(self.parent(), '_refresh_mounted_volumes'):
-                self.parent()._refresh_mounted_volumes()
-        else:
-            QMessageBox.warning(self, "Erreur de montage", 
-                              f"Le volume a été créé mais n'a pas pu être monté :\n{message}")
-
-    @pyqtSlot(str)
-    def show_success_and_close(self, message):
-        """Affiche le message de succès et ferme le wizard."""
-        QMessageBox.information(self, "Succès", message)
-        # Monter le volume après la création
-        self.mount_volume_after_creation()
+        # Afficher la file d'attente de la fenêtre principale
+        if hasattr(self.parent(), '_show_creation_queue'):
+            self.parent()._show_creation_queue()
         super().accept()
-    
-    @pyqtSlot(str)
-    def show_error(self, message):
-        """Affiche le message d'erreur."""
-        QMessageBox.critical(self, "Erreur", message)
 
 class EntropyPage(QWizardPage):
     """Page de collecte d'entropie."""
@@ -202,10 +140,27 @@ class EncryptionPage(QWizardPage):
         # Algorithme de chiffrement
         encryption_label = QLabel("Algorithme de chiffrement :")
         self.encryption_combo = QComboBox()
-        self.encryption_combo.addItems(VolumeCreation.ENCRYPTION_ALGORITHMS.keys())
+        self._populate_encryption(cached_cipher_benchmark())
         layout.addWidget(encryption_label)
         layout.addWidget(self.encryption_combo)
         
+        # Débit des algorithmes sur ce processeur
+        cipher_widget = QWidget()
+        cipher_layout = QHBoxLayout()
+        cipher_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.cipher_label = QLabel()
+        self.cipher_label.setWordWrap(True)
+        cipher_layout.addWidget(self.cipher_label, 1)
+        
+        self.cipher_button = QPushButton("Mesurer les débits")
+        self.cipher_button.clicked.connect(self._run_cipher_benchmark)
+        cipher_layout.addWidget(self.cipher_button)
+        
+        cipher_widget.setLayout(cipher_layout)
+        layout.addWidget(cipher_widget)
+        self._update_cipher_label(cached_cipher_benchmark())
+        
         # Algorithme de hachage
         hash_label = QLabel("Algorithme de hachage :")
         self.hash_combo = QComboBox()
@@ -213,20 +168,203 @@ class EncryptionPage(QWizardPage):
         layout.addWidget(hash_label)
         layout.addWidget(self.hash_combo)
         
+        # PIM, estimé pour la fonction de hachage choisie
+        self.pim_selector = PimSelector()
+        self.pim_selector.set_hash_algo(self.hash_combo.currentText())
+        self.hash_combo.currentTextChanged.connect(self.pim_selector.set_hash_algo)
+        layout.addWidget(self.pim_selector)
+        
         # Système de fichiers
         filesystem_label = QLabel("Système de fichiers :")
         self.filesystem_combo = QComboBox()
         self.filesystem_combo.addItems(VolumeCreation.FILESYSTEMS.keys())
+        self.filesystem_combo.currentTextChanged.connect(self._update_profiles)
         layout.addWidget(filesystem_label)
         layout.addWidget(self.filesystem_combo)
         
+        # Profil de formatage (EXT4 et BTRFS)
+        profile_label = QLabel("Profil de formatage :")
+        self.profile_combo = QComboBox()
+        self.profile_combo.currentIndexChanged.connect(self._update_profile_description)
+        layout.addWidget(profile_label)
+        layout.addWidget(self.profile_combo)
+        
+        self.profile_description = QLabel()
+        self.profile_description.setWordWrap(True)
+        layout.addWidget(self.profile_description)
+        self._update_profiles(self.filesystem_combo.currentText())
+        
+        # Allocation rapide
+        self.quick_check = QCheckBox("Allocation rapide (ne pas chiffrer l'espace libre)")
+        self.quick_check.toggled.connect(self._update_quick_warning)
+        layout.addWidget(self.quick_check)
+        
+        self.quick_warning = QLabel(
+            "Le conteneur est alloué sans être rempli de données aléatoires. "
+            "La création est bien plus rapide, mais l'espace libre garde son "
+            "ancien contenu : on peut distinguer les zones déjà écrites et "
+            "estimer la quantité de données stockées. À éviter pour un volume "
+            "dont l'existence ou le contenu doit rester indétectable."
+        )
+        self.quick_warning.setWordWrap(True)
+        self.quick_warning.setStyleSheet("color: #c0392b;")
+        self.quick_warning.setVisible(False)
+        layout.addWidget(self.quick_warning)
+        
+        # Copie sur écriture du système de fichiers cible
+        self.cow_label = QLabel()
+        self.cow_label.setWordWrap(True)
+        self.cow_label.setVisible(False)
+        layout.addWidget(self.cow_label)
+        
+        # Mesure du temps économisé sur le système de fichiers cible
+        benchmark_widget = QWidget()
+        benchmark_layout = QHBoxLayout()
+        benchmark_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.benchmark_label = QLabel()
+        self.benchmark_label.setWordWrap(True)
+        benchmark_layout.addWidget(self.benchmark_label, 1)
+        
+        self.benchmark_button = QPushButton("Mesurer")
+        self.benchmark_button.clicked.connect(self._run_benchmark)
+        benchmark_layout.addWidget(self.benchmark_button)
+        
+        benchmark_widget.setLayout(benchmark_layout)
+        layout.addWidget(benchmark_widget)
+        
         self.setLayout(layout)
         
+    def initializePage(self):
+        """Vérifie l'allocation rapide et la copie sur écriture sur le système de fichiers du volume."""
+        volume_path = self.wizard().volume_path
+        supported = supports_fast_allocation(volume_path)
+        self.quick_check.setEnabled(supported)
+        if not supported:
+            self.quick_check.setChecked(False)
+            self.quick_check.setToolTip(
+                f"Le système de fichiers ({filesystem_type(volume_path)}) ne gère pas fallocate"
+            )
+            
+        # Conteneur sans copie sur écriture (btrfs)
+        filesystem_name = FILESYSTEM_MAGICS.get(filesystem_magic(volume_path))
+        if filesystem_name == 'btrfs':
+            self.cow_label.setText(
+                "Système de fichiers btrfs (copie sur écriture) : le conteneur sera "
+                "créé sans copie sur écriture (NOCOW) pour garder un débit stable."
+            )
+        elif filesystem_name in COPY_ON_WRITE_FILESYSTEMS:
+            self.cow_label.setText(
+                f"Système de fichiers {filesystem_name} (copie sur écriture) : le "
+                "conteneur se fragmentera à l'usage et son débit baissera avec le temps."
+            )
+        self.cow_label.setVisible(filesystem_name in COPY_ON_WRITE_FILESYSTEMS)
+        
+        benchmark = cached_benchmark(volume_path)
+        if benchmark is not None:
+            self.benchmark_label.setText(benchmark.describe())
+        else:
+            self.benchmark_label.setText("Temps économisé par Gio : non mesuré")
+            
+    def _populate_encryption(self, benchmark):
+        """Remplit la liste des algorithmes, avec leur débit mesuré s'il est connu."""
+        selected = self.encryption_combo.currentData()
+        self.encryption_combo.clear()
+        for name in VolumeCreation.ENCRYPTION_ALGORITHMS:
+            # Pas de débit affiché pour un algorithme (ou une cascade) non mesuré
+            measured = benchmark is not None and benchmark.throughput(name) is not None
+            label = f"{name} — {benchmark.describe(name)}" if measured else name
+            self.encryption_combo.addItem(label, name)
+        if selected is not None:
+            self.encryption_combo.setCurrentIndex(self.encryption_combo.findData(selected))
+            
+    def _update_cipher_label(self, benchmark):
+        """Indique l'origine des débits affichés."""
+        if benchmark is None:
+            self.cipher_label.setText("Débit des algorithmes : non mesuré")
+        else:
+            text = f"Débits mesurés sur {benchmark.cpu_model} ({benchmark.threads} threads)"
+            unmeasured = benchmark.unmeasured(VolumeCreation.ENCRYPTION_ALGORITHMS)
+            if unmeasured:
+                text += f" ; non mesurables ici : {', '.join(unmeasured)}"
+            self.cipher_label.setText(text)
+            
+    def _run_cipher_benchmark(self):
+        """Mesure le débit des algorithmes sur ce processeur."""
+        self.cipher_button.setEnabled(False)
+        self.cipher_label.setText("Mesure en cours...")
+        run_async(
+            benchmark_ciphers_async(),
+            self._on_cipher_benchmark_finished,
+            self._on_cipher_benchmark_failed,
+            self
+        )
+        
+    def _on_cipher_benchmark_finished(self, benchmark):
+        """Affiche les débits mesurés à côté de chaque algorithme."""
+        self.cipher_button.setEnabled(True)
+        self._populate_encryption(benchmark)
+        self._update_cipher_label(benchmark)
+        
+    def _on_cipher_benchmark_failed(self, error: str):
+        """Affiche l'échec de la mesure."""
+        self.cipher_button.setEnabled(True)
+        self.cipher_label.setText(f"Mesure impossible : {error}")
+        
+    def _update_profiles(self, filesystem: str):
+        """Propose les profils de formatage du système de fichiers choisi."""
+        self.profile_combo.clear()
+        self.profile_combo.addItem("Options par défaut de VeraCrypt", None)
+        for profile in PROFILES.values():
+            if profile.filesystem == filesystem:
+                self.profile_combo.addItem(profile.label, profile.name)
+        self.profile_combo.setEnabled(self.profile_combo.count() > 1)
+        
+    def _update_profile_description(self, index: int):
+        """Décrit le profil de formatage sélectionné."""
+        profile = PROFILES.get(self.profile_combo.itemData(index))
+        self.profile_description.setText(profile.description if profile else "")
+        self.profile_description.setVisible(profile is not None)
+        
+    def _update_quick_warning(self, checked: bool):
+        """Affiche l'avertissement de sécurité de l'allocation rapide."""
+        self.quick_warning.setVisible(checked)
+        
+    def _run_benchmark(self):
+        """Mesure l'écriture complète et l'allocation rapide sur le disque cible."""
+        self.benchmark_button.setEnabled(False)
+        self.benchmark_label.setText("Mesure en cours...")
+        run_async(
+            benchmark_allocation_async(self.wizard().volume_path),
+            self._on_benchmark_finished,
+            self._on_benchmark_failed,
+            self
+        )
+        
+    def _on_benchmark_finished(self, benchmark):
+        """Affiche le résultat de la mesure."""
+        self.benchmark_button.setEnabled(True)
+        self.benchmark_label.setText(benchmark.describe())
+        
+    def _on_benchmark_failed(self, error: str):
+        """Affiche l'échec de la mesure."""
+        self.benchmark_button.setEnabled(True)
+        self.benchmark_label.setText(f"Mesure impossible : {error}")
+        
     def validatePage(self) -> bool:
+        # Le mot de passe est saisi à la page précédente
+        valid, error = validate_pim(self.pim_selector.pim(), self.wizard().password or "")
+        if not valid:
+            QMessageBox.warning(self, "Erreur", error)
+            return False
+            
         # Stocker les valeurs dans le wizard
-        self.wizard().encryption = self.encryption_combo.currentText()
+        self.wizard().encryption = self.encryption_combo.currentData()
         self.wizard().hash_algo = self.hash_combo.currentText()
         self.wizard().filesystem = self.filesystem_combo.currentText()
+        self.wizard().quick = self.quick_check.isChecked()
+        self.wizard().pim = self.pim_selector.pim()
+        self.wizard().mkfs_profile = self.profile_combo.currentData()
         return True
 
 class PasswordPage(QWizardPage):
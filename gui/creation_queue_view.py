@@ -0,0 +1,159 @@
+"""
+Vue de la file d'attente des créations de volumes.
+"""
+
+import os
+import time
+from PyQt6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QProgressBar,
+    QPushButton,
+    QAbstractItemView
+)
+from PyQt6.QtCore import Qt, pyqtSignal, pyqtSlot
+from utils.constants import Constants
+from utils.creation_queue import creation_queue, CreationJob, STATE_LABELS, RUNNING
+
+class CreationQueueView(QDialog):
+    """Créations en attente, en cours et terminées, dans une seule vue."""
+
+    # Signal émis depuis les threads de création à chaque changement
+    job_changed = pyqtSignal(object)
+
+    # Signal émis (dans le thread Qt) quand une création se termine
+    job_finished = pyqtSignal(object)
+
+    COLUMNS = ["Volume", "Disque", "État", "Progression", "Détails"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("File d'attente des créations")
+        self.setMinimumSize(700, 300)
+
+        layout = QVBoxLayout()
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeMode.Stretch)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+
+        self.cancel_button = QPushButton("Annuler la création")
+        self.cancel_button.clicked.connect(self._cancel_selected)
+        buttons.addWidget(self.cancel_button)
+
+        clear_button = QPushButton("Effacer les créations terminées")
+        clear_button.clicked.connect(self._clear_finished)
+        buttons.addWidget(clear_button)
+
+        buttons.addStretch()
+
+        close_button = QPushButton("Fermer")
+        close_button.clicked.connect(self.hide)
+        buttons.addWidget(close_button)
+
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        # Ligne de chaque création ; instant et état du dernier signal émis
+        self._rows = {}
+        self._last_emit = {}
+        self._emitted_state = {}
+        # Créations dont la fin a déjà été signalée
+        self._reported = {job.id for job in creation_queue.jobs() if job.is_finished}
+
+        self.job_changed.connect(self._apply_job, Qt.ConnectionType.QueuedConnection)
+        self._listener = self._on_job_changed
+        creation_queue.add_listener(self._listener)
+
+        for job in creation_queue.jobs():
+            self._apply_job(job)
+
+    def _row_for(self, job: CreationJob) -> int:
+        """Retourne la ligne d'une création, en la créant si besoin."""
+        if job.id in self._rows:
+            return self._rows[job.id]
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QTableWidgetItem(os.path.basename(job.path)))
+        self.table.item(row, 0).setToolTip(job.path)
+        self.table.item(row, 0).setData(Qt.ItemDataRole.UserRole, job.id)
+        self.table.setItem(row, 1, QTableWidgetItem(job.device))
+        self.table.setItem(row, 2, QTableWidgetItem())
+        progress_bar = QProgressBar()
+        progress_bar.setRange(0, 100)
+        self.table.setCellWidget(row, 3, progress_bar)
+        self.table.setItem(row, 4, QTableWidgetItem())
+        self._rows[job.id] = row
+        return row
+
+    def _on_job_changed(self, job: CreationJob):
+        """Reçoit un changement de création (depuis le thread de création).
+
+        Les mises à jour de progression sont limitées à la cadence
+        d'affichage avant l'émission du signal : l'essentiel des lignes de
+        progression n'atteint jamais la boucle d'événements. Les
+        changements d'état passent toujours.
+        """
+        now = time.monotonic()
+        if (job.state == RUNNING and self._emitted_state.get(job.id) == RUNNING
+                and now - self._last_emit.get(job.id, 0.0) < Constants.PROGRESS_FRAME_INTERVAL):
+            return
+        self._last_emit[job.id] = now
+        self._emitted_state[job.id] = job.state
+        self.job_changed.emit(job)
+
+    @pyqtSlot(object)
+    def _apply_job(self, job: CreationJob):
+        """Affiche l'état d'une création."""
+        row = self._row_for(job)
+        self.table.item(row, 2).setText(STATE_LABELS[job.state])
+        self.table.cellWidget(row, 3).setValue(int(job.percent))
+        if job.state == RUNNING and job.progress is not None:
+            self.table.item(row, 4).setText(job.progress.describe())
+        else:
+            self.table.item(row, 4).setText(job.message)
+
+        if job.is_finished and job.id not in self._reported:
+            self._reported.add(job.id)
+            self.job_finished.emit(job)
+
+    def _selected_job_id(self):
+        """Retourne l'identifiant de la création sélectionnée."""
+        row = self.table.currentRow()
+        if row < 0:
+            return None
+        return self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+
+    def _cancel_selected(self):
+        """Annule la création sélectionnée si elle est encore en attente."""
+        job_id = self._selected_job_id()
+        if job_id is not None:
+            creation_queue.cancel(job_id)
+
+    def _clear_finished(self):
+        """Retire les créations terminées de la file et de la vue."""
+        creation_queue.clear_finished()
+        self.table.setRowCount(0)
+        self._rows.clear()
+        for job in creation_queue.jobs():
+            self._apply_job(job)
+
+    def closeEvent(self, event):
+        """La vue est seulement masquée : elle continue de suivre la file."""
+        self.hide()
+        event.ignore()
+
+    def detach(self):
+        """Cesse de suivre la file (à la fermeture de l'application)."""
+        creation_queue.remove_listener(self._listener)
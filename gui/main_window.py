@@ -7,7 +7,8 @@ from PyQt6.QtWidgets import (
     QPushButton, QLabel, QTextEdit,
     QHBoxLayout, QFrame, QMessageBox,
     QSplitter, QListWidget, QListWidgetItem,
-    QMenu, QApplication
+    QMenu, QApplication, QInputDialog, QLineEdit,
+    QFileDialog
 )
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QIcon, QAction
@@ -17,18 +18,39 @@ from gui.mounted_volumes_list import MountedVolumesList
 from gui.preferences_dialog import PreferencesDialog
 from gui.create_volume_wizard import CreateVolumeWizard
 from gui.change_password_dialog import ChangePasswordWizard
+from gui.async_task import run_async
+from gui.creation_queue_view import CreationQueueView
+from gui.utils import record_mount, record_dismounts
 from utils.volume_creation import VolumeCreation
 from utils import veracrypt, system
 from utils.sudo_session import sudo_session
+from utils.privileged_helper import privileged_helper
+from utils.mount_table import mount_table
+from utils.creation_queue import creation_queue, SUCCEEDED, CANCELLED
+from utils.provisioning import ManifestError, load_manifest, provision_async, write_report
 from utils.favorites import Favorites
+from utils.crypto import session_keys
+from utils.fragmentation import analyze_async
 from utils.preferences import preferences
 from utils.themes import apply_theme
+from utils.file_watcher import FileWatcher
+from utils.store import store
+import os
 import sys
+import time
 
 class MainWindow(QMainWindow):
+    # Signal émis (depuis le thread de surveillance) quand les montages changent
+    mounts_changed = pyqtSignal()
+    preferences_changed = pyqtSignal(dict)
+    favorites_changed = pyqtSignal(object)
+    # Signal émis (depuis un thread de travail) quand la session sudo doit être rouverte
+    sudo_required = pyqtSignal()
+    
     def __init__(self):
         super().__init__()
         self.loading_dialog = None
+        self._reauthenticating = False
         self.favorites = Favorites()
         self.preferences = preferences
         
@@ -52,8 +74,77 @@ class MainWindow(QMainWindow):
             sys.exit(1)
             
         self.log_message("Session sudo initialisée avec succès")
+        
+        # Les threads de travail ne peuvent pas afficher de dialogue : le mot
+        # de passe sudo est redemandé ici, dans le thread de l'interface
+        self.sudo_required.connect(self._reauthenticate)
+        sudo_session.add_authentication_listener(self.sudo_required.emit)
+        
+        # Démarrer l'assistant privilégié maintenant, dans le thread de
+        # l'interface, plutôt qu'au premier montage
+        if not privileged_helper.start():
+            self.log_message("Impossible de démarrer l'assistant privilégié")
+        
+        # File d'attente des créations : reprend les créations en attente
+        self.creation_queue_view = CreationQueueView(self)
+        self.creation_queue_view.job_finished.connect(self._on_creation_finished)
+        creation_queue.start()
+        
+        # Dériver dès maintenant la clé des mots de passe enregistrés : les
+        # montages de favoris démarrent ensuite sans attendre
+        if any('password' in f for f in self.favorites.get_favorites()):
+            run_async(
+                session_keys.unlock_async(),
+                lambda unlocked: None,
+                lambda error: self.log_message(f"Clé des mots de passe non dérivée : {error}"),
+                self
+            )
+        
         self._load_mounted_volumes()  # Chargement initial des volumes montés
         
+        # Rafraîchir la liste dès que le noyau signale un changement de montage
+        self.mounts_changed.connect(self._refresh_mounted_volumes)
+        self._mounts_listener = self.mounts_changed.emit
+        mount_table.add_listener(self._mounts_listener)
+        
+        # N'appliquer que les préférences réellement modifiées
+        self.preferences_changed.connect(self._apply_preference_changes)
+        self._preferences_listener = self.preferences_changed.emit
+        self.preferences.add_listener(self._preferences_listener)
+        
+        # Recharger les favoris et préférences modifiés par une autre instance
+        # ou un script, en ne mettant à jour que les lignes concernées
+        self.favorites_changed.connect(self._apply_favorites_diff)
+        self._favorites_listener = self.favorites_changed.emit
+        self.favorites.add_listener(self._favorites_listener)
+        self.file_watcher = FileWatcher(self)
+        if store.enabled():
+            # Les fichiers JSON ont été importés puis renommés : une écriture
+            # dans la base modifie le journal WAL (ou la base au checkpoint)
+            for path in store.watched_files():
+                self.file_watcher.watch(path, self._reload_store)
+        else:
+            self.file_watcher.watch(self.favorites.favorites_file, self.favorites.reload)
+            self.file_watcher.watch(self.preferences.preferences_file, self.preferences.reload)
+        
+    def _reload_store(self):
+        """Relit les favoris et préférences modifiés dans la base SQLite."""
+        self.favorites.reload()
+        self.preferences.reload()
+        
+    def _reauthenticate(self):
+        """Redemande le mot de passe sudo après l'expiration de la session."""
+        if self._reauthenticating or sudo_session.is_active():
+            return
+        self._reauthenticating = True
+        try:
+            if sudo_session.initialize_session():
+                self.log_message("Session sudo rouverte : relancez l'opération interrompue")
+            else:
+                self.log_message("Session sudo non rouverte")
+        finally:
+            self._reauthenticating = False
+            
     def _init_icons(self):
         """Initialise les icônes."""
         # Icône par défaut pour les volumes
@@ -62,6 +153,8 @@ class MainWindow(QMainWindow):
         self.device_icon = QIcon.fromTheme('drive-removable-media')
         # Icône pour les fichiers
         self.file_icon = QIcon.fromTheme('media-flash')
+        # Icône pour les conteneurs fragmentés
+        self.warning_icon = QIcon.fromTheme('dialog-warning')
         
     def setup_ui(self):
         """Configure l'interface utilisateur."""
@@ -149,6 +242,16 @@ class MainWindow(QMainWindow):
         create_volume_action.triggered.connect(self._show_create_volume_wizard)
         volumes_menu.addAction(create_volume_action)
         
+        # Action File d'attente des créations
+        creation_queue_action = QAction("File d'attente des créations...", self)
+        creation_queue_action.triggered.connect(self._show_creation_queue)
+        volumes_menu.addAction(creation_queue_action)
+        
+        # Action Provisionner depuis un manifeste
+        provision_action = QAction("Provisionner depuis un manifeste...", self)
+        provision_action.triggered.connect(self._provision_from_manifest)
+        volumes_menu.addAction(provision_action)
+        
         # Action Changer le mot de passe
         change_password_action = QAction("Modifier le mot de passe...", self)
         change_password_action.triggered.connect(self._show_change_password_wizard)
@@ -166,8 +269,16 @@ class MainWindow(QMainWindow):
         mount_device_action.triggered.connect(lambda: self._show_mount_dialog(True))
         volumes_menu.addAction(mount_device_action)
         
+        volumes_menu.addSeparator()
+        
+        # Action Démonter tous les volumes
+        dismount_all_action = QAction("Démonter tout", self)
+        dismount_all_action.triggered.connect(self._dismount_all)
+        volumes_menu.addAction(dismount_all_action)
+        
         # Menu Favoris
         favorites_menu = menubar.addMenu("Favoris")
+        self._add_mount_all_action(favorites_menu)
         
         # Ajouter les favoris au menu
         for favorite in self.favorites.get_favorites():
@@ -232,8 +343,7 @@ class MainWindow(QMainWindow):
             
             if was_added:
                 self.log_message("Un favori a été ajouté, rafraîchissement de la liste")
-                # Recharger les favoris depuis le fichier
-                self.favorites = Favorites()
+                # Le dialogue partage le dépôt des favoris : il est déjà à jour
                 self._refresh_favorites()
             else:
                 self.log_message("Aucun favori n'a été ajouté")
@@ -277,28 +387,15 @@ class MainWindow(QMainWindow):
                 # Si on a le mot de passe, monter directement
                 self.log_message(f"Montage automatique du favori {favorite['name']}...")
                 
-                # Afficher le dialogue de chargement
-                self.loading_dialog = LoadingDialog(self)
-                self.loading_dialog.show()
-                
-                # Monter le volume
-                success, error = veracrypt.mount_volume(favorite_path, mount_point, password)
-                
-                # Fermer le dialogue de chargement
-                if self.loading_dialog:
-                    self.loading_dialog.close()
-                    self.loading_dialog = None
-                
-                if success:
-                    self.log_message(f"Volume monté avec succès sur {mount_point}")
-                    self._refresh_mounted_volumes()
-                else:
-                    self.log_message(f"Erreur lors du montage : {error}")
-                    QMessageBox.critical(
-                        self,
-                        "Erreur",
-                        f"Impossible de monter le volume : {error}"
-                    )
+                # Monter le volume sans bloquer l'interface
+                self.show_loading(f"Montage de {favorite['name']}...")
+                start = time.monotonic()
+                run_async(
+                    veracrypt.mount_volume_async(favorite_path, mount_point, password, pim=favorite.get('pim')),
+                    lambda result: self._on_favorite_mounted(favorite_path, mount_point, result, start),
+                    lambda error: self._on_favorite_mounted(favorite_path, mount_point, (False, error), start),
+                    self
+                )
             else:
                 # Si pas de mot de passe, afficher le dialogue de montage
                 self._show_mount_dialog(favorite.get('is_device', False), favorite_path)
@@ -311,6 +408,22 @@ class MainWindow(QMainWindow):
                 f"Erreur lors du montage du favori : {str(e)}"
             )
             
+    def _on_favorite_mounted(self, favorite_path: str, mount_point: str, result, start: float):
+        """Termine le montage d'un favori."""
+        self.hide_loading()
+        success, error = result
+        record_mount(favorite_path, mount_point, success, error, time.monotonic() - start)
+        if success:
+            self.log_message(f"Volume monté avec succès sur {mount_point}")
+            self._refresh_mounted_volumes()
+        else:
+            self.log_message(f"Erreur lors du montage : {error}")
+            QMessageBox.critical(
+                self,
+                "Erreur",
+                f"Impossible de monter le volume : {error}"
+            )
+            
     def _remove_favorite(self, item):
         """Supprime un favori."""
         # Récupérer le chemin du volume directement
@@ -356,16 +469,71 @@ class MainWindow(QMainWindow):
         
         for favorite in favorites:
             self.log_message(f"Ajout du favori : {favorite['name']} ({favorite['volume_path']})")
-            item = QListWidgetItem(favorite['name'])
-            item.setData(Qt.ItemDataRole.UserRole, favorite['volume_path'])
-            item.setIcon(self.device_icon if favorite['is_device'] else self.file_icon)
-            self.favorites_list.addItem(item)
-            
+            self._add_favorite_item(favorite)
+                
         # Rafraîchir le menu des favoris
         self._refresh_favorites_menu()
         
         self.log_message("Fin du rafraîchissement des favoris")
         
+    def _add_favorite_item(self, favorite: dict):
+        """Ajoute un favori à la liste."""
+        item = QListWidgetItem(favorite['name'])
+        item.setData(Qt.ItemDataRole.UserRole, favorite['volume_path'])
+        item.setIcon(self.device_icon if favorite['is_device'] else self.file_icon)
+        self.favorites_list.addItem(item)
+        
+        # Analyser la fragmentation des conteneurs fichiers en arrière-plan
+        if not favorite['is_device']:
+            volume_path = favorite['volume_path']
+            run_async(
+                analyze_async(volume_path),
+                lambda report, path=volume_path: self._on_favorite_analyzed(path, report),
+                parent=self
+            )
+            
+    def _find_favorite_item(self, volume_path: str):
+        """Retourne la ligne d'un favori dans la liste, ou None."""
+        for row in range(self.favorites_list.count()):
+            item = self.favorites_list.item(row)
+            if item.data(Qt.ItemDataRole.UserRole) == volume_path:
+                return item
+        return None
+        
+    def _apply_favorites_diff(self, diff):
+        """Met à jour les seules lignes des favoris modifiés sur le disque."""
+        for favorite in diff.removed:
+            item = self._find_favorite_item(favorite['volume_path'])
+            if item is not None:
+                self.favorites_list.takeItem(self.favorites_list.row(item))
+        for favorite in diff.changed:
+            item = self._find_favorite_item(favorite['volume_path'])
+            if item is None:
+                self._add_favorite_item(favorite)
+            else:
+                item.setText(favorite['name'])
+        for favorite in diff.added:
+            self._add_favorite_item(favorite)
+        self._refresh_favorites_menu()
+        self.log_message(
+            f"Favoris modifiés sur le disque : {len(diff.added)} ajouté(s), "
+            f"{len(diff.removed)} supprimé(s), {len(diff.changed)} modifié(s)"
+        )
+        
+    def _on_favorite_analyzed(self, volume_path: str, report):
+        """Signale un favori dont le conteneur est fragmenté."""
+        if report is None:
+            return
+        item = self._find_favorite_item(volume_path)
+        if item is None:
+            return
+        if report.is_fragmented:
+            item.setIcon(self.warning_icon)
+            item.setToolTip(f"Conteneur fragmenté ({report.describe()}) : "
+                            "cause probable de lenteur")
+        else:
+            item.setToolTip(report.describe())
+                
     def _refresh_favorites_menu(self):
         """Rafraîchit le menu des favoris."""
         # Trouver le menu des favoris
@@ -374,6 +542,7 @@ class MainWindow(QMainWindow):
                 favorites_menu = action.menu()
                 # Effacer le menu
                 favorites_menu.clear()
+                self._add_mount_all_action(favorites_menu)
                 
                 # Ajouter les favoris au menu
                 for favorite in self.favorites.get_favorites():
@@ -394,15 +563,175 @@ class MainWindow(QMainWindow):
                     favorites_menu.addAction(no_favorites)
                 break
         
+    def _add_mount_all_action(self, favorites_menu):
+        """Ajoute l'action de montage groupé en tête du menu des favoris."""
+        mount_all_action = QAction("Monter tous les favoris", self)
+        mount_all_action.triggered.connect(self._mount_all_favorites)
+        mount_all_action.setEnabled(bool(self.favorites.get_favorites()))
+        favorites_menu.addAction(mount_all_action)
+        favorites_menu.addSeparator()
+        
+    def _mount_all_favorites(self):
+        """Monte en parallèle tous les favoris qui ne sont pas déjà montés."""
+        try:
+            snapshot = veracrypt.get_mount_snapshot()
+            # Une seule récupération de la clé pour tous les mots de passe enregistrés
+            saved_passwords = self.favorites.get_saved_passwords()
+            specs = []
+            for favorite in self.favorites.get_favorites():
+                favorite_path = favorite['volume_path']
+                if snapshot.find_by_container(favorite_path) is not None:
+                    continue
+                    
+                # Demander le mot de passe s'il n'est pas enregistré
+                password = saved_passwords.get(favorite_path)
+                if not password:
+                    password, ok = QInputDialog.getText(
+                        self,
+                        "Mot de passe",
+                        f"Mot de passe pour {favorite['name']} :",
+                        QLineEdit.EchoMode.Password
+                    )
+                    if not ok or not password:
+                        self.log_message(f"Favori {favorite['name']} ignoré")
+                        continue
+                        
+                specs.append(veracrypt.MountSpec(favorite_path, password, favorite.get('mount_point'),
+                                                 favorite.get('pim')))
+                
+            if not specs:
+                self.log_message("Tous les favoris sont déjà montés")
+                return
+                
+            names = {f['volume_path']: f['name'] for f in self.favorites.get_favorites()}
+            mount_points = {spec.volume_path: spec.mount_point for spec in specs}
+            self.log_message(f"Montage de {len(specs)} favori(s)...")
+            self.show_loading(f"Montage de {len(specs)} favori(s)...")
+            run_async(
+                veracrypt.mount_many_async(specs),
+                lambda results: self._on_favorites_mounted(names, mount_points, results),
+                lambda error: self._on_favorites_mounted(
+                    names, mount_points, {spec.volume_path: (False, error) for spec in specs}
+                ),
+                self
+            )
+            
+        except Exception as e:
+            self.hide_loading()
+            self.log_message(f"Erreur lors du montage des favoris : {str(e)}")
+            QMessageBox.critical(
+                self,
+                "Erreur",
+                f"Erreur lors du montage des favoris : {str(e)}"
+            )
+            
+    def _on_favorites_mounted(self, names: dict, mount_points: dict, results: dict):
+        """Affiche le bilan d'un montage groupé."""
+        self.hide_loading()
+        failures = []
+        for volume_path, (success, error) in results.items():
+            record_mount(volume_path, mount_points.get(volume_path), success, error)
+            name = names.get(volume_path, volume_path)
+            if success:
+                self.log_message(f"Favori {name} monté avec succès")
+            else:
+                self.log_message(f"Erreur lors du montage de {name} : {error}")
+                failures.append(f"{name} : {error}")
+                
+        self._refresh_mounted_volumes()
+        if failures:
+            QMessageBox.warning(
+                self,
+                "Montage des favoris",
+                f"{len(results) - len(failures)} favori(s) monté(s), "
+                f"{len(failures)} échec(s) :\n\n" + "\n".join(failures)
+            )
+            
+    def _dismount_all(self):
+        """Démonte en parallèle tous les volumes montés."""
+        snapshot = veracrypt.get_mount_snapshot()
+        count = len(snapshot)
+        if not count:
+            self.log_message("Aucun volume monté")
+            return
+            
+        reply = QMessageBox.question(
+            self,
+            "Confirmation",
+            f"Voulez-vous vraiment démonter les {count} volume(s) monté(s) ?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+            
+        self.show_loading(f"Démontage de {count} volume(s)...")
+        run_async(
+            veracrypt.dismount_all_async(),
+            lambda results: self._on_dismounted(results, snapshot),
+            self._on_dismount_failed,
+            self
+        )
+        
+    def _force_dismount(self, targets: list, snapshot):
+        """Retente avec --force les démontages qui ont échoué."""
+        self.show_loading(f"Démontage forcé de {len(targets)} volume(s)...")
+        run_async(
+            veracrypt.dismount_many_async(targets, force=True),
+            lambda results: self._on_dismounted(results, snapshot),
+            self._on_dismount_failed,
+            self
+        )
+        
+    def _on_dismount_failed(self, error: str):
+        """Signale l'échec d'un démontage groupé."""
+        self.hide_loading()
+        self._refresh_mounted_volumes()
+        self.log_message(f"Erreur lors du démontage : {error}")
+        QMessageBox.critical(self, "Erreur", f"Erreur lors du démontage : {error}")
+        
+    def _on_dismounted(self, results: dict, snapshot):
+        """Affiche le bilan d'un démontage groupé.
+
+        Args:
+            results: Résultats par cible
+            snapshot: Instantané pris avant le démontage, pour l'historique
+        """
+        self.hide_loading()
+        record_dismounts(results, snapshot)
+        failed = []
+        for target, result in results.items():
+            self.log_message(f"{target} : {result.describe()}")
+            if not result.success:
+                failed.append(target)
+                
+        self._refresh_mounted_volumes()
+        if not failed:
+            return
+            
+        details = "\n".join(f"{target} : {results[target].describe()}" for target in failed)
+        reply = QMessageBox.warning(
+            self,
+            "Démontage",
+            f"{len(results) - len(failed)} volume(s) démonté(s), {len(failed)} échec(s) :\n\n"
+            f"{details}\n\nForcer le démontage des volumes restants ?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self._force_dismount(failed, snapshot)
+            
     def _refresh_mounted_volumes(self):
         """Rafraîchit la liste des volumes montés."""
         try:
             volumes = veracrypt.list_mounted_volumes()
             self.mounted_list.clear()
             
-            for slot, mount_point in volumes:
-                item = QListWidgetItem(f"{mount_point}")
-                item.setData(Qt.ItemDataRole.UserRole, (slot, mount_point))
+            for volume in volumes:
+                if not volume.mount_point:
+                    continue
+                item = QListWidgetItem(f"{volume.mount_point}")
+                item.setData(Qt.ItemDataRole.UserRole, (volume.slot, volume.mount_point))
                 self.mounted_list.addItem(item)
                 
         except Exception as e:
@@ -413,6 +742,15 @@ class MainWindow(QMainWindow):
         self._refresh_mounted_volumes()
         self.log_message(f"Volume démonté : {mount_point}")
 
+    def closeEvent(self, event):
+        """Arrête la surveillance des montages à la fermeture."""
+        mount_table.remove_listener(self._mounts_listener)
+        self.preferences.remove_listener(self._preferences_listener)
+        self.favorites.remove_listener(self._favorites_listener)
+        self.creation_queue_view.detach()
+        session_keys.lock()
+        super().closeEvent(event)
+
     def log_message(self, message: str):
         """Ajoute un message dans la zone de logs."""
         self.log_area.append(message)
@@ -424,9 +762,11 @@ class MainWindow(QMainWindow):
             volumes = veracrypt.list_mounted_volumes()
             
             # Mettre à jour la liste
-            for slot, mount_point in volumes:
-                item = QListWidgetItem(f"{mount_point}")
-                item.setData(Qt.ItemDataRole.UserRole, (slot, mount_point))
+            for volume in volumes:
+                if not volume.mount_point:
+                    continue
+                item = QListWidgetItem(f"{volume.mount_point}")
+                item.setData(Qt.ItemDataRole.UserRole, (volume.slot, volume.mount_point))
                 self.mounted_list.addItem(item)
                 
             self.log_message(f"Volumes chargés: {volumes}")
@@ -513,15 +853,113 @@ class MainWindow(QMainWindow):
         """Affiche le dialogue des préférences."""
         dialog = PreferencesDialog(self)
         if dialog.exec():
-            # Appliquer le thème si nécessaire
-            apply_theme(QApplication.instance(), self.preferences.get('theme'))
             self.log_message("Préférences mises à jour")
+            
+    def _apply_preference_changes(self, changes: dict):
+        """Applique les préférences modifiées (clé -> PreferenceChange)."""
+        if 'theme' in changes:
+            apply_theme(QApplication.instance(), changes['theme'].new)
 
     def _show_create_volume_wizard(self):
         """Affiche l'assistant de création de volume."""
         wizard = CreateVolumeWizard(self)
         wizard.exec()
 
+    def _show_creation_queue(self):
+        """Affiche la file d'attente des créations."""
+        self.creation_queue_view.show()
+        self.creation_queue_view.raise_()
+
+    def _provision_from_manifest(self):
+        """Crée en lot les volumes décrits par un manifeste."""
+        manifest_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Choisir un manifeste",
+            "",
+            "Manifestes (*.toml *.json);;Tous les fichiers (*.*)"
+        )
+        if not manifest_path:
+            return
+            
+        try:
+            entries = load_manifest(manifest_path)
+            # Demander les mots de passe absents du manifeste avant de lancer
+            for entry in entries:
+                if entry.resolve_password():
+                    continue
+                password, ok = QInputDialog.getText(
+                    self,
+                    "Mot de passe",
+                    f"Mot de passe du volume {entry.path} :",
+                    QLineEdit.EchoMode.Password
+                )
+                if not ok:
+                    return
+                entry.password = password
+        except ManifestError as e:
+            QMessageBox.critical(self, "Erreur", f"Manifeste invalide :\n{e}")
+            return
+            
+        self.log_message(f"Provisionnement de {len(entries)} volume(s) depuis {manifest_path}...")
+        self._show_creation_queue()
+        run_async(
+            provision_async(entries, self.favorites),
+            lambda report: self._on_provisioned(manifest_path, report),
+            lambda error: self.log_message(f"Erreur lors du provisionnement : {error}"),
+            self
+        )
+        
+    def _on_provisioned(self, manifest_path: str, report: dict):
+        """Termine un provisionnement : rapport et favoris."""
+        report_path = os.path.splitext(manifest_path)[0] + '.report.json'
+        try:
+            write_report(report, report_path)
+        except OSError as e:
+            self.log_message(f"Impossible d'écrire le rapport : {e}")
+            report_path = None
+        self._refresh_favorites()
+        
+        message = f"{report['succeeded']} volume(s) créé(s), {report['failed']} échec(s)"
+        if report_path:
+            message += f"\nRapport : {report_path}"
+        self.log_message(f"Provisionnement terminé : {message}")
+        QMessageBox.information(self, "Provisionnement", message)
+        
+    def _on_creation_finished(self, job):
+        """Appelé quand une création de la file se termine."""
+        if job.state == CANCELLED:
+            self.log_message(f"Création annulée : {job.path}")
+            return
+        if job.state != SUCCEEDED:
+            self.log_message(f"Échec de la création de {job.path} : {job.message}")
+            QMessageBox.critical(self, "Erreur", f"{job.path} :\n{job.message}")
+            return
+
+        self.log_message(f"Volume créé : {job.path}")
+        if not job.mount_after or not job.password:
+            return
+
+        # Monter le volume créé, puis oublier son mot de passe
+        password, job.password = job.password, None
+        mount_point = veracrypt.generate_mount_point()
+        start = time.monotonic()
+        run_async(
+            veracrypt.mount_volume_async(job.path, mount_point, password, pim=job.pim),
+            lambda result: self._on_created_volume_mounted(job.path, mount_point, result, start),
+            lambda error: self._on_created_volume_mounted(job.path, mount_point, (False, error), start),
+            self
+        )
+
+    def _on_created_volume_mounted(self, volume_path: str, mount_point: str, result, start: float):
+        """Termine le montage d'un volume qui vient d'être créé."""
+        success, message = result
+        record_mount(volume_path, mount_point, success, message, time.monotonic() - start)
+        if success:
+            self._refresh_mounted_volumes()
+        else:
+            QMessageBox.warning(self, "Erreur de montage",
+                              f"Le volume a été créé mais n'a pas pu être monté :\n{message}")
+
     def _show_change_password_wizard(self):
         """Affiche l'assistant de changement de mot de passe."""
         wizard = ChangePasswordWizard(self)
@@ -534,30 +972,40 @@ class MainWindow(QMainWindow):
             new_password = wizard.new_password
             current_keyfile = wizard.current_keyfile
             new_keyfile = wizard.new_keyfile
+            new_pim = wizard.new_pim
+            current_pim = wizard.current_pim
             
             # Afficher le dialogue de chargement
             self.show_loading("Modification du mot de passe en cours...")
             
-            try:
-                # Changer le mot de passe
-                success, message = VolumeCreation.change_password(
+            # La dérivation des clés peut être longue (PIM élevé) : hors du thread Qt
+            run_async(
+                VolumeCreation.change_password_async(
                     volume_path,
                     current_password,
                     new_password,
                     current_keyfile,
-                    new_keyfile
-                )
-                
-                self.hide_loading()
-                
-                if success:
-                    QMessageBox.information(self, "Succès", message)
-                    self.log_message(f"Mot de passe modifié avec succès pour {volume_path}")
-                else:
-                    QMessageBox.warning(self, "Erreur", message)
-                    self.log_message(f"Erreur lors de la modification du mot de passe : {message}")
-                    
-            except Exception as e:
-                self.hide_loading()
-                QMessageBox.critical(self, "Erreur", f"Une erreur est survenue : {str(e)}")
-                self.log_message(f"Exception lors de la modification du mot de passe : {str(e)}")
+                    new_keyfile,
+                    new_pim,
+                    current_pim
+                ),
+                lambda result: self._on_password_changed(volume_path, result, new_password, new_pim),
+                lambda error: self._on_password_changed(volume_path, (False, f"Une erreur est survenue : {error}"),
+                                                        new_password, new_pim),
+                self
+            )
+            
+    def _on_password_changed(self, volume_path: str, result, new_password: str, new_pim):
+        """Affiche le résultat du changement de mot de passe."""
+        success, message = result
+        self.hide_loading()
+        
+        if success:
+            # Le favori doit monter avec le nouveau PIM (et le nouveau mot de passe enregistré)
+            if self.favorites.update_credentials(volume_path, new_password, new_pim):
+                self.log_message(f"Favori {volume_path} mis à jour")
+            QMessageBox.information(self, "Succès", message)
+            self.log_message(f"Mot de passe modifié avec succès pour {volume_path}")
+        else:
+            QMessageBox.warning(self, "Erreur", message)
+            self.log_message(f"Erreur lors de la modification du mot de passe : {message}")
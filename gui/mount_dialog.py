@@ -6,7 +6,7 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QLineEdit,
     QFileDialog, QMessageBox, QDialogButtonBox,
-    QInputDialog, QCheckBox
+    QInputDialog, QCheckBox, QSpinBox
 )
 from PyQt6.QtCore import QDir, Qt, QUrl, pyqtSignal
 from typing import Optional, Tuple
@@ -20,9 +20,12 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from constants import Constants
 from utils import veracrypt, system
 from utils.favorites import Favorites
+from utils.fragmentation import analyze_async
 import time
 from gui.loading_dialog import LoadingDialog
 from gui.device_dialog import DeviceDialog
+from gui.async_task import run_async
+from gui.utils import record_mount
 
 class MountDialog(QDialog):
     # Signal émis quand un favori est ajouté
@@ -34,6 +37,8 @@ class MountDialog(QDialog):
         self.favorite_path = favorite_path
         self.favorites = Favorites()
         self.favorite_added = False  # Pour suivre si un favori a été ajouté
+        # Montage en cours (tâche asynchrone), None sinon
+        self._mount_task = None
         self.setup_ui()
         
         # Si c'est un favori, charger le mot de passe s'il existe
@@ -63,6 +68,14 @@ class MountDialog(QDialog):
         path_layout.addWidget(browse_button)
         layout.addLayout(path_layout)
         
+        # Avertissement de fragmentation (conteneurs fichiers)
+        self.fragmentation_label = QLabel()
+        self.fragmentation_label.setWordWrap(True)
+        self.fragmentation_label.setStyleSheet("color: #c0392b;")
+        self.fragmentation_label.setVisible(False)
+        layout.addWidget(self.fragmentation_label)
+        self.path_edit.textChanged.connect(self._check_fragmentation)
+        
         # Point de montage
         mount_layout = QHBoxLayout()
         self.mount_edit = QLineEdit()
@@ -88,6 +101,20 @@ class MountDialog(QDialog):
         password_layout.addWidget(self.password_edit)
         layout.addLayout(password_layout)
         
+        # PIM (0 : valeur par défaut de VeraCrypt) ; un volume créé avec un
+        # PIM ne se monte qu'avec ce même PIM
+        pim_layout = QHBoxLayout()
+        self.pim_spin = QSpinBox()
+        self.pim_spin.setRange(0, 100000)
+        self.pim_spin.setSpecialValueText("Par défaut")
+        if self.favorite_path:
+            favorite = self.favorites.get_favorite(self.favorite_path)
+            if favorite and favorite.get('pim'):
+                self.pim_spin.setValue(favorite['pim'])
+        pim_layout.addWidget(QLabel("PIM :"))
+        pim_layout.addWidget(self.pim_spin)
+        layout.addLayout(pim_layout)
+        
         # Options
         options_layout = QVBoxLayout()
         
@@ -108,15 +135,38 @@ class MountDialog(QDialog):
         layout.addLayout(options_layout)
         
         # Boutons
-        button_box = QDialogButtonBox(
+        self.button_box = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok | 
             QDialogButtonBox.StandardButton.Cancel
         )
-        button_box.accepted.connect(self.accept)
-        button_box.rejected.connect(self.reject)
-        layout.addWidget(button_box)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        layout.addWidget(self.button_box)
         
         self.setLayout(layout)
+        self._check_fragmentation(self.path_edit.text())
+        
+    def _check_fragmentation(self, path: str):
+        """Lance l'analyse de fragmentation du conteneur choisi."""
+        self.fragmentation_label.setVisible(False)
+        if self.is_device or not os.path.isfile(path):
+            return
+        run_async(
+            analyze_async(path),
+            lambda report: self._on_fragmentation_analyzed(path, report),
+            parent=self
+        )
+        
+    def _on_fragmentation_analyzed(self, path: str, report):
+        """Affiche l'avertissement si le conteneur est fragmenté."""
+        if path != self.path_edit.text() or report is None or not report.is_fragmented:
+            return
+        self.fragmentation_label.setText(
+            f"Conteneur fragmenté ({report.describe()}) : les accès au volume "
+            "monté risquent d'être lents. Copier le conteneur vers un fichier "
+            "neuf le défragmente."
+        )
+        self.fragmentation_label.setVisible(True)
         
     def browse_volume(self):
         """Ouvre un dialogue pour sélectionner un volume."""
@@ -168,9 +218,12 @@ class MountDialog(QDialog):
             
     def accept(self):
         """Valide et monte le volume."""
+        if self._mount_task is not None:
+            return
         path = self.path_edit.text()
         mount_point = self.mount_edit.text()
         password = self.password_edit.text()
+        pim = self.pim_spin.value() or None
         
         if not path:
             QMessageBox.warning(self, "Erreur", "Veuillez sélectionner un volume")
@@ -190,8 +243,29 @@ class MountDialog(QDialog):
             QMessageBox.warning(self, "Erreur", error)
             return
             
-        # Monter le volume
-        success, error = veracrypt.mount_volume(path, mount_point, password)
+        # Monter le volume sans bloquer l'interface
+        self.button_box.setEnabled(False)
+        start = time.monotonic()
+        self._mount_task = run_async(
+            veracrypt.mount_volume_async(path, mount_point, password, pim=pim),
+            lambda result: self._on_mounted(path, mount_point, password, pim, result, start),
+            lambda error: self._on_mounted(path, mount_point, password, pim, (False, error), start),
+            self
+        )
+        
+    def reject(self):
+        """Ferme le dialogue, sauf pendant un montage."""
+        if self._mount_task is not None and self._mount_task.is_running():
+            return
+        super().reject()
+        
+    def _on_mounted(self, path: str, mount_point: str, password: str, pim: Optional[int],
+                    result, start: float):
+        """Termine le montage lancé par accept."""
+        self._mount_task = None
+        self.button_box.setEnabled(True)
+        success, error = result
+        record_mount(path, mount_point, success, error, time.monotonic() - start)
         
         if success:
             # Si l'option favori est cochée et que ce n'est pas déjà un favori
@@ -211,7 +285,8 @@ class MountDialog(QDialog):
                         path, 
                         self.is_device, 
                         mount_point,
-                        password if save_password else None
+                        password if save_password else None,
+                        pim
                     ):
                         print("Favori ajouté avec succès")  # Debug
                         self.favorite_added = True
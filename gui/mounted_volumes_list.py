@@ -6,6 +6,9 @@ from PyQt6.QtWidgets import QListWidget, QListWidgetItem, QMenu, QMessageBox
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QIcon
 from utils import veracrypt
+from gui.async_task import run_async
+from gui.utils import record_dismount
+import time
 
 class MountedVolumesList(QListWidget):
     """Liste des volumes montés avec menu contextuel."""
@@ -72,9 +75,11 @@ class MountedVolumesList(QListWidget):
             self.clear()
             
             # Ajouter chaque volume à la liste
-            for slot, mount_point in volumes:
-                item = QListWidgetItem(f"{mount_point}")
-                item.setData(Qt.ItemDataRole.UserRole, (slot, mount_point))
+            for volume in volumes:
+                if not volume.mount_point:
+                    continue
+                item = QListWidgetItem(f"{volume.mount_point}")
+                item.setData(Qt.ItemDataRole.UserRole, (volume.slot, volume.mount_point))
                 self.addItem(item)
                 
         except Exception as e:
@@ -125,21 +130,35 @@ class MountedVolumesList(QListWidget):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            success, error = veracrypt.unmount_volume(mount_point)
-            if success:
-                # Émettre le signal de démontage
-                self.volume_unmounted.emit(mount_point)
-                QMessageBox.information(
-                    self,
-                    "Succès",
-                    f"Le volume {mount_point} a été démonté avec succès"
-                )
-            else:
-                QMessageBox.critical(
-                    self,
-                    "Erreur",
-                    f"Erreur lors du démontage: {error}"
-                )
+            # Démonter sans bloquer l'interface ; l'instantané, pris avant,
+            # retrouve le volume démonté pour l'historique
+            snapshot = veracrypt.get_mount_snapshot()
+            start = time.monotonic()
+            run_async(
+                veracrypt.unmount_volume_async(mount_point),
+                lambda result: self._on_unmounted(mount_point, result, snapshot, start),
+                lambda error: self._on_unmounted(mount_point, (False, error), snapshot, start),
+                self
+            )
+            
+    def _on_unmounted(self, mount_point: str, result, snapshot, start: float):
+        """Termine le démontage d'un volume."""
+        success, error = result
+        record_dismount(mount_point, success, error, time.monotonic() - start, snapshot)
+        if success:
+            # Émettre le signal de démontage
+            self.volume_unmounted.emit(mount_point)
+            QMessageBox.information(
+                self,
+                "Succès",
+                f"Le volume {mount_point} a été démonté avec succès"
+            )
+        else:
+            QMessageBox.critical(
+                self,
+                "Erreur",
+                f"Erreur lors du démontage: {error}"
+            )
                 
     def _open_volume(self, mount_point: str):
         """Ouvre le volume dans le gestionnaire de fichiers."""
@@ -158,16 +177,21 @@ class MountedVolumesList(QListWidget):
         """Affiche les informations sur le volume."""
         try:
             # Récupérer les informations du volume
-            volumes = veracrypt.list_mounted_volumes()
-            for vol_slot, vol_mount in volumes:
-                if vol_slot == slot:
-                    QMessageBox.information(
-                        self,
-                        "Informations sur le volume",
-                        f"Slot: {slot}\n"
-                        f"Point de montage: {mount_point}"
-                    )
-                    return
+            volume = veracrypt.get_mount_snapshot().by_slot.get(slot)
+            if volume is not None:
+                QMessageBox.information(
+                    self,
+                    "Informations sur le volume",
+                    f"Slot: {volume.slot}\n"
+                    f"Volume: {volume.volume_path}\n"
+                    f"Périphérique virtuel: {volume.virtual_device}\n"
+                    f"Point de montage: {volume.mount_point or mount_point}\n"
+                    f"Taille: {volume.size}\n"
+                    f"Chiffrement: {volume.encryption}\n"
+                    f"PRF: {volume.prf}\n"
+                    f"Lecture seule: {'Oui' if volume.read_only else 'Non'}"
+                )
+                return
                     
             QMessageBox.warning(
                 self,
@@ -0,0 +1,126 @@
+"""
+Choix du PIM d'un volume, guidé par le temps de déverrouillage.
+"""
+
+from typing import Optional
+from PyQt6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QSpinBox,
+    QPushButton
+)
+from utils.constants import Constants
+from utils.pim_calibration import DEFAULT_PIM, SHORT_PASSWORD_LENGTH, calibrate_async, cached_calibration
+from .async_task import run_async
+
+class PimSelector(QWidget):
+    """PIM (0 : valeur par défaut de VeraCrypt), temps de déverrouillage
+    estimé et recommandation pour un temps visé."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Fonction de hachage du volume (None : inconnue, toutes sont essayées)
+        self.hash_algo = None
+        self.calibration = cached_calibration()
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # PIM
+        pim_layout = QHBoxLayout()
+        pim_layout.addWidget(QLabel("PIM :"))
+        self.pim_spin = QSpinBox()
+        self.pim_spin.setRange(0, 100000)
+        self.pim_spin.setSpecialValueText("Par défaut")
+        self.pim_spin.valueChanged.connect(self._update_estimate)
+        pim_layout.addWidget(self.pim_spin, 1)
+        layout.addLayout(pim_layout)
+
+        # Recommandation pour un temps de déverrouillage visé
+        target_layout = QHBoxLayout()
+        target_layout.addWidget(QLabel("Temps de déverrouillage visé :"))
+        self.target_spin = QSpinBox()
+        self.target_spin.setRange(100, 60000)
+        self.target_spin.setSingleStep(100)
+        self.target_spin.setSuffix(" ms")
+        self.target_spin.setValue(int(Constants.PIM_TARGET_UNLOCK_TIME * 1000))
+        target_layout.addWidget(self.target_spin, 1)
+
+        self.recommend_button = QPushButton("Recommander")
+        self.recommend_button.clicked.connect(self._recommend)
+        target_layout.addWidget(self.recommend_button)
+
+        self.calibrate_button = QPushButton("Calibrer")
+        self.calibrate_button.clicked.connect(self._run_calibration)
+        target_layout.addWidget(self.calibrate_button)
+        layout.addLayout(target_layout)
+
+        self.estimate_label = QLabel()
+        self.estimate_label.setWordWrap(True)
+        layout.addWidget(self.estimate_label)
+
+        # Avertissement quand le temps visé imposerait un PIM plus faible que le défaut
+        self.recommendation_label = QLabel()
+        self.recommendation_label.setWordWrap(True)
+        self.recommendation_label.setStyleSheet("color: #c0392b;")
+        self.recommendation_label.setVisible(False)
+        layout.addWidget(self.recommendation_label)
+
+        self.setLayout(layout)
+        self._update_estimate()
+
+    def pim(self) -> Optional[int]:
+        """PIM choisi, ou None pour la valeur par défaut."""
+        return self.pim_spin.value() or None
+
+    def set_hash_algo(self, hash_algo: Optional[str]):
+        """Change la fonction de hachage prise en compte par l'estimation."""
+        self.hash_algo = hash_algo
+        self._update_estimate()
+
+    def _update_estimate(self):
+        """Affiche le temps de déverrouillage du PIM choisi."""
+        self.recommend_button.setEnabled(self.calibration is not None)
+        if self.calibration is None:
+            self.estimate_label.setText("Temps de déverrouillage : machine non calibrée")
+        else:
+            self.estimate_label.setText(self.calibration.describe(self.hash_algo, self.pim()))
+
+    def _recommend(self):
+        """Choisit le PIM qui atteint le temps de déverrouillage visé, sans
+        descendre sous le PIM par défaut."""
+        target = self.target_spin.value() / 1000
+        pim = self.calibration.recommend(self.hash_algo, target)
+        if pim is None:
+            return
+        self.pim_spin.setValue(pim)
+        target_pim = self.calibration.pim_for_target(self.hash_algo, target)
+        if target_pim < DEFAULT_PIM:
+            self.recommendation_label.setText(
+                f"Le temps visé correspond à un PIM de {target_pim}, inférieur au PIM par "
+                f"défaut de VeraCrypt ({DEFAULT_PIM}) : le mot de passe serait plus rapide "
+                f"à attaquer. PIM {DEFAULT_PIM} proposé ; un PIM plus faible exige un mot "
+                f"de passe d'au moins {SHORT_PASSWORD_LENGTH} caractères."
+            )
+            self.recommendation_label.setVisible(True)
+        else:
+            self.recommendation_label.setVisible(False)
+
+    def _run_calibration(self):
+        """Mesure le débit de PBKDF2 sur cette machine."""
+        self.calibrate_button.setEnabled(False)
+        self.estimate_label.setText("Calibration en cours...")
+        run_async(calibrate_async(), self._on_calibrated, self._on_calibration_failed, self)
+
+    def _on_calibrated(self, calibration):
+        """Affiche l'estimation avec la nouvelle calibration."""
+        self.calibrate_button.setEnabled(True)
+        self.calibration = calibration
+        self._update_estimate()
+
+    def _on_calibration_failed(self, error: str):
+        """Affiche l'échec de la calibration."""
+        self.calibrate_button.setEnabled(True)
+        self.estimate_label.setText(f"Calibration impossible : {error}")
@@ -95,9 +95,10 @@ class PreferencesDialog(QDialog):
             
     def accept(self):
         """Sauvegarde les préférences."""
-        preferences.set('auto_clean_mount_points', self.auto_clean_checkbox.isChecked())
-        preferences.set('check_mount_points_on_start', self.check_on_start_checkbox.isChecked())
-        preferences.set('show_notifications', self.show_notifications_checkbox.isChecked())
-        preferences.set('default_mount_dir', self.mount_dir_label.text())
-        preferences.set('theme', self.theme_combo.currentText())
+        with preferences.batch():
+            preferences.set('auto_clean_mount_points', self.auto_clean_checkbox.isChecked())
+            preferences.set('check_mount_points_on_start', self.check_on_start_checkbox.isChecked())
+            preferences.set('show_notifications', self.show_notifications_checkbox.isChecked())
+            preferences.set('default_mount_dir', self.mount_dir_label.text())
+            preferences.set('theme', self.theme_combo.currentText())
         super().accept()
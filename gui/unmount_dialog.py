@@ -2,9 +2,11 @@
 Dialogue de démontage pour les volumes VeraCrypt.
 """
 
-from PyQt6.QtWidgets import QDialog, QInputDialog, QMessageBox
+from PyQt6.QtWidgets import QDialog, QInputDialog, QLabel, QMessageBox, QVBoxLayout
 from utils import veracrypt, system
 from constants import Constants
+from gui.async_task import run_async
+from gui.utils import record_dismounts
 
 class UnmountDialog(QDialog):
     def __init__(self, parent=None):
@@ -12,11 +14,19 @@ class UnmountDialog(QDialog):
         self.parent = parent
         self.setWindowTitle("Démontage VeraCrypt")
         self.setModal(True)
+        # Démontage en cours (tâche asynchrone), None sinon
+        self._task = None
+        
+        layout = QVBoxLayout()
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
 
     def exec(self) -> bool:
         """Exécute le dialogue de démontage."""
         # Liste des volumes montés
-        volumes = veracrypt.list_mounted_volumes()
+        self.snapshot = veracrypt.get_mount_snapshot()
+        volumes = list(self.snapshot.by_mount_point)
         if not volumes:
             QMessageBox.information(self, 'Info', 'Aucun volume monté.')
             return False
@@ -26,8 +36,9 @@ class UnmountDialog(QDialog):
         if not selected_mount:
             return False
 
-        # Démontage du volume
-        return self._unmount_volume(selected_mount)
+        # Démontage du volume ; le dialogue reste affiché sans bloquer l'interface
+        self._unmount_volume(selected_mount)
+        return super().exec() == QDialog.DialogCode.Accepted
 
     def _select_volume(self, volumes):
         """Sélectionne un volume à démonter."""
@@ -41,13 +52,23 @@ class UnmountDialog(QDialog):
         )
         return selected_mount if ok and selected_mount else None
 
-    def _unmount_volume(self, mount_point: str) -> bool:
-        """Démonte un volume VeraCrypt."""
+    def _unmount_volume(self, mount_point: str):
+        """Lance le démontage d'un volume VeraCrypt."""
         self.parent.log_message(f"Tentative de démontage du volume sur {mount_point}...")
+        self.status_label.setText(f"Démontage de {mount_point}...")
+        self._task = run_async(
+            veracrypt.dismount_many_async([mount_point]),
+            lambda results: self._on_unmounted(mount_point, results[mount_point]),
+            lambda error: self._on_unmounted(mount_point, veracrypt.DismountResult(mount_point, False, error)),
+            self
+        )
+
+    def _on_unmounted(self, mount_point: str, result):
+        """Termine le démontage lancé par _unmount_volume."""
+        self._task = None
+        record_dismounts({mount_point: result}, self.snapshot)
         
-        success, message = veracrypt.unmount_volume(mount_point)
-        
-        if success:
+        if result.success:
             QMessageBox.information(self, 'Succès', f'Volume démonté avec succès: {mount_point}')
             if mount_point in self.parent.mounted_volumes:
                 del self.parent.mounted_volumes[mount_point]
@@ -56,7 +77,13 @@ class UnmountDialog(QDialog):
             if mount_point.startswith(Constants.MOUNT_PREFIX):
                 system.cleanup_mount_point(mount_point)
             
-            return True
+            self.accept()
         else:
-            QMessageBox.critical(self, 'Erreur', f'Erreur de démontage:\n{message}')
-            return False
+            QMessageBox.critical(self, 'Erreur', f'Erreur de démontage:\n{result.describe()}')
+            self.reject()
+
+    def reject(self):
+        """Ferme le dialogue, sauf pendant un démontage."""
+        if self._task is not None and self._task.is_running():
+            return
+        super().reject()
@@ -2,8 +2,12 @@
 Fonctions utilitaires pour l'interface graphique.
 """
 
+from typing import Dict, Optional
 from PyQt6.QtWidgets import QDialog, QWidget
 from PyQt6.QtCore import Qt
+from utils.favorites import Favorites
+from utils.mount_table import MountSnapshot
+from utils.store import store
 
 def center_window(window: QWidget, parent: QWidget = None):
     """Centre une fenêtre par rapport à son parent ou à l'écran."""
@@ -31,3 +35,30 @@ def setup_dialog(dialog: QDialog, parent: QWidget = None, title: str = None, wid
         dialog.setMinimumWidth(width)
     dialog.setModal(True)
     center_window(dialog, parent)
+
+def record_mount(volume_path: str, mount_point: str, success: bool, error: str = '',
+                 duration: Optional[float] = None):
+    """Note un montage dans l'historique et, s'il a réussi, dans le favori."""
+    store.record_event('mount', volume_path, mount_point, success, duration, '' if success else error)
+    if success:
+        Favorites().mark_mounted(volume_path)
+
+def record_dismount(target: str, success: bool, error: str = '', duration: Optional[float] = None,
+                    snapshot: Optional[MountSnapshot] = None):
+    """Note un démontage dans l'historique.
+
+    Args:
+        target: Point de montage (ou chemin du volume) démonté
+        snapshot: Instantané pris avant le démontage, pour retrouver le volume
+    """
+    volume = None
+    if snapshot is not None:
+        volume = snapshot.find_by_mount_point(target) or snapshot.find_by_container(target)
+    volume_path = volume.volume_path if volume else None
+    mount_point = volume.mount_point if volume else target
+    store.record_event('dismount', volume_path, mount_point, success, duration, '' if success else error)
+
+def record_dismounts(results: Dict, snapshot: Optional[MountSnapshot] = None):
+    """Note dans l'historique les résultats d'un démontage groupé."""
+    for target, result in results.items():
+        record_dismount(target, result.success, result.error, result.elapsed, snapshot)
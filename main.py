@@ -11,6 +11,56 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
+# Assistant privilégié lancé par sudo depuis l'exécutable PyInstaller :
+# l'exécuter sans charger PyQt ni le paquet utils
+if len(sys.argv) > 1 and sys.argv[1] == '--privileged-helper':
+    import runpy
+    sys.argv = [sys.argv[0]] + sys.argv[2:]
+    runpy.run_path(os.path.join(current_dir, 'utils', 'root_helper.py'), run_name='__main__')
+    sys.exit(0)
+
+def provision_main(argv):
+    """Provisionnement en lot sans interface : `main.py --provision MANIFESTE`."""
+    import argparse
+    import contextlib
+    import getpass
+    from utils.provisioning import ManifestError, load_manifest, provision, write_report
+    from utils.sudo_session import sudo_session
+    from utils.favorites import Favorites
+
+    parser = argparse.ArgumentParser(description="Crée les volumes décrits par un manifeste TOML ou JSON.")
+    parser.add_argument('--provision', metavar='MANIFESTE', required=True,
+                        help="Manifeste des volumes à créer")
+    parser.add_argument('--report', metavar='FICHIER',
+                        help="Fichier du rapport JSON (sortie standard par défaut)")
+    args = parser.parse_args(argv)
+
+    try:
+        entries = load_manifest(args.provision)
+    except ManifestError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 2
+
+    if not sudo_session.initialize_session(getpass.getpass("Mot de passe sudo : ")):
+        print("Erreur : impossible d'initialiser la session sudo", file=sys.stderr)
+        return 2
+
+    def ask_password(entry):
+        return getpass.getpass(f"Mot de passe du volume {entry.path} : ")
+
+    def report_job(job):
+        print(f"{job.path} : {job.message}", file=sys.stderr)
+
+    # La sortie standard est réservée au rapport
+    with contextlib.redirect_stdout(sys.stderr):
+        report = provision(entries, Favorites(), ask_password, report_job)
+    write_report(report, args.report)
+    return 0 if report['failed'] == 0 else 1
+
+# Provisionnement en lot : pas d'interface graphique
+if '--provision' in sys.argv[1:]:
+    sys.exit(provision_main(sys.argv[1:]))
+
 from PyQt6.QtWidgets import QApplication
 from gui.main_window import MainWindow
 
@@ -69,7 +69,7 @@ a = Analysis(
         'gui.create_volume_wizard',
         'gui.change_password_dialog',
         'gui.device_dialog',
-        'gui.progress_dialog',
+        'gui.async_task',
         'utils.favorites',
         'utils.veracrypt',
         'utils.system',
@@ -78,7 +78,34 @@ a = Analysis(
         'utils.sudo_session',
         'utils.preferences',
         'utils.themes',
-        'utils.crypto'
+        'utils.crypto',
+        'utils.mount_table',
+        'utils.creation_queue',
+        'utils.provisioning',
+        'utils.filesystem',
+        'utils.fragmentation',
+        'utils.mkfs',
+        'utils.cipher_benchmark',
+        'utils.pim_calibration',
+        'utils.store',
+        'utils.file_watcher',
+        'sqlite3',
+        'tomllib',
+        'gui.creation_queue_view',
+        'gui.pim_selector',
+        'utils.privileged_helper',
+        'utils.command_engine',
+        'utils.prompt_driver',
+        'utils.progress',
+        'pty',
+        'selectors',
+        'termios',
+        'tempfile',
+        'secrets',
+        'asyncio',
+        'argparse',
+        'runpy',
+        'socket'
     ] + crypto_hiddenimports,  # Ajouter les imports cachés de cryptography
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,207 @@
+"""
+Tests de la frontière de privilèges de l'assistant root (utils/root_helper.py).
+
+Le module est chargé par son chemin, comme l'assistant lui-même : il
+n'importe pas le paquet utils (et donc pas PyQt).
+"""
+
+import errno
+import importlib.util
+import os
+import tempfile
+import unittest
+
+_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'utils', 'root_helper.py')
+_spec = importlib.util.spec_from_file_location('root_helper', _PATH)
+root_helper = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(root_helper)
+
+class VeracryptArgsTest(unittest.TestCase):
+    def test_allowed_action(self):
+        root_helper.check_veracrypt_args(['--text', '--mount', '/v.hc', '/mnt'])
+
+    def test_action_not_allowed(self):
+        with self.assertRaises(ValueError):
+            root_helper.check_veracrypt_args(['--text', '--restore-headers', '/v.hc'])
+
+    def test_no_action(self):
+        with self.assertRaises(ValueError):
+            root_helper.check_veracrypt_args(['--text', '/v.hc'])
+
+    def test_several_actions(self):
+        with self.assertRaises(ValueError):
+            root_helper.check_veracrypt_args(['--mount', '/v.hc', '--create', '/w.hc'])
+
+    def test_action_with_value(self):
+        with self.assertRaises(ValueError):
+            root_helper.check_veracrypt_args(['--mount=/v.hc', '--save-preferences'])
+
+    def test_non_string_argument(self):
+        with self.assertRaises(ValueError):
+            root_helper.check_veracrypt_args(['--list', 3])
+
+class MkfsCommandTest(unittest.TestCase):
+    DEVICE = '/dev/mapper/veracrypt3'
+
+    def test_unknown_filesystem(self):
+        with self.assertRaises(ValueError):
+            root_helper.mkfs_command(['xfs', '-q', self.DEVICE])
+
+    def test_option_not_allowed(self):
+        with self.assertRaises(ValueError):
+            root_helper.mkfs_command(['ext4', '-d', '/root', self.DEVICE])
+
+    def test_option_of_other_filesystem(self):
+        # -f n'existe que pour btrfs
+        with self.assertRaises(ValueError):
+            root_helper.mkfs_command(['ext4', '-f', self.DEVICE])
+
+    def test_missing_option_value(self):
+        with self.assertRaises(ValueError):
+            root_helper.mkfs_command(['ext4', '-q', '-L', self.DEVICE])
+
+    def test_device_outside_mapper(self):
+        for device in ('/dev/sda1', '/dev/mapper/root', '/dev/mapper/veracrypt1/../root',
+                       '/dev/mapper/veracrypt', 'veracrypt1'):
+            with self.subTest(device=device), self.assertRaises(ValueError):
+                root_helper.mkfs_command(['ext4', '-q', device])
+
+    def test_too_few_arguments(self):
+        with self.assertRaises(ValueError):
+            root_helper.mkfs_command([self.DEVICE])
+
+class RenameTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.staging = os.path.join(self.root, root_helper.NOCOW_STAGING_PREFIX + 'x1')
+        os.mkdir(self.staging)
+        self.source = os.path.join(self.staging, 'v.hc')
+        with open(self.source, 'w') as f:
+            f.write('volume')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_move(self):
+        destination = os.path.join(self.root, 'v.hc')
+        root_helper.rename_noreplace([self.source, destination])
+        self.assertTrue(os.path.isfile(destination))
+        self.assertFalse(os.path.exists(self.source))
+
+    def test_never_replaces(self):
+        destination = os.path.join(self.root, 'v.hc')
+        with open(destination, 'w') as f:
+            f.write('existing')
+        with self.assertRaises(OSError) as raised:
+            root_helper.rename_noreplace([self.source, destination])
+        self.assertEqual(raised.exception.errno, errno.EEXIST)
+        with open(destination) as f:
+            self.assertEqual(f.read(), 'existing')
+
+    def test_source_outside_staging(self):
+        other = os.path.join(self.root, 'other')
+        os.mkdir(other)
+        source = os.path.join(other, 'v.hc')
+        with open(source, 'w') as f:
+            f.write('volume')
+        with self.assertRaises(ValueError):
+            root_helper.rename_noreplace([source, os.path.join(self.root, 'v.hc')])
+
+    def test_system_file(self):
+        with self.assertRaises(ValueError):
+            root_helper.rename_noreplace(['/etc/passwd', os.path.join(self.root, 'passwd')])
+
+    def test_destination_elsewhere(self):
+        elsewhere = tempfile.mkdtemp()
+        try:
+            with self.assertRaises(ValueError):
+                root_helper.rename_noreplace([self.source, os.path.join(elsewhere, 'v.hc')])
+        finally:
+            os.rmdir(elsewhere)
+
+    def test_renamed_destination(self):
+        with self.assertRaises(ValueError):
+            root_helper.rename_noreplace([self.source, os.path.join(self.root, 'w.hc')])
+
+    def test_relative_paths(self):
+        with self.assertRaises(ValueError):
+            root_helper.rename_noreplace(['v.hc', 'w.hc'])
+
+    def test_symlinked_staging(self):
+        link = os.path.join(self.root, root_helper.NOCOW_STAGING_PREFIX + 'link')
+        os.symlink(self.staging, link)
+        with self.assertRaises(ValueError):
+            root_helper.rename_noreplace([os.path.join(link, 'v.hc'), os.path.join(self.root, 'v.hc')])
+
+    def test_symlinked_container(self):
+        link = os.path.join(self.staging, 'passwd')
+        os.symlink('/etc/passwd', link)
+        with self.assertRaises(ValueError):
+            root_helper.rename_noreplace([link, os.path.join(self.root, 'passwd')])
+
+@unittest.skipUnless(hasattr(os, 'geteuid') and os.geteuid() == 0, "nécessite root")
+class ChownTest(unittest.TestCase):
+    UID = GID = 54321
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        os.chown(self.root, self.UID, self.GID)
+        self.helper = root_helper.RootHelper('/bin/true', None, None, (self.UID, self.GID))
+        self.container = self._create('v.hc')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _create(self, name: str) -> str:
+        path = os.path.join(self.root, name)
+        with open(path, 'w') as f:
+            f.write('volume')
+        return path
+
+    def test_chown(self):
+        self.helper._chown_container([self.container])
+        self.assertEqual(os.stat(self.container).st_uid, self.UID)
+
+    def test_unknown_caller(self):
+        helper = root_helper.RootHelper('/bin/true', None, None, None)
+        with self.assertRaises(ValueError):
+            helper._chown_container([self.container])
+
+    def test_symlink(self):
+        target = tempfile.NamedTemporaryFile()
+        self.addCleanup(target.close)
+        link = os.path.join(self.root, 'link')
+        os.symlink(target.name, link)
+        with self.assertRaises(OSError) as raised:
+            self.helper._chown_container([link])
+        self.assertEqual(raised.exception.errno, errno.ELOOP)
+        self.assertEqual(os.stat(target.name).st_uid, 0)
+
+    def test_hard_link(self):
+        os.link(self.container, os.path.join(self.root, 'second'))
+        with self.assertRaises(ValueError):
+            self.helper._chown_container([self.container])
+        self.assertEqual(os.stat(self.container).st_uid, 0)
+
+    def test_not_owned_by_root(self):
+        os.chown(self.container, 4242, 4242)
+        with self.assertRaises(ValueError):
+            self.helper._chown_container([self.container])
+        self.assertEqual(os.stat(self.container).st_uid, 4242)
+
+    def test_directory_of_another_user(self):
+        os.chown(self.root, 4242, 4242)
+        with self.assertRaises(ValueError):
+            self.helper._chown_container([self.container])
+        self.assertEqual(os.stat(self.container).st_uid, 0)
+
+    def test_not_a_regular_file(self):
+        fifo = os.path.join(self.root, 'fifo')
+        os.mkfifo(fifo)
+        with self.assertRaises(ValueError):
+            self.helper._chown_container([fifo])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+"""
+Mesure du débit des algorithmes de chiffrement sur ce processeur.
+
+Chaque algorithme est mesuré en XTS, le mode de VeraCrypt, par l'API crypto
+du noyau (sockets AF_ALG, skcipher « xts(serpent) »...) : les quatre
+algorithmes passent par le même chemin et leurs débits sont comparables.
+Chaque requête forme une seule unité de données XTS, là où VeraCrypt
+change de tweak tous les 512 octets (un chiffrement de bloc de plus par
+unité, soit environ 3 %).
+
+Sans AF_ALG (noyau sans CONFIG_CRYPTO_USER_API_SKCIPHER, conteneur...),
+seul AES est mesuré, en XTS par la bibliothèque cryptography ; les autres
+algorithmes et les cascades qui les contiennent restent « non mesurés ».
+
+Le débit d'une cascade combine celui de ses algorithmes : chaque octet
+passe par chacun d'eux.
+"""
+
+import asyncio
+import json
+import os
+import platform
+import re
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from cryptography.exceptions import UnsupportedAlgorithm
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from .constants import Constants
+
+# Méthode de mesure : les mesures enregistrées par une autre méthode sont ignorées
+MEASUREMENT_METHOD = 'xts'
+
+# Algorithmes de base de VeraCrypt
+PRIMITIVES = ('AES', 'Serpent', 'Twofish', 'Camellia')
+
+# Taille des blocs chiffrés à chaque appel
+_CHUNK_SIZE = 1024 * 1024
+
+# Taille des requêtes envoyées au noyau (bornée par le tampon du socket)
+_KERNEL_REQUEST_SIZE = 64 * 1024
+
+def cipher_components(name: str) -> List[str]:
+    """Décompose une cascade en algorithmes (ex: 'AES(Twofish)' -> ['AES', 'Twofish'])."""
+    return [part for part in re.split(r'[()]', name) if part]
+
+def cpu_model() -> str:
+    """Retourne le modèle du processeur, qui sert de clé au cache des mesures."""
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+def _kernel_cipher(primitive: str) -> Optional[socket.socket]:
+    """Ouvre le chiffrement XTS d'un algorithme dans l'API crypto du noyau.
+
+    Returns:
+        Socket AF_ALG muni d'une clé (deux clés de 256 bits), ou None si le
+        noyau ne fournit pas l'algorithme
+    """
+    if not hasattr(socket, 'AF_ALG'):
+        return None
+    try:
+        alg = socket.socket(socket.AF_ALG, socket.SOCK_SEQPACKET, 0)
+    except OSError:
+        return None
+    try:
+        alg.bind(('skcipher', f'xts({primitive.lower()})'))
+        alg.setsockopt(socket.SOL_ALG, socket.ALG_SET_KEY, os.urandom(64))
+        return alg
+    except OSError:
+        alg.close()
+        return None
+
+def _openssl_cipher(primitive: str) -> Optional[Cipher]:
+    """Chiffrement XTS de la bibliothèque cryptography (AES seulement)."""
+    if primitive != 'AES':
+        return None
+    try:
+        return Cipher(algorithms.AES(os.urandom(64)), modes.XTS(os.urandom(16)))
+    except (UnsupportedAlgorithm, ValueError):
+        return None
+
+def kernel_available() -> bool:
+    """Indique si l'API crypto du noyau peut servir aux mesures."""
+    alg = _kernel_cipher('AES')
+    if alg is None:
+        return False
+    alg.close()
+    return True
+
+def _measurable(primitive: str, kernel: bool) -> bool:
+    """Indique si un algorithme peut être mesuré avec le chemin choisi."""
+    if not kernel:
+        return _openssl_cipher(primitive) is not None
+    alg = _kernel_cipher(primitive)
+    if alg is None:
+        return False
+    alg.close()
+    return True
+
+def _run_kernel_cipher(primitive: str, decrypt: bool, size: int) -> int:
+    """Chiffre (ou déchiffre) size octets par l'API crypto du noyau.
+
+    Returns:
+        Nombre d'octets traités
+    """
+    alg = _kernel_cipher(primitive)
+    if alg is None:
+        raise OSError(f"xts({primitive.lower()}) indisponible dans le noyau")
+    operation = socket.ALG_OP_DECRYPT if decrypt else socket.ALG_OP_ENCRYPT
+    data = os.urandom(_KERNEL_REQUEST_SIZE)
+    done = 0
+    with alg:
+        request, _ = alg.accept()
+        with request:
+            while done < size:
+                request.sendmsg_afalg([data], op=operation, iv=done.to_bytes(16, 'little'))
+                request.recv(_KERNEL_REQUEST_SIZE)
+                done += _KERNEL_REQUEST_SIZE
+    return done
+
+def _run_openssl_cipher(primitive: str, decrypt: bool, size: int) -> int:
+    """Chiffre (ou déchiffre) size octets par la bibliothèque cryptography.
+
+    Returns:
+        Nombre d'octets traités
+    """
+    cipher = _openssl_cipher(primitive)
+    data = os.urandom(_CHUNK_SIZE)
+    done = 0
+    while done < size:
+        context = cipher.decryptor() if decrypt else cipher.encryptor()
+        context.update(data)
+        context.finalize()
+        done += _CHUNK_SIZE
+    return done
+
+class CipherBenchmark:
+    """Débits mesurés sur un processeur, en octets par seconde."""
+    __slots__ = ('cpu_model', 'threads', 'size', 'encrypt', 'decrypt', 'method', 'measured')
+
+    def __init__(self, cpu_model: str, threads: int, size: int, encrypt: Dict[str, float],
+                 decrypt: Dict[str, float], method: str = MEASUREMENT_METHOD, measured: float = None):
+        self.cpu_model = cpu_model
+        self.threads = threads
+        # Octets traités par thread et par algorithme
+        self.size = size
+        # Débits des seuls algorithmes mesurés
+        self.encrypt = encrypt
+        self.decrypt = decrypt
+        self.method = method
+        self.measured = measured if measured is not None else time.time()
+
+    def throughput(self, name: str) -> Optional[Tuple[float, float]]:
+        """Débit (chiffrement, déchiffrement) d'un algorithme ou d'une cascade.
+
+        Returns:
+            Tuple en octets par seconde, ou None si un algorithme n'est pas mesuré
+        """
+        components = cipher_components(name)
+        if not all(part in self.encrypt for part in components):
+            return None
+        # Chaque octet passe par tous les algorithmes : les temps s'ajoutent
+        encrypt = 1 / sum(1 / self.encrypt[part] for part in components)
+        decrypt = 1 / sum(1 / self.decrypt[part] for part in components)
+        return encrypt, decrypt
+
+    def unmeasured(self, names: Iterable[str]) -> List[str]:
+        """Algorithmes de base des noms donnés qui ne sont pas mesurés."""
+        parts = {part for name in names for part in cipher_components(name)}
+        return sorted(parts - set(self.encrypt))
+
+    def describe(self, name: str) -> str:
+        """Débit lisible d'un algorithme ou d'une cascade (ex: '2.1 Gio/s')."""
+        result = self.throughput(name)
+        if result is None:
+            return "non mesuré"
+        average = (result[0] + result[1]) / 2
+        if average >= 1024 ** 3:
+            text = f"{average / 1024 ** 3:.1f} Gio/s"
+        else:
+            text = f"{average / 1024 ** 2:.0f} Mio/s"
+        return text
+
+    def to_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CipherBenchmark':
+        return cls(**{slot: data.get(slot) for slot in cls.__slots__})
+
+_BENCHMARK_FILE = os.path.expanduser('~/.veracrypt/cipher_benchmarks.json')
+_benchmark_lock = threading.Lock()
+
+def _load_benchmarks() -> Dict[str, Dict]:
+    """Charge les mesures enregistrées."""
+    try:
+        with open(_BENCHMARK_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def cached_cipher_benchmark() -> Optional[CipherBenchmark]:
+    """Retourne la mesure enregistrée pour le processeur de cette machine."""
+    data = _load_benchmarks().get(cpu_model())
+    if not data or data.get('method') != MEASUREMENT_METHOD:
+        return None
+    return CipherBenchmark.from_dict(data)
+
+def _measure(primitive: str, decrypt: bool, size: int, threads: int, kernel: bool) -> float:
+    """Mesure le débit cumulé de threads qui chiffrent en parallèle.
+
+    Returns:
+        Octets par seconde, tous threads confondus
+    """
+    run = _run_kernel_cipher if kernel else _run_openssl_cipher
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.monotonic()
+        done = sum(pool.map(lambda _: run(primitive, decrypt, size), range(threads)))
+        elapsed = time.monotonic() - start
+    return done / max(elapsed, 1e-9)
+
+def benchmark_ciphers(size: int = Constants.CIPHER_BENCHMARK_SIZE,
+                      threads: Optional[int] = None) -> CipherBenchmark:
+    """Mesure le débit de chaque algorithme sur tous les cœurs.
+
+    VeraCrypt répartit le chiffrement sur tous les cœurs : la mesure lance
+    un thread par cœur et retient le débit cumulé.
+
+    Args:
+        size: Octets traités par thread et par algorithme
+        threads: Nombre de threads (par défaut, un par cœur)
+
+    Returns:
+        Mesure obtenue, enregistrée pour ce modèle de processeur
+    """
+    threads = threads or os.cpu_count() or 1
+    encrypt, decrypt = {}, {}
+    # Une seule mesure à la fois : deux mesures simultanées se fausseraient
+    with _benchmark_lock:
+        kernel = kernel_available()
+        for primitive in PRIMITIVES:
+            if not _measurable(primitive, kernel):
+                continue
+            encrypt[primitive] = _measure(primitive, False, size, threads, kernel)
+            decrypt[primitive] = _measure(primitive, True, size, threads, kernel)
+
+    result = CipherBenchmark(cpu_model(), threads, size, encrypt, decrypt)
+    benchmarks = _load_benchmarks()
+    benchmarks[result.cpu_model] = result.to_dict()
+    try:
+        os.makedirs(os.path.dirname(_BENCHMARK_FILE), exist_ok=True)
+        with open(_BENCHMARK_FILE, 'w') as f:
+            json.dump(benchmarks, f, indent=2)
+    except OSError as e:
+        print(f"Erreur lors de la sauvegarde de la mesure de chiffrement : {e}")
+    return result
+
+async def benchmark_ciphers_async() -> CipherBenchmark:
+    """Version asynchrone de benchmark_ciphers, pour le moteur de commandes."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, benchmark_ciphers)
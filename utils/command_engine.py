@@ -0,0 +1,289 @@
+"""
+Moteur d'exécution asynchrone des commandes VeraCrypt.
+
+Les commandes sont lancées avec asyncio sur une boucle dédiée, avec un délai
+par action VeraCrypt, une annulation coopérative et une lecture de la sortie
+au fil de l'eau. Les commandes privilégiées passent par l'assistant root.
+"""
+
+import asyncio
+import logging
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Coroutine, List, Optional, Tuple
+from .constants import Constants
+from .privileged_helper import privileged_helper
+from .progress import ProgressStalled, ProgressWatchdog
+
+logger = logging.getLogger('veracrypt.command_engine')
+
+# Valeur par défaut des délais : déduite de l'action VeraCrypt demandée
+DEFAULT_TIMEOUT = object()
+
+# Fonction appelée pour chaque ligne produite : (flux 'stdout'/'stderr', ligne)
+OutputCallback = Callable[[str, str], None]
+
+class CommandResult:
+    """Résultat d'une commande."""
+    __slots__ = ('returncode', 'stdout', 'stderr', 'timed_out', 'elapsed')
+
+    def __init__(self, returncode: int, stdout: str = '', stderr: str = '',
+                 timed_out: bool = False, elapsed: float = 0.0):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self.elapsed = elapsed
+
+    @property
+    def success(self) -> bool:
+        """Indique si la commande s'est terminée normalement avec le code 0."""
+        return self.returncode == 0 and not self.timed_out
+
+    def as_tuple(self) -> Tuple[bool, str, str]:
+        """Retourne le résultat au format (succès, sortie standard, sortie d'erreur)."""
+        return self.success, self.stdout, self.stderr
+
+def timeout_for(command: List[str]) -> Optional[float]:
+    """Retourne le délai configuré pour l'action VeraCrypt d'une commande.
+
+    Returns:
+        Délai en secondes, ou None si l'action n'est pas limitée
+    """
+    for arg in command[1:]:
+        action = arg.split('=', 1)[0]
+        if action in Constants.COMMAND_TIMEOUTS:
+            return Constants.COMMAND_TIMEOUTS[action]
+    return None
+
+async def run_command(command: List[str], input_data: Optional[str] = None,
+                      timeout=DEFAULT_TIMEOUT,
+                      on_output: Optional[OutputCallback] = None) -> CommandResult:
+    """Exécute une commande sans privilèges.
+
+    Le processus est tué si le délai expire ou si la tâche est annulée.
+    """
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = timeout_for(command)
+
+    start = time.monotonic()
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=subprocess.PIPE if input_data is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    output = {'stdout': [], 'stderr': []}
+
+    async def pump(name, stream):
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            text = line.decode('utf-8', 'replace')
+            output[name].append(text)
+            if on_output is not None:
+                on_output(name, text)
+
+    async def feed():
+        if input_data is None:
+            return
+        process.stdin.write(input_data.encode('utf-8'))
+        try:
+            await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        process.stdin.close()
+
+    timed_out = False
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                feed(),
+                pump('stdout', process.stdout),
+                pump('stderr', process.stderr),
+                process.wait()
+            ),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        timed_out = True
+        logger.error(f"Délai de {timeout} s dépassé pour {command[0]}")
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    stderr = ''.join(output['stderr'])
+    if timed_out:
+        stderr += f"Délai d'exécution dépassé ({timeout} s)"
+    return CommandResult(process.returncode, ''.join(output['stdout']), stderr,
+                         timed_out, time.monotonic() - start)
+
+async def run_privileged(command: List[str], input_data: Optional[str] = None,
+                         timeout=DEFAULT_TIMEOUT,
+                         on_output: Optional[OutputCallback] = None,
+                         verb: str = 'veracrypt') -> CommandResult:
+    """Exécute une commande VeraCrypt via l'assistant privilégié.
+
+    Le délai est appliqué par l'assistant ; l'annulation de la tâche
+    interrompt la commande côté root. Avec verb='mkfs', command vaut
+    ['mkfs', système de fichiers, options..., périphérique mappé] ; avec
+    verb='rename', ['rename', conteneur en attente, destination] ; avec
+    verb='chown', ['chown', conteneur créé].
+    """
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = timeout_for(command)
+
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+
+    # Le démarrage de l'assistant est bloquant (sudo) : hors de la boucle
+    if not await loop.run_in_executor(None, privileged_helper.start):
+        return CommandResult(-1, '', "Assistant privilégié indisponible")
+
+    relay = None
+    if on_output is not None:
+        # Relayer les lignes du thread de lecture du canal vers la boucle
+        def relay(stream, data):
+            loop.call_soon_threadsafe(on_output, stream, data)
+
+    future = privileged_helper.submit(verb, list(command[1:]), input_data, timeout, relay)
+    try:
+        # Marge au-delà du délai de l'assistant, au cas où lui-même ne répondrait plus
+        response = await asyncio.wait_for(
+            asyncio.wrap_future(future),
+            timeout + Constants.HELPER_GRACE_PERIOD if timeout else None
+        )
+    except asyncio.CancelledError:
+        privileged_helper.cancel(future.request_id)
+        raise
+    except asyncio.TimeoutError:
+        privileged_helper.cancel(future.request_id)
+        return CommandResult(-1, '', "L'assistant privilégié ne répond plus", True,
+                             time.monotonic() - start)
+    except Exception as e:
+        return CommandResult(-1, '', str(e), False, time.monotonic() - start)
+
+    stderr = response.get('stderr', '')
+    if response.get('error') == 'cancelled':
+        stderr += "Commande annulée"
+    return CommandResult(
+        response.get('returncode', -1) if not response.get('error') else -1,
+        response.get('stdout', ''),
+        stderr,
+        response.get('error') == 'timeout',
+        time.monotonic() - start
+    )
+
+async def run_privileged_watched(command: List[str], watchdog: ProgressWatchdog,
+                                 input_data: Optional[str] = None,
+                                 on_output: Optional[OutputCallback] = None) -> CommandResult:
+    """Exécute une commande privilégiée sans délai fixe, sous surveillance.
+
+    Chaque ligne produite alimente le watchdog ; la commande n'est
+    interrompue que si elle cesse d'avancer.
+
+    Raises:
+        ProgressStalled: Si la progression est bloquée (la commande est interrompue)
+    """
+    def feed(stream, data):
+        watchdog.feed(data)
+        if on_output is not None:
+            on_output(stream, data)
+
+    task = asyncio.ensure_future(run_privileged(command, input_data, None, feed))
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=Constants.WATCHDOG_INTERVAL)
+            if done:
+                return task.result()
+            if watchdog.is_stalled():
+                raise ProgressStalled(watchdog.stalled_for(), watchdog.percent)
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+async def execute(command: List[str], input_data: Optional[str] = None,
+                  timeout=DEFAULT_TIMEOUT, privileged: bool = False,
+                  on_output: Optional[OutputCallback] = None) -> CommandResult:
+    """Exécute une commande, avec ou sans privilèges.
+
+    Args:
+        command: Commande et ses arguments
+        input_data: Données à envoyer sur l'entrée standard
+        timeout: Délai en secondes (par défaut, celui de l'action VeraCrypt ; None = illimité)
+        privileged: Si True, exécute la commande via l'assistant privilégié
+        on_output: Fonction appelée pour chaque ligne produite, dans la boucle du moteur
+
+    Returns:
+        Résultat de la commande
+    """
+    runner = run_privileged if privileged else run_command
+    return await runner(command, input_data, timeout, on_output)
+
+class CommandEngine:
+    """Boucle asyncio dédiée, partagée par toute l'application."""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(CommandEngine, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self._lock = threading.Lock()
+            self._loop = None
+            self._thread = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Démarre la boucle du moteur au premier usage."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='veracrypt-command-engine',
+                    daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def in_engine_thread(self) -> bool:
+        """Indique si l'appelant s'exécute dans la boucle du moteur."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Planifie une coroutine sur la boucle du moteur.
+
+        Returns:
+            Future ; l'annuler annule la coroutine
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None):
+        """Exécute une coroutine et attend son résultat.
+
+        Raises:
+            RuntimeError: Si appelé depuis la boucle du moteur (interblocage)
+        """
+        if self.in_engine_thread():
+            coro.close()
+            raise RuntimeError("Appel bloquant depuis la boucle du moteur de commandes")
+        return self.submit(coro).result(timeout)
+
+# Instance globale
+command_engine = CommandEngine()
+
+def execute_sync(command: List[str], input_data: Optional[str] = None,
+                 timeout=DEFAULT_TIMEOUT, privileged: bool = False) -> CommandResult:
+    """Version bloquante de execute(), pour le code synchrone."""
+    return command_engine.run(execute(command, input_data, timeout, privileged))
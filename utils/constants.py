@@ -14,5 +14,101 @@ class Constants:
     # Préfixe pour les points de montage
     MOUNT_PREFIX = "veracrypt_"
     
+    # Nombre de slots VeraCrypt disponibles
+    MAX_SLOTS = 64
+    
+    # Nombre maximal de démontages simultanés (limités par les E/S, pas par le processeur)
+    MAX_PARALLEL_DISMOUNTS = 8
+    
     # Timeout pour les opérations de montage (en secondes)
     MOUNT_TIMEOUT = 30
+    
+    # Délai d'attente du démarrage de l'assistant privilégié (en secondes)
+    HELPER_START_TIMEOUT = 15
+    
+    # Marge accordée à l'assistant privilégié au-delà du délai d'une commande (en secondes)
+    HELPER_GRACE_PERIOD = 10
+    
+    # Délai par action VeraCrypt (en secondes)
+    COMMAND_TIMEOUTS = {
+        '--list': 10,
+        '-l': 10,
+        '--mount': MOUNT_TIMEOUT,
+        '--dismount': 30,
+        '-d': 30,
+        '--change': 120,
+        '-C': 120,
+        '--version': 10,
+    }
+    
+    # Délai des appels à sudo (validation du mot de passe, commandes ponctuelles)
+    SUDO_TIMEOUT = 15
+    
+    # Intervalle de vérification de la progression des opérations longues (en secondes)
+    WATCHDOG_INTERVAL = 1.0
+    
+    # Durée sans progression au-delà de laquelle une création de volume est abandonnée
+    CREATION_STALL_TIMEOUT = 120
+    
+    # --change n'affiche aucune progression : la fenêtre couvre toute la
+    # dérivation des clés, qui peut durer plusieurs minutes avec un PIM élevé
+    PASSWORD_CHANGE_STALL_TIMEOUT = 600
+    
+    # Intervalle minimal entre deux mises à jour de la progression à l'écran (en secondes)
+    PROGRESS_FRAME_INTERVAL = 0.1
+    
+    # Première version de VeraCrypt acceptant le mot de passe sur l'entrée standard (--stdin)
+    VERACRYPT_STDIN_VERSION = (1, 24)
+    
+    # Octets d'aléa système ajoutés au fichier --random-source
+    RANDOM_SOURCE_SIZE = 1024
+    
+    # Taille du fichier de test de la mesure d'allocation (en octets)
+    ALLOCATION_BENCHMARK_SIZE = 64 * 1024 * 1024
+    
+    # Plus grand extent d'un système de fichiers (ext4, btrfs), en octets
+    FRAGMENTATION_MAX_EXTENT = 128 * 1024 * 1024
+    
+    # Taille moyenne des plages contiguës au-delà de laquelle un conteneur
+    # n'est pas considéré comme fragmenté (en octets)
+    FRAGMENTATION_GOOD_RUN = 8 * 1024 * 1024
+    
+    # Score de fragmentation (0-100) à partir duquel un conteneur est signalé
+    FRAGMENTATION_WARNING_SCORE = 50
+    
+    # Délai du formatage d'un volume par notre propre mkfs (en secondes)
+    MKFS_TIMEOUT = 1800
+    
+    # Intervalle de vérification de l'état des créations d'un provisionnement (en secondes)
+    PROVISION_POLL_INTERVAL = 1
+    
+    # Octets chiffrés par thread et par algorithme lors de la mesure de débit
+    CIPHER_BENCHMARK_SIZE = 32 * 1024 * 1024
+    
+    # Itérations PBKDF2 mesurées par fonction de hachage lors de la calibration du PIM
+    PIM_CALIBRATION_ITERATIONS = 100000
+    
+    # Taille des clés d'en-tête dérivées par PBKDF2 (plus longue cascade : 3 clés XTS de 64 octets)
+    PBKDF2_KEY_SIZE = 192
+    
+    # Temps de déverrouillage visé par défaut pour la recommandation du PIM (en secondes)
+    PIM_TARGET_UNLOCK_TIME = 0.5
+    
+    # Multiple du temps de déverrouillage estimé ajouté au délai d'un montage avec
+    # PIM (en-têtes normal et caché, écart entre hashlib et VeraCrypt)
+    PIM_MOUNT_TIMEOUT_MARGIN = 3
+    
+    # Durée d'inactivité au-delà de laquelle la clé des mots de passe enregistrés est effacée (en secondes)
+    KEY_CACHE_IDLE_TIMEOUT = 900
+    
+    # Délai de regroupement des modifications des favoris avant écriture (en secondes)
+    FAVORITES_FLUSH_DELAY = 0.5
+    
+    # Délai de regroupement des modifications des préférences avant écriture (en secondes)
+    PREFERENCES_FLUSH_DELAY = 0.5
+    
+    # Délai de regroupement des modifications de fichiers détectées avant rechargement (en secondes)
+    FILE_WATCH_DELAY = 0.2
+    
+    # Attente maximale d'un verrou de la base SQLite tenu par une autre instance (en secondes)
+    STORE_BUSY_TIMEOUT = 10
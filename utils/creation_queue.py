@@ -0,0 +1,328 @@
+"""
+File d'attente persistante des créations de volumes.
+
+Les créations sont regroupées par périphérique bloc sous-jacent : une seule
+création à la fois écrit sur un même disque, mais des créations sur des
+disques différents s'exécutent en parallèle.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+from .crypto import PasswordEncryption
+from .filesystem import device_key, write_atomic
+from .progress import ProgressEvent
+
+# États d'une création
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+STATE_LABELS = {
+    QUEUED: "En attente",
+    RUNNING: "En cours",
+    SUCCEEDED: "Terminée",
+    FAILED: "Échec",
+    CANCELLED: "Annulée"
+}
+
+class CreationJob:
+    """Création de volume en attente ou exécutée."""
+    __slots__ = (
+        'id',
+        'path',
+        'size',
+        'encryption',
+        'hash_algo',
+        'filesystem',
+        'password',
+        'random_data',
+        'quick',
+        'pim',
+        'mkfs_profile',
+        'mount_after',
+        'device',
+        'state',
+        'message',
+        'percent',
+        'progress',
+        'submitted',
+        'started',
+        'finished'
+    )
+
+    # Champs enregistrés tels quels dans le fichier de la file
+    _PERSISTED = (
+        'id', 'path', 'size', 'encryption', 'hash_algo', 'filesystem', 'quick', 'pim', 'mkfs_profile', 'mount_after',
+        'device', 'state', 'message', 'percent', 'submitted', 'started', 'finished'
+    )
+
+    def __init__(self, path: str, size: str, password: str, encryption: str = 'AES',
+                 hash_algo: str = 'SHA-512', filesystem: str = 'FAT',
+                 random_data: Optional[str] = None, quick: bool = False,
+                 pim: Optional[int] = None, mkfs_profile: Optional[str] = None, mount_after: bool = False):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.size = size
+        self.encryption = encryption
+        self.hash_algo = hash_algo
+        self.filesystem = filesystem
+        self.password = password
+        # Entropie collectée : gardée en mémoire seulement
+        self.random_data = random_data
+        # Allocation rapide (--quick) : l'espace libre n'est pas chiffré
+        self.quick = quick
+        # PIM (None : valeur par défaut de VeraCrypt)
+        self.pim = pim
+        # Profil de formatage (mkfs.PROFILES), ou None pour le mkfs de VeraCrypt
+        self.mkfs_profile = mkfs_profile
+        self.mount_after = mount_after
+        self.device = device_key(path)
+        self.state = QUEUED
+        self.message = ''
+        self.percent = 0.0
+        # Dernier événement de progression (débit, temps restant)
+        self.progress: Optional[ProgressEvent] = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def is_finished(self) -> bool:
+        """Indique si la création est terminée (succès, échec ou annulation)."""
+        return self.state in (SUCCEEDED, FAILED, CANCELLED)
+
+    def to_dict(self) -> Dict:
+        """Sérialise la création ; le mot de passe est chiffré."""
+        data = {field: getattr(self, field) for field in self._PERSISTED}
+        if self.password and not self.is_finished:
+            try:
+                data['password'] = PasswordEncryption.encrypt_password(self.password)
+            except Exception as e:
+                print(f"Erreur lors du chiffrement du mot de passe : {e}")
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CreationJob':
+        """Recrée une création depuis le fichier de la file."""
+        job = cls.__new__(cls)
+        for field in cls._PERSISTED:
+            setattr(job, field, data.get(field))
+        job.password = None
+        job.random_data = None
+        job.progress = None
+        job.percent = job.percent or 0.0
+        job.quick = bool(job.quick)
+        if data.get('password'):
+            try:
+                job.password = PasswordEncryption.decrypt_password(data['password'])
+            except Exception as e:
+                print(f"Erreur lors du déchiffrement du mot de passe : {e}")
+        return job
+
+    def __repr__(self) -> str:
+        return (f"CreationJob(path={self.path!r}, device={self.device!r}, "
+                f"state={self.state!r}, percent={self.percent:.1f})")
+
+class CreationQueue:
+    """Ordonnanceur des créations de volumes.
+
+    Au plus une création par disque ; les disques différents travaillent en
+    parallèle. La file est enregistrée à chaque changement d'état et les
+    créations en attente reprennent au redémarrage.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(CreationQueue, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.queue_file = os.path.expanduser('~/.veracrypt/creation_queue.json')
+            self._lock = threading.RLock()
+            self._jobs: List[CreationJob] = []
+            self._workers: Dict[str, threading.Thread] = {}
+            self._listeners = []
+            self._loaded = False
+            self._started = False
+
+    def _load(self):
+        """Charge la file enregistrée (une seule fois)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.queue_file):
+            return
+        try:
+            with open(self.queue_file, 'r') as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Erreur lors du chargement de la file de création : {e}")
+            return
+
+        for entry in entries:
+            job = CreationJob.from_dict(entry)
+            if job.state == RUNNING:
+                # Le conteneur a été écrit en partie : ne pas le reprendre
+                job.state = FAILED
+                job.message = "Interrompue par la fermeture de l'application"
+                job.finished = time.time()
+                job.password = None
+            elif job.state == QUEUED and not job.password:
+                job.state = FAILED
+                job.message = "Mot de passe indisponible"
+                job.finished = time.time()
+            self._jobs.append(job)
+
+    def _save(self):
+        """Enregistre la file."""
+        try:
+            # Mots de passe chiffrés : jamais lisibles, même un instant, par d'autres
+            write_atomic(self.queue_file, json.dumps([job.to_dict() for job in self._jobs], indent=2), mode=0o600)
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde de la file de création : {e}")
+
+    def _notify(self, job: CreationJob):
+        """Prévient les abonnés d'un changement."""
+        for callback in list(self._listeners):
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"Erreur dans un abonné de la file de création : {e}")
+
+    def add_listener(self, callback: Callable[[CreationJob], None]):
+        """Enregistre une fonction appelée à chaque changement d'une création.
+
+        La fonction est appelée depuis les threads de création : les
+        composants Qt doivent relayer l'appel par un signal.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[CreationJob], None]):
+        """Retire une fonction enregistrée par add_listener."""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def jobs(self) -> List[CreationJob]:
+        """Retourne les créations, dans l'ordre de soumission."""
+        with self._lock:
+            self._load()
+            return list(self._jobs)
+
+    def start(self):
+        """Charge la file et lance les créations en attente.
+
+        À appeler une fois la session sudo ouverte.
+        """
+        with self._lock:
+            self._load()
+            self._started = True
+            self._dispatch()
+
+    def submit(self, job: CreationJob) -> CreationJob:
+        """Ajoute une création à la file.
+
+        Returns:
+            La création soumise
+        """
+        with self._lock:
+            self._load()
+            self._jobs.append(job)
+            self._save()
+        self._notify(job)
+        with self._lock:
+            if self._started:
+                self._dispatch()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Annule une création en attente.
+
+        Returns:
+            True si la création a été retirée de l'attente
+        """
+        with self._lock:
+            job = next((j for j in self._jobs if j.id == job_id), None)
+            if job is None or job.state != QUEUED:
+                return False
+            job.state = CANCELLED
+            job.finished = time.time()
+            job.password = None
+            self._save()
+        self._notify(job)
+        return True
+
+    def clear_finished(self):
+        """Retire les créations terminées de la file."""
+        with self._lock:
+            self._jobs = [job for job in self._jobs if not job.is_finished]
+            self._save()
+
+    def _dispatch(self):
+        """Lance la première création en attente de chaque disque libre."""
+        busy = {device for device, worker in self._workers.items() if worker.is_alive()}
+        for job in self._jobs:
+            if job.state != QUEUED or job.device in busy:
+                continue
+            busy.add(job.device)
+            job.state = RUNNING
+            job.started = time.time()
+            worker = threading.Thread(target=self._run, args=(job,), daemon=True)
+            self._workers[job.device] = worker
+            worker.start()
+        self._save()
+
+    def _run(self, job: CreationJob):
+        """Exécute une création (thread dédié au disque)."""
+        from .volume_creation import VolumeCreation
+
+        self._notify(job)
+
+        def on_progress(event: ProgressEvent):
+            job.percent = event.percent
+            job.progress = event
+            self._notify(job)
+
+        try:
+            success, message = VolumeCreation.create_volume(
+                path=job.path,
+                password=job.password,
+                size=job.size,
+                encryption=job.encryption,
+                hash_algo=job.hash_algo,
+                filesystem=job.filesystem,
+                random_data=job.random_data,
+                quick=job.quick,
+                pim=job.pim,
+                mkfs_profile=job.mkfs_profile,
+                progress_callback=on_progress
+            )
+        except Exception as e:
+            success, message = False, str(e)
+
+        with self._lock:
+            job.state = SUCCEEDED if success else FAILED
+            job.message = message
+            job.finished = time.time()
+            if success:
+                job.percent = 100.0
+            # Le mot de passe n'est plus utile qu'au montage qui suit
+            if not (success and job.mount_after):
+                job.password = None
+            job.random_data = None
+            del self._workers[job.device]
+            self._dispatch()
+        self._notify(job)
+
+# Instance globale
+creation_queue = CreationQueue()
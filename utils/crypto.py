@@ -4,10 +4,141 @@ Utilitaires de chiffrement pour les mots de passe.
 
 import os
 import base64
+import asyncio
+import ctypes
+import ctypes.util
+import threading
+import time
+from typing import Dict, Optional
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from .sudo_session import sudo_session
+from .constants import Constants
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    _libc.mlock.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    _libc.munlock.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+except (OSError, AttributeError):
+    _libc = None
+
+class LockedBuffer:
+    """Tampon verrouillé en mémoire (jamais écrit dans le swap) et effaçable."""
+    
+    def __init__(self, data: bytes):
+        self._buffer = bytearray(data)
+        self._view = (ctypes.c_char * len(self._buffer)).from_buffer(self._buffer)
+        self.locked = _libc is not None and _libc.mlock(ctypes.addressof(self._view), len(self._buffer)) == 0
+        
+    def bytes(self) -> bytes:
+        """Copie du contenu, pour les API qui exigent des bytes."""
+        return bytes(self._buffer)
+        
+    def zeroize(self):
+        """Efface le contenu puis déverrouille la mémoire."""
+        if self._view is None:
+            return
+        size = len(self._buffer)
+        ctypes.memset(ctypes.addressof(self._view), 0, size)
+        if self.locked:
+            _libc.munlock(ctypes.addressof(self._view), size)
+        self._view = None
+        
+    def __del__(self):
+        self.zeroize()
+
+class SessionKeyCache:
+    """Clé de chiffrement des mots de passe, dérivée une fois par session.
+    
+    La dérivation (PBKDF2, ITERATIONS itérations) n'est faite qu'au premier
+    besoin ; la clé est ensuite gardée dans un tampon verrouillé en mémoire.
+    Elle est effacée quand la session sudo dont elle dérive change ou
+    expire, ou après KEY_CACHE_IDLE_TIMEOUT secondes sans utilisation.
+    
+    Les copies faites par PBKDF2 et Fernet ne sont pas effaçables ; elles ne
+    vivent que le temps d'un appel.
+    """
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SessionKeyCache, cls).__new__(cls)
+        return cls._instance
+        
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self._lock = threading.Lock()
+            self._key: Optional[LockedBuffer] = None
+            # Génération de la session sudo dont la clé est dérivée
+            self._generation = None
+            self._last_used = 0.0
+            self._timer: Optional[threading.Timer] = None
+            
+    def _is_valid(self) -> bool:
+        return (self._key is not None
+                and self._generation == sudo_session.generation
+                and sudo_session.is_active()
+                and time.monotonic() - self._last_used < Constants.KEY_CACHE_IDLE_TIMEOUT)
+                
+    def _schedule_expiry(self):
+        """Relance le minuteur d'inactivité."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(Constants.KEY_CACHE_IDLE_TIMEOUT, self._expire_if_idle)
+        self._timer.daemon = True
+        self._timer.start()
+        
+    def _expire_if_idle(self):
+        """Efface la clé si elle n'a pas servi pendant le délai d'inactivité."""
+        with self._lock:
+            if self._key is not None and not self._is_valid():
+                self._clear()
+                
+    def _clear(self):
+        if self._key is not None:
+            self._key.zeroize()
+            self._key = None
+        self._generation = None
+        
+    def fernet(self) -> Fernet:
+        """Retourne un Fernet construit sur la clé de session (dérivée si besoin)."""
+        with self._lock:
+            if not self._is_valid():
+                self._clear()
+                key = PasswordEncryption._get_key()
+                self._key = LockedBuffer(key)
+                self._generation = sudo_session.generation
+            self._last_used = time.monotonic()
+            self._schedule_expiry()
+            return Fernet(self._key.bytes())
+            
+    def unlock(self) -> bool:
+        """Dérive la clé à l'avance, pour que le premier montage soit immédiat.
+        
+        Returns:
+            True si la clé est disponible
+        """
+        try:
+            self.fernet()
+            return True
+        except Exception as e:
+            print(f"Impossible de dériver la clé de session : {e}")
+            return False
+            
+    async def unlock_async(self) -> bool:
+        """Version asynchrone de unlock, pour le moteur de commandes."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.unlock)
+        
+    def lock(self):
+        """Efface immédiatement la clé de session."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._clear()
 
 class PasswordEncryption:
     """Classe pour gérer le chiffrement/déchiffrement des mots de passe."""
@@ -72,8 +203,7 @@ class PasswordEncryption:
             Le mot de passe chiffré en base64
         """
         try:
-            key = cls._get_key()
-            f = Fernet(key)
+            f = session_keys.fernet()
             encrypted = f.encrypt(password.encode())
             return base64.urlsafe_b64encode(encrypted).decode()
         except Exception as e:
@@ -90,9 +220,32 @@ class PasswordEncryption:
             Le mot de passe en clair
         """
         try:
-            key = cls._get_key()
-            f = Fernet(key)
+            f = session_keys.fernet()
             decrypted = f.decrypt(base64.urlsafe_b64decode(encrypted_password))
             return decrypted.decode()
         except Exception as e:
             raise Exception(f"Erreur lors du déchiffrement: {str(e)}")
+    
+    @classmethod
+    def decrypt_passwords(cls, encrypted_passwords: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """Déchiffre plusieurs mots de passe avec une seule récupération de la clé.
+        
+        Args:
+            encrypted_passwords: Mots de passe chiffrés, par clé (ex: chemin du volume)
+            
+        Returns:
+            Mots de passe en clair par clé ; None pour ceux qui n'ont pas pu
+            être déchiffrés
+        """
+        f = session_keys.fernet()
+        passwords = {}
+        for key, encrypted_password in encrypted_passwords.items():
+            try:
+                passwords[key] = f.decrypt(base64.urlsafe_b64decode(encrypted_password)).decode()
+            except Exception as e:
+                print(f"Erreur lors du déchiffrement du mot de passe de {key} : {e}")
+                passwords[key] = None
+        return passwords
+
+# Instance globale
+session_keys = SessionKeyCache()
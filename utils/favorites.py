@@ -1,17 +1,105 @@
 """
 Gestion des favoris VeraCrypt.
+
+Les favoris sont indexés par chemin de volume, par nom, par étiquette et
+par identifiant de périphérique : les recherches ne parcourent pas la
+liste. Les modifications sont regroupées et enregistrées en une écriture
+atomique. Avec le stockage SQLite (voir store.py), les favoris sont lus à
+la demande dans la base au lieu d'être chargés en entier.
+
+reload() relit le fichier (ou la base) modifié par un autre programme et
+publie aux abonnés la différence (FavoritesDiff) avec l'état connu.
 """
 
+import atexit
 import json
 import os
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import Callable, Iterable, List, Dict, Optional, Set
 from .crypto import PasswordEncryption
+from .constants import Constants
+from .filesystem import file_signature, write_atomic
+from .store import FAVORITE_COLUMNS, store
+
+# Répertoires de liens vers les périphériques, par identifiant stable
+_DEVICE_ID_DIRS = ('/dev/disk/by-partuuid', '/dev/disk/by-uuid')
+
+def device_uuid(path: str) -> Optional[str]:
+    """Retourne l'identifiant stable (PARTUUID, ou à défaut UUID) d'un périphérique.
+    
+    Une partition chiffrée par VeraCrypt n'a pas d'UUID de système de
+    fichiers lisible : le PARTUUID de la table de partitions est préféré.
+    """
+    target = os.path.realpath(path)
+    for directory in _DEVICE_ID_DIRS:
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            if os.path.realpath(os.path.join(directory, name)) == target:
+                return name
+    return None
+
+class FavoritesDiff:
+    """Différence entre deux états des favoris."""
+    __slots__ = ('added', 'removed', 'changed')
+    
+    def __init__(self, added: List[Dict] = None, removed: List[Dict] = None, changed: List[Dict] = None):
+        self.added = added or []
+        # Favoris supprimés, dans leur dernier état connu
+        self.removed = removed or []
+        # Favoris modifiés, dans leur nouvel état
+        self.changed = changed or []
+        
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+        
+    def __repr__(self) -> str:
+        return (f"FavoritesDiff(added={len(self.added)}, removed={len(self.removed)}, "
+                f"changed={len(self.changed)})")
 
 class Favorites:
+    """Dépôt des favoris (une instance partagée par l'application).
+    
+    Favorites() retourne un SqliteFavorites quand le stockage SQLite est choisi.
+    """
+    _instance = None
+    
+    def __new__(cls):
+        if Favorites._instance is None:
+            implementation = SqliteFavorites if store.enabled() else Favorites
+            Favorites._instance = super(Favorites, implementation).__new__(implementation)
+        return Favorites._instance
+        
     def __init__(self):
-        self.favorites_file = os.path.expanduser('~/.veracrypt/favorites.json')
-        self._ensure_favorites_dir()
-        self.favorites = self._load_favorites()
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.favorites_file = os.path.expanduser('~/.veracrypt/favorites.json')
+            self._lock = threading.RLock()
+            self._flush_timer: Optional[threading.Timer] = None
+            self._dirty = False
+            self._ensure_favorites_dir()
+            # Index principal, dans l'ordre d'ajout : chemin -> favori
+            self._by_path: Dict[str, Dict] = {}
+            # Index secondaires : nom -> chemins, identifiant de périphérique -> chemin
+            self._by_name: Dict[str, List[str]] = {}
+            self._by_uuid: Dict[str, str] = {}
+            self._by_tag: Dict[str, Set[str]] = {}
+            self._listeners = []
+            # Version du fichier connue (écrite ou lue par cette instance)
+            self._signature = file_signature(self.favorites_file)
+            for favorite in self._load_favorites():
+                if favorite['volume_path'] not in self._by_path:
+                    self._index(favorite)
+            # Les modifications en attente sont enregistrées à la sortie
+            atexit.register(self.flush)
+    
+    @property
+    def favorites(self) -> List[Dict]:
+        """Favoris, dans l'ordre d'ajout."""
+        return list(self._by_path.values())
     
     def _ensure_favorites_dir(self):
         """S'assure que le répertoire des favoris existe."""
@@ -22,24 +110,153 @@ class Favorites:
         if os.path.exists(self.favorites_file):
             try:
                 with open(self.favorites_file, 'r') as f:
-                    return json.load(f)
+                    return self._valid_entries(json.load(f))
             except json.JSONDecodeError:
                 return []
         return []
     
-    def _save_favorites(self):
-        """Sauvegarde les favoris dans le fichier."""
-        try:
-            print(f"Sauvegarde des favoris : {self.favorites}")  # Debug
-            with open(self.favorites_file, 'w') as f:
-                json.dump(self.favorites, f, indent=2)
-            print(f"Favoris sauvegardés dans {self.favorites_file}")  # Debug
-            return True
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde des favoris : {e}")
-            return False
+    @staticmethod
+    def _valid_entries(entries) -> List[Dict]:
+        """Écarte les entrées mal formées (fichier modifié à la main ou par un script)."""
+        if not isinstance(entries, list):
+            return []
+        return [f for f in entries if isinstance(f, dict) and 'volume_path' in f and 'name' in f]
+    
+    def _index(self, favorite: Dict):
+        """Ajoute un favori aux index."""
+        path = favorite['volume_path']
+        self._by_path[path] = favorite
+        self._by_name.setdefault(favorite['name'], []).append(path)
+        if favorite.get('uuid'):
+            self._by_uuid[favorite['uuid']] = path
+        for tag in favorite.get('tags', []):
+            self._by_tag.setdefault(tag, set()).add(path)
+    
+    def _unindex(self, favorite: Dict):
+        """Retire un favori des index."""
+        path = favorite['volume_path']
+        del self._by_path[path]
+        paths = self._by_name.get(favorite['name'], [])
+        if path in paths:
+            paths.remove(path)
+        if not paths:
+            self._by_name.pop(favorite['name'], None)
+        if favorite.get('uuid') and self._by_uuid.get(favorite['uuid']) == path:
+            del self._by_uuid[favorite['uuid']]
+        for tag in favorite.get('tags', []):
+            self._by_tag[tag].discard(path)
+            if not self._by_tag[tag]:
+                del self._by_tag[tag]
+    
+    def _save_favorites(self) -> bool:
+        """Programme l'enregistrement des favoris.
+        
+        Les modifications rapprochées sont regroupées : l'écriture a lieu
+        FAVORITES_FLUSH_DELAY secondes après la dernière.
+        """
+        with self._lock:
+            self._dirty = True
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(Constants.FAVORITES_FLUSH_DELAY, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+        return True
     
-    def add_favorite(self, name: str, path: str, is_device: bool, mount_point: str = None, password: str = None) -> bool:
+    def flush(self) -> bool:
+        """Enregistre immédiatement les modifications en attente.
+        
+        Returns:
+            True si le fichier est à jour
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return True
+            try:
+                self._signature = write_atomic(self.favorites_file, json.dumps(self.favorites, indent=2))
+                self._dirty = False
+                return True
+            except Exception as e:
+                print(f"Erreur lors de la sauvegarde des favoris : {e}")
+                return False
+    
+    def reload(self) -> FavoritesDiff:
+        """Relit le fichier s'il a été modifié par un autre programme.
+        
+        Les abonnés reçoivent la différence avec l'état connu. Tant que des
+        modifications locales attendent d'être écrites, le fichier n'est pas
+        relu : elles l'emportent sur la version du disque.
+        
+        Returns:
+            Différence appliquée (vide si rien n'a changé)
+        """
+        with self._lock:
+            signature = file_signature(self.favorites_file)
+            if self._dirty or signature == self._signature:
+                return FavoritesDiff()
+            if signature is None:
+                # Fichier supprimé : plus aucun favori
+                entries = []
+            else:
+                try:
+                    with open(self.favorites_file, 'r') as f:
+                        entries = self._valid_entries(json.load(f))
+                except (OSError, json.JSONDecodeError) as e:
+                    # Fichier en cours d'écriture par un programme non atomique :
+                    # il sera relu à sa prochaine modification
+                    print(f"Erreur lors du rechargement des favoris : {e}")
+                    return FavoritesDiff()
+            self._signature = signature
+            
+            loaded: Dict[str, Dict] = {}
+            for favorite in entries:
+                loaded.setdefault(favorite['volume_path'], favorite)
+            diff = self._diff(self._by_path, loaded)
+            if diff:
+                self._by_path, self._by_name, self._by_uuid, self._by_tag = {}, {}, {}, {}
+                for favorite in loaded.values():
+                    self._index(favorite)
+        if diff:
+            self._notify(diff)
+        return diff
+    
+    @staticmethod
+    def _diff(known: Dict[str, Dict], loaded: Dict[str, Dict]) -> FavoritesDiff:
+        """Différence entre l'état connu et l'état relu (chemin -> favori)."""
+        return FavoritesDiff(
+            added=[f for path, f in loaded.items() if path not in known],
+            removed=[f for path, f in known.items() if path not in loaded],
+            changed=[f for path, f in loaded.items() if path in known and f != known[path]]
+        )
+    
+    def _notify(self, diff: FavoritesDiff):
+        """Prévient les abonnés d'une modification des favoris."""
+        for callback in list(self._listeners):
+            try:
+                callback(diff)
+            except Exception as e:
+                print(f"Erreur dans un abonné des favoris : {e}")
+    
+    def add_listener(self, callback: Callable[[FavoritesDiff], None]):
+        """Enregistre une fonction appelée avec la différence à chaque rechargement.
+        
+        La fonction est appelée depuis le thread qui appelle reload() : les
+        composants Qt doivent relayer l'appel par un signal.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[FavoritesDiff], None]):
+        """Retire une fonction enregistrée par add_listener."""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+    
+    def add_favorite(self, name: str, path: str, is_device: bool, mount_point: str = None, password: str = None,
+                     pim: Optional[int] = None) -> bool:
         """Ajoute un favori.
         
         Args:
@@ -48,16 +265,24 @@ class Favorites:
             is_device: True si c'est un périphérique, False si c'est un fichier
             mount_point: Point de montage préféré (optionnel)
             password: Mot de passe du volume (optionnel)
+            pim: PIM du volume (optionnel, par défaut celui de VeraCrypt)
             
         Returns:
             True si l'ajout a réussi, False sinon
         """
-        print(f"Ajout du favori {name} ({path})")  # Debug
         # Vérifier si le favori existe déjà
-        if any(f['volume_path'] == path for f in self.favorites):
-            print(f"Le favori existe déjà : {path}")  # Debug
+        if path in self._by_path:
             return False
             
+        favorite = self._new_favorite(name, path, is_device, mount_point, password, pim)
+        with self._lock:
+            self._index(favorite)
+        return self._save_favorites()
+    
+    @staticmethod
+    def _new_favorite(name: str, path: str, is_device: bool, mount_point: str = None,
+                      password: str = None, pim: Optional[int] = None) -> Dict:
+        """Construit un favori ; le mot de passe est chiffré."""
         favorite = {
             'name': name,
             'volume_path': path,
@@ -67,6 +292,16 @@ class Favorites:
         if mount_point:
             favorite['mount_point'] = mount_point
             
+        # Sans le PIM, VeraCrypt refuserait le mot de passe au montage
+        if pim:
+            favorite['pim'] = pim
+            
+        # Identifiant stable du périphérique, qui survit aux changements de /dev/sdX
+        if is_device:
+            uuid = device_uuid(path)
+            if uuid:
+                favorite['uuid'] = uuid
+                
         # Chiffrer et sauvegarder le mot de passe si fourni
         if password:
             try:
@@ -76,9 +311,7 @@ class Favorites:
                 print(f"Erreur lors du chiffrement du mot de passe : {e}")
                 # Continuer sans le mot de passe
                 
-        print(f"Ajout du favori : {favorite}")  # Debug
-        self.favorites.append(favorite)
-        return self._save_favorites()
+        return favorite
     
     def remove_favorite(self, path: str) -> bool:
         """Supprime un favori.
@@ -89,24 +322,100 @@ class Favorites:
         Returns:
             True si la suppression a réussi, False sinon
         """
-        initial_length = len(self.favorites)
-        self.favorites = [f for f in self.favorites if f['volume_path'] != path]
-        if len(self.favorites) != initial_length:
-            self._save_favorites()
-            return True
-        return False
+        with self._lock:
+            favorite = self._by_path.get(path)
+            if favorite is None:
+                return False
+            self._unindex(favorite)
+        self._save_favorites()
+        return True
     
     def get_favorites(self) -> List[Dict]:
         """Retourne la liste des favoris."""
-        print(f"Lecture des favoris : {self.favorites}")  # Debug
-        return self.favorites.copy()  # Retourner une copie pour éviter les modifications accidentelles
+        return self.favorites  # Nouvelle liste : pas de modification accidentelle de l'index
     
     def get_favorite(self, path: str) -> Optional[Dict]:
         """Retourne un favori par son chemin."""
-        for favorite in self.favorites:
-            if favorite['volume_path'] == path:
-                return favorite
-        return None
+        return self._by_path.get(path)
+    
+    def get_favorites_by_name(self, name: str) -> List[Dict]:
+        """Retourne les favoris portant un nom."""
+        return [self._by_path[path] for path in self._by_name.get(name, [])]
+    
+    def get_favorite_by_uuid(self, uuid: str) -> Optional[Dict]:
+        """Retourne le favori d'un périphérique par son identifiant stable."""
+        path = self._by_uuid.get(uuid)
+        return self._by_path.get(path) if path else None
+    
+    def get_favorites_by_tag(self, tag: str) -> List[Dict]:
+        """Retourne les favoris portant une étiquette."""
+        return [self._by_path[path] for path in self._by_tag.get(tag, ())]
+    
+    def get_recent_favorites(self, limit: int = 10) -> List[Dict]:
+        """Retourne les favoris les plus récemment montés."""
+        mounted = [f for f in self._by_path.values() if f.get('last_mounted')]
+        return sorted(mounted, key=lambda f: f['last_mounted'], reverse=True)[:limit]
+    
+    def set_tags(self, path: str, tags: Iterable[str]) -> bool:
+        """Remplace les étiquettes d'un favori.
+        
+        Returns:
+            True si le favori existe
+        """
+        with self._lock:
+            favorite = self._by_path.get(path)
+            if favorite is None:
+                return False
+            self._unindex(favorite)
+            favorite['tags'] = sorted(set(tags))
+            self._index(favorite)
+        return self._save_favorites()
+    
+    def mark_mounted(self, path: str):
+        """Note le montage d'un favori (sans effet pour un autre volume)."""
+        with self._lock:
+            favorite = self._by_path.get(path)
+            if favorite is None:
+                return
+            favorite['last_mounted'] = time.time()
+        self._save_favorites()
+    
+    def update_credentials(self, path: str, password: str, pim: Optional[int] = None) -> bool:
+        """Reporte sur un favori le changement de mot de passe de son volume.
+        
+        Le PIM est remplacé ; le mot de passe n'est remplacé que s'il était
+        enregistré (sinon, il n'est pas ajouté).
+        
+        Returns:
+            True si le favori existe
+        """
+        favorite = self._by_path.get(path)
+        if favorite is None:
+            return False
+        encrypted = self._encrypt_saved_password(password) if 'password' in favorite else None
+        with self._lock:
+            favorite = self._by_path.get(path)
+            if favorite is None:
+                return False
+            if pim:
+                favorite['pim'] = pim
+            else:
+                favorite.pop('pim', None)
+            if encrypted:
+                favorite['password'] = encrypted
+            else:
+                # L'ancien mot de passe n'ouvre plus le volume
+                favorite.pop('password', None)
+        return self._save_favorites()
+    
+    @staticmethod
+    def _encrypt_saved_password(password: str) -> Optional[str]:
+        """Chiffre un mot de passe à enregistrer ; None en cas d'erreur."""
+        try:
+            return PasswordEncryption.encrypt_password(password)
+        except Exception as e:
+            print(f"Erreur lors du chiffrement du mot de passe : {e}")
+            return None
     
     def get_favorite_password(self, path: str) -> Optional[str]:
         """Récupère le mot de passe d'un favori.
@@ -125,3 +434,189 @@ class Favorites:
                 print(f"Erreur lors du déchiffrement du mot de passe : {e}")
                 return None
         return None
+    
+    def get_saved_passwords(self) -> Dict[str, str]:
+        """Déchiffre en une fois les mots de passe enregistrés de tous les favoris.
+        
+        Returns:
+            Mots de passe en clair par chemin de volume (favoris sans mot de
+            passe ou indéchiffrable exclus)
+        """
+        encrypted = {path: f['password'] for path, f in self._by_path.items() if 'password' in f}
+        if not encrypted:
+            return {}
+        try:
+            passwords = PasswordEncryption.decrypt_passwords(encrypted)
+        except Exception as e:
+            print(f"Erreur lors du déchiffrement des mots de passe : {e}")
+            return {}
+        return {path: password for path, password in passwords.items() if password}
+    
+
+class SqliteFavorites(Favorites):
+    """Favoris stockés dans la base SQLite : chaque modification n'écrit que
+    sa ligne, et les recherches passent par les index de la base.
+    
+    Le dernier état connu n'est gardé que pour calculer la différence
+    publiée par reload()."""
+    
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.favorites_file = store.db_file
+            self._lock = threading.RLock()
+            self._listeners = []
+            # Version des données lue avant l'état connu : une modification
+            # validée entre les deux sera vue au prochain reload()
+            self._data_version = store.data_version()
+            self._known: Dict[str, Dict] = {f['volume_path']: f for f in self._select()}
+            
+    @staticmethod
+    def _select(where: str = '', parameters=(), suffix: str = '') -> List[Dict]:
+        """Lit des favoris, avec leurs étiquettes."""
+        columns = ', '.join(f'f.{column}' for column in FAVORITE_COLUMNS)
+        rows = store.query(
+            f"SELECT {columns}, group_concat(t.tag, char(31)) AS tags FROM favorites f "
+            f"LEFT JOIN favorite_tags t ON t.volume_path = f.volume_path {where} "
+            f"GROUP BY f.volume_path {suffix or 'ORDER BY f.rowid'}",
+            parameters
+        )
+        favorites = []
+        for row in rows:
+            favorite = {
+                'name': row['name'],
+                'volume_path': row['volume_path'],
+                'is_device': bool(row['is_device'])
+            }
+            for column in ('mount_point', 'uuid', 'password', 'pim', 'last_mounted'):
+                if row[column] is not None:
+                    favorite[column] = row[column]
+            if row['tags']:
+                favorite['tags'] = sorted(row['tags'].split('\x1f'))
+            favorites.append(favorite)
+        return favorites
+        
+    @property
+    def favorites(self) -> List[Dict]:
+        return self._select()
+        
+    def flush(self) -> bool:
+        """Rien à enregistrer : chaque modification est écrite aussitôt."""
+        return True
+        
+    def reload(self) -> FavoritesDiff:
+        """Relit les favoris si une autre connexion a modifié la base.
+        
+        À appeler depuis le thread qui a créé l'instance (PRAGMA
+        data_version est propre à chaque connexion).
+        """
+        with self._lock:
+            version = store.data_version()
+            if version == self._data_version:
+                return FavoritesDiff()
+            self._data_version = version
+            loaded = {f['volume_path']: f for f in self._select()}
+            diff = self._diff(self._known, loaded)
+            self._known = loaded
+        if diff:
+            self._notify(diff)
+        return diff
+        
+    def _remember(self, path: str):
+        """Met à jour l'état connu après une modification faite par cette instance."""
+        favorite = self.get_favorite(path)
+        with self._lock:
+            if favorite is None:
+                self._known.pop(path, None)
+            else:
+                self._known[path] = favorite
+        
+    def add_favorite(self, name: str, path: str, is_device: bool, mount_point: str = None, password: str = None,
+                     pim: Optional[int] = None) -> bool:
+        favorite = self._new_favorite(name, path, is_device, mount_point, password, pim)
+        try:
+            cursor = store.execute(
+                'INSERT OR IGNORE INTO favorites (volume_path, name, is_device, mount_point, uuid, password, pim) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (path, name, int(is_device), favorite.get('mount_point'), favorite.get('uuid'),
+                 favorite.get('password'), favorite.get('pim'))
+            )
+        except Exception as e:
+            print(f"Erreur lors de l'ajout du favori : {e}")
+            return False
+        if cursor.rowcount != 1:
+            return False
+        self._remember(path)
+        return True
+            
+    def remove_favorite(self, path: str) -> bool:
+        try:
+            removed = store.execute('DELETE FROM favorites WHERE volume_path = ?', (path,)).rowcount == 1
+        except Exception as e:
+            print(f"Erreur lors de la suppression du favori : {e}")
+            return False
+        if removed:
+            self._remember(path)
+        return removed
+            
+    def get_favorite(self, path: str) -> Optional[Dict]:
+        favorites = self._select('WHERE f.volume_path = ?', (path,))
+        return favorites[0] if favorites else None
+        
+    def get_favorites_by_name(self, name: str) -> List[Dict]:
+        return self._select('WHERE f.name = ?', (name,))
+        
+    def get_favorite_by_uuid(self, uuid: str) -> Optional[Dict]:
+        favorites = self._select('WHERE f.uuid = ?', (uuid,))
+        return favorites[0] if favorites else None
+        
+    def get_favorites_by_tag(self, tag: str) -> List[Dict]:
+        return self._select(
+            'WHERE f.volume_path IN (SELECT volume_path FROM favorite_tags WHERE tag = ?)', (tag,)
+        )
+        
+    def get_recent_favorites(self, limit: int = 10) -> List[Dict]:
+        return self._select('WHERE f.last_mounted IS NOT NULL', (limit,),
+                            'ORDER BY f.last_mounted DESC LIMIT ?')
+        
+    def set_tags(self, path: str, tags: Iterable[str]) -> bool:
+        connection = store.connection()
+        with connection:
+            if connection.execute('SELECT 1 FROM favorites WHERE volume_path = ?', (path,)).fetchone() is None:
+                return False
+            connection.execute('DELETE FROM favorite_tags WHERE volume_path = ?', (path,))
+            connection.executemany('INSERT INTO favorite_tags (volume_path, tag) VALUES (?, ?)',
+                                   [(path, tag) for tag in set(tags)])
+        self._remember(path)
+        return True
+        
+    def update_credentials(self, path: str, password: str, pim: Optional[int] = None) -> bool:
+        favorite = self.get_favorite(path)
+        if favorite is None:
+            return False
+        encrypted = self._encrypt_saved_password(password) if 'password' in favorite else None
+        try:
+            updated = store.execute('UPDATE favorites SET pim = ?, password = ? WHERE volume_path = ?',
+                                    (pim or None, encrypted, path)).rowcount == 1
+        except Exception as e:
+            print(f"Erreur lors de la mise à jour du favori : {e}")
+            return False
+        if updated:
+            self._remember(path)
+        return updated
+            
+    def mark_mounted(self, path: str):
+        # La date du dernier montage est écrite avec l'historique (store.record_event)
+        pass
+        
+    def get_saved_passwords(self) -> Dict[str, str]:
+        rows = store.query('SELECT volume_path, password FROM favorites WHERE password IS NOT NULL')
+        encrypted = {row['volume_path']: row['password'] for row in rows}
+        if not encrypted:
+            return {}
+        try:
+            passwords = PasswordEncryption.decrypt_passwords(encrypted)
+        except Exception as e:
+            print(f"Erreur lors du déchiffrement des mots de passe : {e}")
+            return {}
+        return {path: password for path, password in passwords.items() if password}
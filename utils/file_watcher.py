@@ -0,0 +1,81 @@
+"""
+Surveillance des fichiers de configuration (inotify, via QFileSystemWatcher).
+
+Les fichiers étant remplacés par renommage (write_atomic), la surveillance
+d'un fichier s'arrête à son premier remplacement : le répertoire est donc
+surveillé aussi, et le fichier de nouveau suivi dès qu'il réapparaît. Les
+événements rapprochés sont regroupés avant d'appeler le rechargement.
+"""
+
+import os
+from typing import Callable, Dict, Set
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer
+from .constants import Constants
+
+class FileWatcher(QObject):
+    """Appelle une fonction de rechargement quand un fichier change sur le disque."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        # Fichier surveillé -> fonction de rechargement
+        self._callbacks: Dict[str, Callable[[], object]] = {}
+        self._changed: Set[str] = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(int(Constants.FILE_WATCH_DELAY * 1000))
+        self._timer.timeout.connect(self._dispatch)
+
+    def watch(self, path: str, callback: Callable[[], object]):
+        """Surveille un fichier (qui peut ne pas exister encore).
+
+        Args:
+            path: Fichier à surveiller
+            callback: Fonction appelée, dans le thread Qt, après une modification
+        """
+        path = os.path.abspath(path)
+        self._callbacks[path] = callback
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        if directory not in self._watcher.directories():
+            self._watcher.addPath(directory)
+        self._follow(path)
+
+    def unwatch(self, path: str):
+        """Arrête la surveillance d'un fichier."""
+        path = os.path.abspath(path)
+        self._callbacks.pop(path, None)
+        self._changed.discard(path)
+        if path in self._watcher.files():
+            self._watcher.removePath(path)
+
+    def _follow(self, path: str):
+        """Suit le fichier courant (nouvel inode après un remplacement)."""
+        if os.path.exists(path) and path not in self._watcher.files():
+            self._watcher.addPath(path)
+
+    def _on_file_changed(self, path: str):
+        self._changed.add(path)
+        self._timer.start()
+
+    def _on_directory_changed(self, directory: str):
+        # Création, suppression ou renommage : un des fichiers a pu être remplacé
+        for path in self._callbacks:
+            if os.path.dirname(path) == directory:
+                self._changed.add(path)
+        self._timer.start()
+
+    def _dispatch(self):
+        """Appelle le rechargement des fichiers modifiés."""
+        changed, self._changed = self._changed, set()
+        for path in changed:
+            callback = self._callbacks.get(path)
+            if callback is None:
+                continue
+            self._follow(path)
+            try:
+                callback()
+            except Exception as e:
+                print(f"Erreur lors du rechargement de {path} : {e}")
@@ -0,0 +1,391 @@
+"""
+Informations sur le système de fichiers qui porte un conteneur, mesure du
+coût de son allocation, et écriture atomique des fichiers de configuration.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import fcntl
+import json
+import os
+import shutil
+import struct
+import tempfile
+import time
+from typing import Dict, Optional, Tuple
+from .constants import Constants
+
+SYSFS_DEV_BLOCK = '/sys/dev/block'
+
+# Nombres magiques de statfs(2) (f_type)
+FILESYSTEM_MAGICS = {
+    0x9123683E: 'btrfs',
+    0x2FC12FC1: 'zfs',
+    0xCA451A4E: 'bcachefs',
+    0xEF53: 'ext4',
+    0x58465342: 'xfs',
+    0xF2F52010: 'f2fs',
+    0x01021994: 'tmpfs',
+    0x6969: 'nfs',
+    0x794C7630: 'overlayfs'
+}
+
+# Systèmes de fichiers à copie sur écriture : chaque écriture déplace le bloc
+COPY_ON_WRITE_FILESYSTEMS = {'btrfs', 'zfs', 'bcachefs'}
+
+# Attribut « pas de copie sur écriture » (chattr +C), et ioctl associés
+FS_NOCOW_FL = 0x00800000
+FS_IOC_GETFLAGS = 0x80086601
+FS_IOC_SETFLAGS = 0x40086602
+
+# Taille des blocs écrits par la mesure d'écriture complète
+_WRITE_CHUNK = 1024 * 1024
+
+# Taille réservée pour struct statfs (le champ f_type vient en premier)
+_STATFS_BUFFER_SIZE = 256
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    _libc.fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+    _libc.statfs.argtypes = [ctypes.c_char_p, ctypes.c_void_p]
+except (OSError, AttributeError):
+    _libc = None
+
+def _existing_dir(path: str) -> str:
+    """Retourne le répertoire existant le plus proche d'un chemin."""
+    directory = os.path.dirname(os.path.abspath(path))
+    while not os.path.isdir(directory):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    return directory
+
+def device_key(path: str) -> str:
+    """Identifie le disque qui portera un fichier.
+
+    Le périphérique est déduit du st_dev du répertoire existant le plus proche,
+    puis ramené au disque entier via /sys/dev/block (une partition compte pour
+    son disque).
+
+    Args:
+        path: Chemin du futur conteneur
+
+    Returns:
+        Nom du disque (ex: 'sda'), ou 'majeur:mineur' si sysfs ne le connaît pas
+    """
+    try:
+        st_dev = os.stat(_existing_dir(path)).st_dev
+    except OSError:
+        return 'inconnu'
+
+    number = f"{os.major(st_dev)}:{os.minor(st_dev)}"
+    sys_path = os.path.join(SYSFS_DEV_BLOCK, number)
+    if not os.path.exists(sys_path):
+        # Systèmes de fichiers sans périphérique réel (btrfs, tmpfs...)
+        return number
+
+    sys_path = os.path.realpath(sys_path)
+    if os.path.exists(os.path.join(sys_path, 'partition')):
+        sys_path = os.path.dirname(sys_path)
+    return os.path.basename(sys_path)
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """Retourne (inode, taille, date de modification en ns) d'un fichier,
+    ou None s'il n'existe pas.
+
+    Un fichier remplacé par write_atomic change d'inode : la signature
+    distingue une version d'une autre sans relire le contenu.
+    """
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return (info.st_ino, info.st_size, info.st_mtime_ns)
+
+def write_atomic(path: str, data: str, mode: int = 0o600) -> Tuple[int, int, int]:
+    """Remplace un fichier de façon atomique.
+
+    Le contenu est écrit dans un fichier temporaire du même répertoire,
+    synchronisé, puis renommé par os.replace : après un arrêt brutal, le
+    fichier contient l'ancienne ou la nouvelle version, jamais un mélange.
+
+    Args:
+        path: Fichier à remplacer
+        data: Nouveau contenu
+        mode: Permissions du fichier
+
+    Returns:
+        Signature (voir file_signature) du fichier écrit, prise avant le
+        renommage : une modification ultérieure par un autre programme
+        s'en distingue toujours
+
+    Raises:
+        OSError: Si l'écriture ou le renommage échoue (l'original est intact)
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            info = os.fstat(f.fileno())
+        signature = (info.st_ino, info.st_size, info.st_mtime_ns)
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Rendre le renommage lui-même durable
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return signature
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+    return signature
+
+def filesystem_type(path: str) -> str:
+    """Retourne le type du système de fichiers qui portera un fichier (ex: 'ext4').
+
+    Le point de montage retenu est le plus long préfixe du chemin dans
+    /proc/self/mounts.
+    """
+    directory = os.path.realpath(_existing_dir(path))
+    best, fstype = '', 'inconnu'
+    try:
+        with open('/proc/self/mounts', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                # Les espaces des points de montage sont échappés en \040
+                mount_point = fields[1].replace('\\040', ' ')
+                prefix = mount_point.rstrip('/') + '/'
+                if (directory == mount_point or directory.startswith(prefix)) and len(mount_point) >= len(best):
+                    best, fstype = mount_point, fields[2]
+    except OSError:
+        pass
+    return fstype
+
+def filesystem_magic(path: str) -> Optional[int]:
+    """Retourne le nombre magique (statfs f_type) du système de fichiers
+    qui portera un fichier, ou None si statfs est indisponible."""
+    if _libc is None:
+        return None
+    buffer = ctypes.create_string_buffer(_STATFS_BUFFER_SIZE)
+    if _libc.statfs(os.fsencode(_existing_dir(path)), buffer) != 0:
+        return None
+    return ctypes.c_ulong.from_buffer(buffer).value & 0xFFFFFFFF
+
+def is_copy_on_write(path: str) -> bool:
+    """Indique si le fichier sera créé sur un système de fichiers à copie sur écriture."""
+    return FILESYSTEM_MAGICS.get(filesystem_magic(path)) in COPY_ON_WRITE_FILESYSTEMS
+
+def set_nocow(path: str) -> bool:
+    """Pose l'attribut FS_NOCOW_FL (chattr +C) sur un fichier vide ou un répertoire.
+
+    Sur btrfs, l'attribut n'a d'effet que sur un fichier encore vide ; posé
+    sur un répertoire, il est hérité par les fichiers qui y sont créés.
+
+    Returns:
+        True si l'attribut est posé
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        flags = struct.unpack('l', fcntl.ioctl(fd, FS_IOC_GETFLAGS, struct.pack('l', 0)))[0]
+        fcntl.ioctl(fd, FS_IOC_SETFLAGS, struct.pack('l', flags | FS_NOCOW_FL))
+        flags = struct.unpack('l', fcntl.ioctl(fd, FS_IOC_GETFLAGS, struct.pack('l', 0)))[0]
+        return bool(flags & FS_NOCOW_FL)
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+def nocow_staging_dir(path: str) -> Optional[str]:
+    """Prépare, à côté d'un futur conteneur, un répertoire sans copie sur écriture.
+
+    Le conteneur créé dedans hérite de l'attribut dès sa création, avant la
+    moindre écriture ; il est ensuite renommé à sa place (même système de
+    fichiers : l'inode et l'attribut sont conservés).
+
+    Returns:
+        Chemin du répertoire, ou None si le système de fichiers n'est pas
+        btrfs ou refuse l'attribut
+    """
+    if FILESYSTEM_MAGICS.get(filesystem_magic(path)) != 'btrfs':
+        return None
+    try:
+        staging = tempfile.mkdtemp(prefix='.veracrypt-nocow-', dir=os.path.dirname(os.path.abspath(path)))
+    except OSError:
+        return None
+    if not set_nocow(staging):
+        shutil.rmtree(staging, ignore_errors=True)
+        return None
+    return staging
+
+def fallocate(fd: int, offset: int, length: int):
+    """Réserve des blocs sans les écrire (appel système fallocate).
+
+    Contrairement à os.posix_fallocate, aucune émulation par écriture de
+    zéros : un système de fichiers qui ne sait pas allouer lève une erreur.
+
+    Raises:
+        OSError: EOPNOTSUPP si le système de fichiers ne gère pas fallocate
+    """
+    if _libc is None:
+        raise OSError(errno.ENOSYS, "fallocate indisponible")
+    if _libc.fallocate(fd, 0, offset, length) != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
+
+def supports_fast_allocation(path: str) -> bool:
+    """Indique si le système de fichiers qui portera un fichier sait l'allouer
+    sans en écrire le contenu."""
+    try:
+        fd, probe = tempfile.mkstemp(prefix='.veracrypt-fallocate-', dir=_existing_dir(path))
+    except OSError:
+        return False
+    try:
+        fallocate(fd, 0, _WRITE_CHUNK)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+        os.unlink(probe)
+
+class AllocationBenchmark:
+    """Coût d'allocation mesuré sur un système de fichiers."""
+    __slots__ = ('filesystem', 'device', 'size', 'fallocate_time', 'write_time', 'measured')
+
+    def __init__(self, filesystem: str, device: str, size: int,
+                 fallocate_time: Optional[float], write_time: float, measured: float = None):
+        self.filesystem = filesystem
+        self.device = device
+        self.size = size
+        # None si le système de fichiers ne gère pas fallocate
+        self.fallocate_time = fallocate_time
+        self.write_time = write_time
+        self.measured = measured if measured is not None else time.time()
+
+    @property
+    def key(self) -> str:
+        """Clé de la mesure dans le cache."""
+        return f"{self.device}:{self.filesystem}"
+
+    def _per_gb(self, seconds: float) -> float:
+        return seconds * (1024 ** 3) / self.size
+
+    @property
+    def write_per_gb(self) -> float:
+        """Secondes par Gio pour écrire tout le conteneur."""
+        return self._per_gb(self.write_time)
+
+    @property
+    def saved_per_gb(self) -> Optional[float]:
+        """Secondes économisées par Gio avec l'allocation rapide."""
+        if self.fallocate_time is None:
+            return None
+        return max(0.0, self._per_gb(self.write_time - self.fallocate_time))
+
+    def describe(self) -> str:
+        """Résumé lisible de la mesure."""
+        from .progress import format_duration
+        text = f"{self.filesystem} ({self.device}) : écriture complète {format_duration(self.write_per_gb)} par Gio"
+        if self.saved_per_gb is None:
+            return text + ", allocation rapide non prise en charge"
+        return text + f", allocation rapide : {format_duration(self.saved_per_gb)} économisées par Gio"
+
+    def to_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AllocationBenchmark':
+        return cls(**{slot: data.get(slot) for slot in cls.__slots__})
+
+_BENCHMARK_FILE = os.path.expanduser('~/.veracrypt/allocation_benchmarks.json')
+
+def _load_benchmarks() -> Dict[str, Dict]:
+    """Charge les mesures enregistrées."""
+    try:
+        with open(_BENCHMARK_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def cached_benchmark(path: str) -> Optional[AllocationBenchmark]:
+    """Retourne la mesure enregistrée pour le système de fichiers d'un chemin."""
+    key = f"{device_key(path)}:{filesystem_type(path)}"
+    data = _load_benchmarks().get(key)
+    return AllocationBenchmark.from_dict(data) if data else None
+
+def benchmark_allocation(path: str, size: int = Constants.ALLOCATION_BENCHMARK_SIZE) -> AllocationBenchmark:
+    """Compare l'écriture complète d'un fichier et son allocation rapide.
+
+    La mesure est faite dans le répertoire qui portera le conteneur, puis
+    enregistrée par disque et type de système de fichiers.
+
+    Args:
+        path: Chemin du futur conteneur
+        size: Taille du fichier de test, en octets
+
+    Returns:
+        Mesure obtenue
+    """
+    directory = _existing_dir(path)
+    fd, probe = tempfile.mkstemp(prefix='.veracrypt-benchmark-', dir=directory)
+    try:
+        # Écriture complète de données aléatoires, comme VeraCrypt sans --quick
+        start = time.monotonic()
+        written = 0
+        while written < size:
+            written += os.write(fd, os.urandom(min(_WRITE_CHUNK, size - written)))
+        os.fsync(fd)
+        write_time = time.monotonic() - start
+
+        os.ftruncate(fd, 0)
+        os.fsync(fd)
+
+        # Allocation seule
+        try:
+            start = time.monotonic()
+            fallocate(fd, 0, size)
+            os.fsync(fd)
+            fallocate_time = time.monotonic() - start
+        except OSError:
+            fallocate_time = None
+    finally:
+        os.close(fd)
+        os.unlink(probe)
+
+    result = AllocationBenchmark(filesystem_type(path), device_key(path), size, fallocate_time, write_time)
+    benchmarks = _load_benchmarks()
+    benchmarks[result.key] = result.to_dict()
+    try:
+        os.makedirs(os.path.dirname(_BENCHMARK_FILE), exist_ok=True)
+        with open(_BENCHMARK_FILE, 'w') as f:
+            json.dump(benchmarks, f, indent=2)
+    except OSError as e:
+        print(f"Erreur lors de la sauvegarde de la mesure d'allocation : {e}")
+    return result
+
+async def benchmark_allocation_async(path: str) -> AllocationBenchmark:
+    """Version asynchrone de benchmark_allocation, pour le moteur de commandes."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, benchmark_allocation, path)
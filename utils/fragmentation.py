@@ -0,0 +1,217 @@
+"""
+Analyse de la fragmentation des conteneurs fichiers (ioctl FS_IOC_FIEMAP).
+
+Un conteneur éparpillé en milliers de fragments transforme les lectures
+séquentielles du volume monté en accès aléatoires : c'est une cause
+fréquente de lenteur sur les systèmes de fichiers très sollicités.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import math
+import os
+import struct
+import threading
+from typing import Dict, Optional
+from .constants import Constants
+
+logger = logging.getLogger('veracrypt.fragmentation')
+
+FS_IOC_FIEMAP = 0xC020660B
+FIEMAP_FLAG_SYNC = 0x00000001
+FIEMAP_EXTENT_LAST = 0x00000001
+
+# struct fiemap (en-tête) et struct fiemap_extent
+_FIEMAP_HEADER = struct.Struct('=QQIIII')
+_FIEMAP_EXTENT = struct.Struct('=QQQ2QI3I')
+
+# Nombre d'extents demandés par appel
+_EXTENTS_PER_CALL = 512
+
+class FragmentationReport:
+    """Carte des extents d'un conteneur, résumée."""
+    __slots__ = ('path', 'size', 'extent_count', 'run_count', 'largest_run', 'score')
+
+    def __init__(self, path: str, size: int, extent_count: int, run_count: int,
+                 largest_run: int, score: float):
+        self.path = path
+        self.size = size
+        # Extents tels que rapportés par le système de fichiers
+        self.extent_count = extent_count
+        # Plages physiquement contiguës (extents adjacents fusionnés)
+        self.run_count = run_count
+        # Plus grande plage contiguë, en octets
+        self.largest_run = largest_run
+        # 0 (contigu) à 100 (entièrement éparpillé)
+        self.score = score
+
+    @property
+    def is_fragmented(self) -> bool:
+        """Indique si la fragmentation ralentit probablement les accès."""
+        return self.score >= Constants.FRAGMENTATION_WARNING_SCORE
+
+    def describe(self) -> str:
+        """Résumé lisible de l'analyse."""
+        return (f"{self.run_count} fragment(s), plus grande plage contiguë "
+                f"{self.largest_run / (1024 * 1024):.1f} Mio, fragmentation {self.score:.0f} %")
+
+    def to_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FragmentationReport':
+        return cls(**{slot: data[slot] for slot in cls.__slots__})
+
+def _read_extents(fd: int):
+    """Parcourt la carte des extents d'un fichier.
+
+    Yields:
+        Tuples (position logique, position physique, longueur)
+    """
+    start = 0
+    while True:
+        request = bytearray(_FIEMAP_HEADER.size + _EXTENTS_PER_CALL * _FIEMAP_EXTENT.size)
+        _FIEMAP_HEADER.pack_into(request, 0, start, 0xFFFFFFFFFFFFFFFF - start,
+                                 FIEMAP_FLAG_SYNC, 0, _EXTENTS_PER_CALL, 0)
+        fcntl.ioctl(fd, FS_IOC_FIEMAP, request, True)
+        mapped = _FIEMAP_HEADER.unpack_from(request, 0)[3]
+        if mapped == 0:
+            return
+
+        for index in range(mapped):
+            fields = _FIEMAP_EXTENT.unpack_from(request, _FIEMAP_HEADER.size + index * _FIEMAP_EXTENT.size)
+            logical, physical, length, flags = fields[0], fields[1], fields[2], fields[5]
+            yield logical, physical, length
+            if flags & FIEMAP_EXTENT_LAST:
+                return
+        start = logical + length
+
+def analyze(path: str) -> FragmentationReport:
+    """Analyse la fragmentation d'un conteneur fichier.
+
+    Le score tient à la taille moyenne des plages contiguës : nul quand les
+    plages sont assez longues pour amortir un déplacement de tête (ou quand
+    le fichier n'est pas découpable en moins de plages), il tend vers 100
+    quand elles rétrécissent.
+
+    Raises:
+        OSError: Si le fichier est illisible ou si FIEMAP n'est pas pris en charge
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        extent_count = 0
+        run_count = 0
+        largest_run = 0
+        current = 0
+        end = None  # (fin logique, fin physique) de la plage en cours
+        for logical, physical, length in _read_extents(fd):
+            extent_count += 1
+            if end is not None and end == (logical, physical):
+                current += length
+            else:
+                run_count += 1
+                current = length
+            largest_run = max(largest_run, current)
+            end = (logical + length, physical + length)
+    finally:
+        os.close(fd)
+
+    ideal = max(1, math.ceil(size / Constants.FRAGMENTATION_MAX_EXTENT))
+    if run_count <= ideal:
+        score = 0.0
+    else:
+        average_run = size / run_count
+        score = 100.0 * max(0.0, 1 - average_run / Constants.FRAGMENTATION_GOOD_RUN)
+    return FragmentationReport(path, size, extent_count, run_count, largest_run, score)
+
+class FragmentationCache:
+    """Résultats d'analyse par (st_dev, st_ino, mtime).
+
+    Un conteneur non modifié n'est pas réanalysé ; toute écriture change sa
+    date de modification et invalide l'entrée.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(FragmentationCache, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.cache_file = os.path.expanduser('~/.veracrypt/fragmentation.json')
+            self._lock = threading.Lock()
+            self._entries = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        """Charge le cache enregistré."""
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        """Enregistre le cache."""
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(self.cache_file, 'w') as f:
+                json.dump(self._entries, f, indent=2)
+        except OSError as e:
+            print(f"Erreur lors de la sauvegarde du cache de fragmentation : {e}")
+
+    @staticmethod
+    def _key(st: os.stat_result) -> str:
+        return f"{st.st_dev}:{st.st_ino}:{st.st_mtime_ns}"
+
+    def get(self, path: str) -> Optional[FragmentationReport]:
+        """Analyse un conteneur, ou retourne l'analyse en cache.
+
+        Returns:
+            Rapport, ou None si le fichier est illisible ou si le système de
+            fichiers ne gère pas FIEMAP
+        """
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Analyse de fragmentation impossible pour {path} : {e}")
+            return None
+        key = self._key(st)
+        with self._lock:
+            data = self._entries.get(key)
+        if data is not None:
+            report = FragmentationReport.from_dict(data)
+            report.path = path
+            return report
+
+        try:
+            report = analyze(path)
+        except PermissionError as e:
+            # Conteneur créé par root avant qu'il ne soit rendu à l'utilisateur
+            logger.warning(f"Analyse de fragmentation impossible pour {path} "
+                           f"(propriétaire uid {st.st_uid}) : {e}")
+            return None
+        except OSError as e:
+            logger.warning(f"Analyse de fragmentation impossible pour {path} : {e}")
+            return None
+
+        with self._lock:
+            # Une seule entrée par fichier : les anciennes dates sont oubliées
+            prefix = f"{st.st_dev}:{st.st_ino}:"
+            for old in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[old]
+            self._entries[key] = report.to_dict()
+            self._save()
+        return report
+
+async def analyze_async(path: str) -> Optional[FragmentationReport]:
+    """Version asynchrone de fragmentation_cache.get, pour le moteur de commandes."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, fragmentation_cache.get, path)
+
+# Instance globale
+fragmentation_cache = FragmentationCache()
@@ -0,0 +1,138 @@
+"""
+Profils de formatage des volumes créés sans système de fichiers.
+
+VeraCrypt formate avec les options par défaut de mkfs. Pour un volume
+destiné à beaucoup de petits fichiers, ou au contraire à quelques gros
+fichiers, le volume est créé avec --filesystem=none, mappé, puis formaté
+par notre propre mkfs avec des options adaptées à l'usage et à la
+géométrie du disque (alignement sur les bandes RAID).
+"""
+
+import os
+import stat
+from typing import Dict, List, Optional, Tuple
+from .filesystem import SYSFS_DEV_BLOCK, _existing_dir
+
+# Taille des blocs ext4 utilisée pour calculer l'alignement
+EXT4_BLOCK_SIZE = 4096
+
+class MkfsProfile:
+    """Jeu d'options de mkfs pour un usage donné."""
+    __slots__ = ('name', 'label', 'filesystem', 'options', 'extended', 'description')
+
+    def __init__(self, name: str, label: str, filesystem: str, options: List[str],
+                 extended: Optional[List[str]] = None, description: str = ''):
+        self.name = name
+        self.label = label
+        # Système de fichiers du volume (clé de VolumeCreation.FILESYSTEMS)
+        self.filesystem = filesystem
+        self.options = options
+        # Options étendues d'ext4 (-E), complétées par l'alignement
+        self.extended = extended or []
+        self.description = description
+
+    @property
+    def mkfs_type(self) -> str:
+        """Système de fichiers au sens de l'assistant privilégié (ex: 'ext4')."""
+        return self.filesystem.lower()
+
+    def command(self, device: str, geometry: Optional[Tuple[int, int]] = None) -> List[str]:
+        """Construit la commande de formatage d'un volume mappé.
+
+        Args:
+            device: Périphérique mappé (ex: /dev/mapper/veracrypt1)
+            geometry: (taille minimale, taille optimale) des E/S du disque, en octets
+
+        Returns:
+            ['mkfs', système de fichiers, options..., périphérique], pour
+            run_privileged(..., verb='mkfs')
+        """
+        if self.mkfs_type == 'ext4':
+            options = ['-q', '-F'] + self.options
+            extended = list(self.extended)
+            if geometry is not None:
+                minimum, optimal = geometry
+                # Alignement utile seulement sur un disque à bandes (RAID)
+                if minimum >= EXT4_BLOCK_SIZE and optimal > minimum:
+                    extended.append(f'stride={minimum // EXT4_BLOCK_SIZE}')
+                    extended.append(f'stripe_width={optimal // EXT4_BLOCK_SIZE}')
+            if extended:
+                options += ['-E', ','.join(extended)]
+        else:
+            # btrfs s'aligne seul sur la géométrie du périphérique
+            options = ['-q', '-f'] + self.options
+        return ['mkfs', self.mkfs_type] + options + [device]
+
+    def __repr__(self) -> str:
+        return f"MkfsProfile(name={self.name!r}, filesystem={self.filesystem!r})"
+
+# Profils proposés, par nom
+PROFILES: Dict[str, MkfsProfile] = {
+    profile.name: profile for profile in (
+        MkfsProfile(
+            'general', "EXT4 général", 'EXT4',
+            ['-m', '1'],
+            ['lazy_itable_init=1', 'lazy_journal_init=1'],
+            "Tables d'inodes initialisées en arrière-plan : formatage immédiat, "
+            "1 % réservé à root"
+        ),
+        MkfsProfile(
+            'small_files', "EXT4 petits fichiers", 'EXT4',
+            ['-i', '4096', '-I', '256', '-J', 'size=256'],
+            ['lazy_itable_init=1'],
+            "Un inode par 4 Kio et grand journal : adapté aux arborescences de "
+            "sources, boîtes mail, caches"
+        ),
+        MkfsProfile(
+            'large_files', "EXT4 gros fichiers", 'EXT4',
+            ['-T', 'largefile4', '-J', 'size=64', '-m', '0'],
+            ['lazy_itable_init=1', 'lazy_journal_init=1'],
+            "Un inode par 4 Mio, aucun espace réservé : adapté aux images "
+            "disque, vidéos, archives"
+        ),
+        MkfsProfile(
+            'btrfs', "BTRFS simple", 'BTRFS',
+            ['-m', 'single', '-d', 'single'],
+            description="Métadonnées non dupliquées : le volume chiffré est "
+                        "déjà sur un seul périphérique"
+        ),
+    )
+}
+
+def _queue_dir(path: str) -> Optional[str]:
+    """Retourne le répertoire sysfs queue/ du disque qui porte un volume."""
+    try:
+        st = os.stat(path)
+        if stat.S_ISBLK(st.st_mode):
+            number = st.st_rdev
+        else:
+            number = os.stat(_existing_dir(path)).st_dev
+    except OSError:
+        return None
+
+    sys_path = os.path.realpath(os.path.join(SYSFS_DEV_BLOCK, f"{os.major(number)}:{os.minor(number)}"))
+    if os.path.exists(os.path.join(sys_path, 'partition')):
+        sys_path = os.path.dirname(sys_path)
+    queue = os.path.join(sys_path, 'queue')
+    return queue if os.path.isdir(queue) else None
+
+def device_geometry(path: str) -> Optional[Tuple[int, int]]:
+    """Lit la géométrie d'E/S du disque qui porte un volume.
+
+    Args:
+        path: Conteneur fichier ou périphérique du volume
+
+    Returns:
+        (minimum_io_size, optimal_io_size) en octets, ou None si inconnue
+    """
+    queue = _queue_dir(path)
+    if queue is None:
+        return None
+    try:
+        with open(os.path.join(queue, 'minimum_io_size'), 'r') as f:
+            minimum = int(f.read())
+        with open(os.path.join(queue, 'optimal_io_size'), 'r') as f:
+            optimal = int(f.read())
+    except (OSError, ValueError):
+        return None
+    return minimum, optimal
@@ -0,0 +1,350 @@
+"""
+Table des volumes VeraCrypt montés, mise à jour sur événement.
+"""
+
+import os
+import re
+import select
+import stat
+import threading
+from typing import Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+# Le noyau signale toute modification de la table des montages par un
+# événement POLLPRI/POLLERR sur ce fichier
+MOUNTINFO_PATH = '/proc/self/mountinfo'
+
+# Format court de `veracrypt --list` : "1: /chemin/volume /dev/mapper/veracrypt1 /point de montage"
+_BRIEF_LINE = re.compile(r'^(\d+): (.+?) (/dev/\S+) (.+)$')
+
+class MountedVolume:
+    """Volume VeraCrypt monté, tel que décrit par `veracrypt --list --verbose`."""
+    __slots__ = (
+        'slot',
+        'volume_path',
+        'virtual_device',
+        'mount_point',
+        'size',
+        'encryption',
+        'prf',
+        'read_only'
+    )
+
+    def __init__(
+        self,
+        slot: int,
+        volume_path: str = '',
+        virtual_device: str = '',
+        mount_point: str = '',
+        size: str = '',
+        encryption: str = '',
+        prf: str = '',
+        read_only: bool = False
+    ):
+        self.slot = slot
+        self.volume_path = volume_path
+        self.virtual_device = virtual_device
+        self.mount_point = mount_point
+        self.size = size
+        self.encryption = encryption
+        self.prf = prf
+        self.read_only = read_only
+
+    def __repr__(self) -> str:
+        return (f"MountedVolume(slot={self.slot}, volume_path={self.volume_path!r}, "
+                f"virtual_device={self.virtual_device!r}, mount_point={self.mount_point!r})")
+
+# Correspondance entre les clés de la sortie détaillée et les attributs
+_VERBOSE_FIELDS = {
+    'Volume': 'volume_path',
+    'Virtual Device': 'virtual_device',
+    'Mount Directory': 'mount_point',
+    'Size': 'size',
+    'Encryption Algorithm': 'encryption',
+    'PKCS-5 PRF': 'prf',
+}
+
+def parse_volume_list(output: str) -> List[MountedVolume]:
+    """Analyse en une passe la sortie de `veracrypt --list [--verbose]`.
+    
+    Le format détaillé (blocs "Clé: valeur") et le format court sont reconnus ;
+    les valeurs sont prises jusqu'à la fin de ligne, les espaces dans les
+    chemins sont donc conservés.
+    
+    Args:
+        output: Sortie standard de VeraCrypt
+        
+    Returns:
+        Liste des volumes montés
+    """
+    volumes = []
+    current = None
+
+    for line in output.splitlines():
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+
+        brief = _BRIEF_LINE.match(line)
+        if brief:
+            mount_point = brief.group(4)
+            current = None
+            volumes.append(MountedVolume(
+                int(brief.group(1)),
+                volume_path=brief.group(2),
+                virtual_device=brief.group(3),
+                mount_point='' if mount_point == '-' else mount_point
+            ))
+            continue
+
+        key, sep, value = line.partition(': ')
+        if not sep:
+            continue
+        key = key.strip()
+
+        if key == 'Slot':
+            try:
+                current = MountedVolume(int(value))
+            except ValueError:
+                current = None
+                continue
+            volumes.append(current)
+        elif current is not None:
+            if key == 'Read-Only':
+                current.read_only = value.strip().lower() == 'yes'
+            elif key in _VERBOSE_FIELDS:
+                attribute = _VERBOSE_FIELDS[key]
+                value = value.strip()
+                if attribute == 'mount_point' and value == '-':
+                    value = ''
+                setattr(current, attribute, value)
+
+    return volumes
+
+def _stat(path: str) -> Optional[os.stat_result]:
+    """Retourne le stat d'un chemin, ou None s'il est inaccessible."""
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+class MountSnapshot:
+    """Ensemble des volumes montés avec des index à accès direct.
+    
+    Les conteneurs sont indexés par (st_dev, st_ino) pour les fichiers et par
+    numéro de périphérique (st_rdev) pour les périphériques bloc ; les points
+    de montage par chemin normalisé et par (st_dev, st_ino). Un même fichier
+    atteint par un autre chemin (lien symbolique, montage lié, /dev/disk/by-*)
+    est donc reconnu sans comparer les chemins un à un.
+    """
+    __slots__ = (
+        'volumes',
+        'by_slot',
+        'by_mount_point',
+        'by_container',
+        'by_device',
+        'by_mount_inode'
+    )
+
+    def __init__(self, volumes: List[MountedVolume]):
+        self.volumes = volumes
+        self.by_slot: Dict[int, MountedVolume] = {}
+        self.by_mount_point: Dict[str, MountedVolume] = {}
+        self.by_container: Dict[Tuple[int, int], MountedVolume] = {}
+        self.by_device: Dict[int, MountedVolume] = {}
+        self.by_mount_inode: Dict[Tuple[int, int], MountedVolume] = {}
+
+        for volume in volumes:
+            self.by_slot[volume.slot] = volume
+
+            if volume.mount_point:
+                self.by_mount_point[os.path.normpath(volume.mount_point)] = volume
+                st = _stat(volume.mount_point)
+                if st is not None:
+                    self.by_mount_inode[(st.st_dev, st.st_ino)] = volume
+
+            st = _stat(volume.volume_path) if volume.volume_path else None
+            if st is None:
+                continue
+            if stat.S_ISBLK(st.st_mode):
+                self.by_device[st.st_rdev] = volume
+            else:
+                self.by_container[(st.st_dev, st.st_ino)] = volume
+
+    def __iter__(self) -> Iterator[MountedVolume]:
+        return iter(self.volumes)
+
+    def __len__(self) -> int:
+        return len(self.volumes)
+
+    def find_by_mount_point(self, mount_point: str) -> Optional[MountedVolume]:
+        """Retourne le volume monté sur un répertoire donné."""
+        volume = self.by_mount_point.get(os.path.normpath(mount_point))
+        if volume is not None or not self.by_mount_inode:
+            return volume
+        st = _stat(mount_point)
+        return self.by_mount_inode.get((st.st_dev, st.st_ino)) if st is not None else None
+
+    def find_by_container(self, volume_path: str) -> Optional[MountedVolume]:
+        """Retourne le volume monté à partir d'un conteneur (fichier ou périphérique)."""
+        st = _stat(volume_path)
+        if st is None:
+            return None
+        if stat.S_ISBLK(st.st_mode):
+            return self.by_device.get(st.st_rdev)
+        return self.by_container.get((st.st_dev, st.st_ino))
+
+class MountTable:
+    """Instantané en mémoire des volumes VeraCrypt montés.
+
+    `veracrypt --list` n'est relancé que lorsque l'ensemble des montages du
+    noyau a réellement changé depuis le dernier chargement.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MountTable, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self._lock = threading.RLock()
+            self._snapshot = None
+            self._mount_set = None
+            self._fd = None
+            self._poller = None
+            self._listeners = []
+            self._watch_thread = None
+            self._fd, self._poller = self._open_mountinfo()
+
+    @staticmethod
+    def _open_mountinfo():
+        """Ouvre /proc/self/mountinfo et prépare un objet poll dessus.
+
+        Returns:
+            Tuple (descripteur, poller) ou (None, None) si indisponible
+        """
+        try:
+            fd = os.open(MOUNTINFO_PATH, os.O_RDONLY | os.O_CLOEXEC)
+            poller = select.poll()
+            poller.register(fd, select.POLLPRI | select.POLLERR)
+            return fd, poller
+        except (OSError, AttributeError) as e:
+            print(f"Surveillance de {MOUNTINFO_PATH} indisponible : {e}")
+            return None, None
+
+    @staticmethod
+    def _read_mount_set(fd: int) -> FrozenSet[Tuple[str, str, str]]:
+        """Lit l'ensemble des montages (identifiant, point de montage, source)."""
+        chunks = []
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        mounts = set()
+        for line in b''.join(chunks).decode('utf-8', 'replace').splitlines():
+            fields = line.split()
+            if len(fields) < 5 or '-' not in fields:
+                continue
+            source_index = fields.index('-') + 2
+            source = fields[source_index] if source_index < len(fields) else ''
+            mounts.add((fields[0], fields[4], source))
+        return frozenset(mounts)
+
+    def _has_changed(self) -> bool:
+        """Indique si la table des montages du noyau a changé."""
+        if self._poller is None:
+            # Pas de notification possible : toujours recharger
+            return True
+
+        # poll() consomme l'événement : un changement ultérieur sera vu au prochain appel
+        if not self._poller.poll(0):
+            return False
+
+        try:
+            return self._read_mount_set(self._fd) != self._mount_set
+        except OSError:
+            return True
+
+    def _reload(self):
+        """Recharge la liste des volumes depuis VeraCrypt."""
+        from .veracrypt import query_mounted_volumes
+
+        # Mémoriser l'état du noyau avant d'interroger VeraCrypt, pour qu'un
+        # montage survenant pendant la requête soit vu au prochain accès
+        if self._fd is not None:
+            try:
+                self._poller.poll(0)
+                self._mount_set = self._read_mount_set(self._fd)
+            except OSError:
+                self._mount_set = None
+        self._snapshot = MountSnapshot(query_mounted_volumes())
+
+    def snapshot(self) -> MountSnapshot:
+        """Retourne l'instantané indexé des volumes montés."""
+        with self._lock:
+            if self._snapshot is None or self._has_changed():
+                self._reload()
+            return self._snapshot
+
+    def volumes(self) -> List[MountedVolume]:
+        """Retourne les volumes montés."""
+        return list(self.snapshot().volumes)
+
+    def invalidate(self):
+        """Force le rechargement au prochain accès.
+
+        À appeler après une opération qui ne modifie pas forcément la table
+        des montages du noyau (ex. volume mappé sans système de fichiers).
+        """
+        with self._lock:
+            self._snapshot = None
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Enregistre une fonction appelée à chaque changement des montages.
+
+        La fonction est appelée depuis un thread de surveillance : les
+        composants Qt doivent relayer l'appel par un signal.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+            if self._fd is not None and (self._watch_thread is None or not self._watch_thread.is_alive()):
+                self._watch_thread = threading.Thread(
+                    target=self._watch,
+                    daemon=True
+                )
+                self._watch_thread.start()
+
+    def remove_listener(self, callback: Callable[[], None]):
+        """Retire une fonction enregistrée par add_listener."""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _watch(self):
+        """Attend les notifications du noyau et prévient les abonnés."""
+        # Un descripteur dédié : chaque fichier ouvert a son propre état d'événement
+        fd, poller = self._open_mountinfo()
+        if fd is None:
+            return
+        try:
+            while True:
+                with self._lock:
+                    if not self._listeners:
+                        break
+                if not poller.poll(1000):
+                    continue
+                for callback in list(self._listeners):
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"Erreur dans un abonné de la table des montages : {e}")
+        finally:
+            os.close(fd)
+
+# Instance globale
+mount_table = MountTable()
@@ -0,0 +1,217 @@
+"""
+Calibration du PIM sur le temps de déverrouillage visé.
+
+VeraCrypt dérive la clé d'en-tête par PBKDF2 avec un nombre d'itérations
+fixé par le PIM : 15000 + PIM × 1000 pour un volume non système, ou la
+valeur par défaut de chaque fonction de hachage sans PIM. La calibration
+mesure le débit de PBKDF2 de chaque fonction sur cette machine et en déduit
+le temps de déverrouillage d'un PIM, ou le PIM qui atteint un temps donné.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import socket
+import time
+from typing import Dict, List, Optional, Tuple
+from .constants import Constants
+
+# Itérations sans PIM (volumes non système), par fonction de hachage
+DEFAULT_ITERATIONS = {
+    'SHA-512': 500000,
+    'SHA-256': 500000,
+    'Whirlpool': 500000,
+    'RIPEMD-160': 655331
+}
+
+# Itérations d'un PIM explicite : ITERATION_BASE + PIM × ITERATION_STEP
+ITERATION_BASE = 15000
+ITERATION_STEP = 1000
+
+# PIM équivalent aux itérations par défaut de SHA-512
+DEFAULT_PIM = 485
+
+# VeraCrypt refuse un PIM inférieur à DEFAULT_PIM avec un mot de passe plus court
+SHORT_PASSWORD_LENGTH = 20
+
+# Nom hashlib de chaque fonction de hachage de VeraCrypt
+_HASHLIB_NAMES = {
+    'SHA-512': 'sha512',
+    'SHA-256': 'sha256',
+    'Whirlpool': 'whirlpool',
+    'RIPEMD-160': 'ripemd160'
+}
+
+def pim_iterations(hash_algo: str, pim: Optional[int]) -> int:
+    """Nombre d'itérations PBKDF2 d'un PIM (None ou 0 : valeur par défaut)."""
+    if not pim:
+        return DEFAULT_ITERATIONS[hash_algo]
+    return ITERATION_BASE + pim * ITERATION_STEP
+
+def validate_pim(pim: Optional[int], password: str) -> Tuple[bool, str]:
+    """Vérifie qu'un PIM est accepté par VeraCrypt pour ce mot de passe.
+
+    Un PIM inférieur au défaut rend la dérivation de la clé plus rapide à
+    attaquer : VeraCrypt ne l'accepte qu'avec un mot de passe d'au moins
+    SHORT_PASSWORD_LENGTH caractères.
+
+    Returns:
+        Tuple[bool, str]: (PIM accepté, message d'erreur)
+    """
+    if pim and pim < DEFAULT_PIM and len(password) < SHORT_PASSWORD_LENGTH:
+        return False, (f"Un PIM inférieur à {DEFAULT_PIM} exige un mot de passe d'au moins "
+                       f"{SHORT_PASSWORD_LENGTH} caractères")
+    return True, ""
+
+class PimCalibration:
+    """Débit de PBKDF2 mesuré sur une machine, en itérations par seconde."""
+    __slots__ = ('host', 'rates', 'measured')
+
+    def __init__(self, host: str, rates: Dict[str, float], measured: float = None):
+        self.host = host
+        # Fonctions de hachage indisponibles dans hashlib : absentes
+        self.rates = rates
+        self.measured = measured if measured is not None else time.time()
+
+    def _tried(self, hash_algo: Optional[str]) -> List[str]:
+        """Fonctions de hachage essayées au montage, parmi celles mesurées."""
+        if hash_algo:
+            return [hash_algo] if hash_algo in self.rates else []
+        return [algo for algo in DEFAULT_ITERATIONS if algo in self.rates]
+
+    def unlock_time(self, hash_algo: Optional[str], pim: Optional[int]) -> Optional[float]:
+        """Temps de dérivation de la clé d'en-tête, en secondes.
+
+        Args:
+            hash_algo: Fonction de hachage du volume, ou None si elle est
+                inconnue : VeraCrypt essaie alors chaque fonction, le temps
+                retourné est celui du pire cas (fonctions mesurées)
+            pim: PIM (None ou 0 : valeur par défaut)
+
+        Returns:
+            Durée estimée, ou None si une fonction n'a pas pu être mesurée
+        """
+        algorithms = self._tried(hash_algo)
+        if not algorithms:
+            return None
+        return sum(pim_iterations(algo, pim) / self.rates[algo] for algo in algorithms)
+
+    def pim_for_target(self, hash_algo: Optional[str], target: float) -> Optional[int]:
+        """PIM le plus élevé dont le déverrouillage ne dépasse pas target secondes.
+
+        Returns:
+            PIM (au moins 1, éventuellement inférieur au défaut), ou None si
+            la fonction n'a pas pu être mesurée
+        """
+        algorithms = self._tried(hash_algo)
+        if not algorithms:
+            return None
+        # Secondes par itération, toutes fonctions essayées confondues
+        cost = sum(1 / self.rates[algo] for algo in algorithms)
+        return max(1, math.floor((target / cost - ITERATION_BASE) / ITERATION_STEP))
+
+    def recommend(self, hash_algo: Optional[str], target: float) -> Optional[int]:
+        """PIM recommandé pour un temps de déverrouillage visé.
+
+        Jamais inférieur à DEFAULT_PIM : un temps visé plus court que celui du
+        PIM par défaut ne justifie pas d'affaiblir la dérivation de la clé
+        (voir pim_for_target pour la valeur brute).
+
+        Returns:
+            PIM, ou None si la fonction n'a pas pu être mesurée
+        """
+        pim = self.pim_for_target(hash_algo, target)
+        return None if pim is None else max(pim, DEFAULT_PIM)
+
+    def describe(self, hash_algo: Optional[str], pim: Optional[int]) -> str:
+        """Temps de déverrouillage lisible d'un PIM."""
+        seconds = self.unlock_time(hash_algo, pim)
+        if seconds is None:
+            return "Temps de déverrouillage : fonction de hachage non mesurable"
+        text = f"Temps de déverrouillage estimé : {seconds * 1000:.0f} ms"
+        if hash_algo is None:
+            text += " (au plus, toutes les fonctions de hachage essayées)"
+        if pim and pim < DEFAULT_PIM:
+            text += f" ; PIM inférieur au défaut ({DEFAULT_PIM}) : mot de passe plus rapide à attaquer"
+        return text
+
+    def to_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PimCalibration':
+        return cls(**{slot: data.get(slot) for slot in cls.__slots__})
+
+_CALIBRATION_FILE = os.path.expanduser('~/.veracrypt/pim_calibration.json')
+
+def _load_calibrations() -> Dict[str, Dict]:
+    """Charge les calibrations enregistrées (une par machine)."""
+    try:
+        with open(_CALIBRATION_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def cached_calibration() -> Optional[PimCalibration]:
+    """Retourne la calibration enregistrée pour cette machine."""
+    data = _load_calibrations().get(socket.gethostname())
+    return PimCalibration.from_dict(data) if data else None
+
+def calibrate(iterations: int = Constants.PIM_CALIBRATION_ITERATIONS) -> PimCalibration:
+    """Mesure le débit de PBKDF2 de chaque fonction de hachage.
+
+    La clé dérivée a la taille des clés d'en-tête de la plus longue cascade,
+    comme dans VeraCrypt : le coût par itération est le même.
+
+    Args:
+        iterations: Itérations de la mesure, pour chaque fonction
+
+    Returns:
+        Calibration obtenue, enregistrée pour cette machine
+    """
+    salt = os.urandom(64)
+    rates = {}
+    for hash_algo, name in _HASHLIB_NAMES.items():
+        try:
+            start = time.monotonic()
+            hashlib.pbkdf2_hmac(name, b'calibration', salt, iterations, Constants.PBKDF2_KEY_SIZE)
+            rates[hash_algo] = iterations / max(time.monotonic() - start, 1e-9)
+        except ValueError:
+            # Fonction absente de l'OpenSSL de cette machine (ex: Whirlpool)
+            continue
+
+    result = PimCalibration(socket.gethostname(), rates)
+    calibrations = _load_calibrations()
+    calibrations[result.host] = result.to_dict()
+    try:
+        os.makedirs(os.path.dirname(_CALIBRATION_FILE), exist_ok=True)
+        with open(_CALIBRATION_FILE, 'w') as f:
+            json.dump(calibrations, f, indent=2)
+    except OSError as e:
+        print(f"Erreur lors de la sauvegarde de la calibration du PIM : {e}")
+    return result
+
+def mount_timeout(pim: Optional[int], hash_algo: Optional[str] = None) -> float:
+    """Délai d'un --mount avec un PIM donné, en secondes.
+
+    Le délai configuré suffit au PIM par défaut. Avec un PIM élevé, le temps
+    de déverrouillage estimé (toutes fonctions de hachage essayées si elle
+    n'est pas connue) s'y ajoute, avec une marge ; sans calibration, le délai
+    croît avec le nombre d'itérations.
+    """
+    base = Constants.COMMAND_TIMEOUTS['--mount']
+    if not pim:
+        return base
+    calibration = cached_calibration()
+    unlock = calibration.unlock_time(hash_algo, pim) if calibration is not None else None
+    if unlock is not None:
+        return base + unlock * Constants.PIM_MOUNT_TIMEOUT_MARGIN
+    ratio = pim_iterations('SHA-512', pim) / DEFAULT_ITERATIONS['SHA-512']
+    return base * max(1.0, ratio)
+
+async def calibrate_async() -> PimCalibration:
+    """Version asynchrone de calibrate, pour le moteur de commandes."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, calibrate)
@@ -1,16 +1,55 @@
 """
 Gestion des préférences de l'application.
+
+Les modifications sont regroupées (batch() ou délai PREFERENCES_FLUSH_DELAY)
+avant d'être écrites par remplacement atomique du fichier, puis publiées aux
+abonnés sous forme de PreferenceChange. reload() relit le fichier (ou la
+base) modifié par un autre programme et publie de même les préférences
+changées.
 """
 
+import atexit
 import json
 import os
-from typing import Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from .constants import Constants
+from .filesystem import file_signature, write_atomic
+from .store import store
+
+class PreferenceChange:
+    """Modification d'une préférence."""
+    __slots__ = ('key', 'old', 'new')
+    
+    def __init__(self, key: str, old: Any, new: Any):
+        self.key = key
+        # None si la préférence n'était pas définie
+        self.old = old
+        self.new = new
+        
+    def __repr__(self) -> str:
+        return f"PreferenceChange({self.key!r}, {self.old!r} -> {self.new!r})"
 
 class Preferences:
     def __init__(self):
         self.preferences_file = os.path.expanduser('~/.veracrypt/preferences.json')
         self._ensure_preferences_dir()
+        # Stockage SQLite : chaque préférence est une ligne de la base
+        self._store = store if store.enabled() else None
+        # Version des données de la base connue (lue avant les préférences)
+        self._data_version = self._store.data_version() if self._store is not None else None
+        # Version du fichier connue (écrite ou lue par cette instance)
+        self._signature = file_signature(self.preferences_file)
         self.preferences = self._load_preferences()
+        self._lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._listeners = []
+        # Modifications de la transaction batch() en cours (None hors transaction)
+        self._pending: Optional[Dict[str, PreferenceChange]] = None
+        # Les modifications en attente sont enregistrées à la sortie
+        atexit.register(self.flush)
         
     def _ensure_preferences_dir(self):
         """S'assure que le répertoire des préférences existe."""
@@ -18,6 +57,8 @@ class Preferences:
         
     def _load_preferences(self) -> Dict[str, Any]:
         """Charge les préférences depuis le fichier."""
+        if self._store is not None:
+            return {**self._get_default_preferences(), **self._store.get_preferences()}
         if os.path.exists(self.preferences_file):
             try:
                 with open(self.preferences_file, 'r') as f:
@@ -27,15 +68,104 @@ class Preferences:
         return self._get_default_preferences()
         
     def _save_preferences(self) -> bool:
-        """Sauvegarde les préférences dans le fichier."""
-        try:
-            with open(self.preferences_file, 'w') as f:
-                json.dump(self.preferences, f, indent=2)
-            return True
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde des préférences : {e}")
-            return False
+        """Programme l'enregistrement des préférences.
+        
+        Les modifications rapprochées sont regroupées : l'écriture a lieu
+        PREFERENCES_FLUSH_DELAY secondes après la dernière.
+        """
+        with self._lock:
+            self._dirty = True
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(Constants.PREFERENCES_FLUSH_DELAY, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+        return True
+        
+    def flush(self) -> bool:
+        """Enregistre immédiatement les modifications en attente.
+        
+        Returns:
+            True si le fichier est à jour
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return True
+            try:
+                self._signature = write_atomic(self.preferences_file, json.dumps(self.preferences, indent=2))
+                self._dirty = False
+                return True
+            except Exception as e:
+                print(f"Erreur lors de la sauvegarde des préférences : {e}")
+                return False
             
+    def reload(self) -> Dict[str, PreferenceChange]:
+        """Relit le fichier s'il a été modifié par un autre programme.
+        
+        Les abonnés reçoivent les préférences changées ; une préférence
+        retirée du fichier reprend sa valeur par défaut. Tant que des
+        modifications locales attendent d'être écrites, le fichier n'est pas
+        relu : elles l'emportent sur la version du disque.
+        
+        Avec le stockage SQLite, la base n'est relue que si une autre
+        connexion l'a modifiée (à appeler depuis le thread qui a créé
+        l'instance : PRAGMA data_version est propre à chaque connexion).
+        
+        Returns:
+            Préférences modifiées (clé -> PreferenceChange)
+        """
+        with self._lock:
+            if self._dirty or self._pending is not None:
+                return {}
+            if self._store is not None:
+                version = self._store.data_version()
+                if version == self._data_version:
+                    return {}
+                try:
+                    loaded = {**self._get_default_preferences(), **self._store.get_preferences()}
+                except Exception as e:
+                    print(f"Erreur lors du rechargement des préférences : {e}")
+                    return {}
+                self._data_version = version
+            else:
+                loaded = self._read_file()
+                if loaded is None:
+                    return {}
+            defaults = self._get_default_preferences()
+            changes = {}
+            for key in set(self.preferences) | set(loaded):
+                old = self.preferences.get(key, defaults.get(key))
+                new = loaded.get(key, defaults.get(key))
+                if old != new:
+                    changes[key] = PreferenceChange(key, old, new)
+            self.preferences = loaded
+        if changes:
+            self._notify(changes)
+        return changes
+        
+    def _read_file(self) -> Optional[Dict[str, Any]]:
+        """Relit le fichier s'il a changé ; None s'il n'y a rien à appliquer."""
+        signature = file_signature(self.preferences_file)
+        if signature == self._signature:
+            return None
+        if signature is None:
+            # Fichier supprimé : retour aux valeurs par défaut
+            loaded = self._get_default_preferences()
+        else:
+            try:
+                with open(self.preferences_file, 'r') as f:
+                    loaded = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Erreur lors du rechargement des préférences : {e}")
+                return None
+        if not isinstance(loaded, dict):
+            return None
+        self._signature = signature
+        return loaded
+        
     def _get_default_preferences(self) -> Dict[str, Any]:
         """Retourne les préférences par défaut."""
         return {
@@ -51,9 +181,95 @@ class Preferences:
         return self.preferences.get(key, default)
         
     def set(self, key: str, value: Any) -> bool:
-        """Définit une préférence."""
+        """Définit une préférence.
+        
+        Dans un bloc batch(), l'enregistrement a lieu à la sortie du bloc.
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._record(self._pending, key, value)
+                return True
+            changes = self._effective(self._record({}, key, value))
+            saved = self._commit(changes) if changes else True
+        if changes:
+            self._notify(changes)
+        return saved
+        
+    @contextmanager
+    def batch(self) -> Iterator['Preferences']:
+        """Regroupe plusieurs modifications en une seule transaction.
+        
+        À la sortie du bloc, les préférences modifiées sont enregistrées en
+        une fois et les abonnés prévenus une seule fois. Si le bloc lève une
+        exception, les modifications sont annulées. Un bloc imbriqué rejoint
+        la transaction englobante.
+        """
+        with self._lock:
+            if self._pending is not None:
+                yield self
+                return
+            snapshot = dict(self.preferences)
+            self._pending = {}
+            try:
+                yield self
+            except BaseException:
+                self.preferences = snapshot
+                raise
+            finally:
+                pending, self._pending = self._pending, None
+            changes = self._effective(pending)
+            if changes:
+                self._commit(changes)
+        if changes:
+            self._notify(changes)
+            
+    def _record(self, pending: Dict[str, PreferenceChange], key: str, value: Any) -> Dict[str, PreferenceChange]:
+        """Applique une modification et la note dans pending (l'ancienne valeur est conservée)."""
+        if key in pending:
+            pending[key].new = value
+        else:
+            pending[key] = PreferenceChange(key, self.preferences.get(key), value)
         self.preferences[key] = value
-        return self._save_preferences()
+        return pending
+        
+    @staticmethod
+    def _effective(pending: Dict[str, PreferenceChange]) -> Dict[str, PreferenceChange]:
+        """Retire les modifications qui ramènent la valeur d'origine."""
+        return {key: change for key, change in pending.items() if change.old != change.new}
+        
+    def _commit(self, changes: Dict[str, PreferenceChange]) -> bool:
+        """Enregistre les préférences modifiées."""
+        if self._store is None:
+            return self._save_preferences()
+        try:
+            self._store.set_preferences({key: change.new for key, change in changes.items()})
+            return True
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde des préférences : {e}")
+            return False
+            
+    def _notify(self, changes: Dict[str, PreferenceChange]):
+        """Prévient les abonnés des préférences modifiées."""
+        for callback in list(self._listeners):
+            try:
+                callback(changes)
+            except Exception as e:
+                print(f"Erreur dans un abonné des préférences : {e}")
+                
+    def add_listener(self, callback: Callable[[Dict[str, PreferenceChange]], None]):
+        """Enregistre une fonction appelée avec les préférences modifiées (clé -> PreferenceChange).
+        
+        La fonction est appelée depuis le thread qui modifie les préférences :
+        les composants Qt doivent relayer l'appel par un signal.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+            
+    def remove_listener(self, callback: Callable[[Dict[str, PreferenceChange]], None]):
+        """Retire une fonction enregistrée par add_listener."""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
         
 # Instance globale
 preferences = Preferences()
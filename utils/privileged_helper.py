@@ -0,0 +1,270 @@
+"""
+Client de l'assistant privilégié persistant.
+
+Au lieu de lancer `sudo -S` pour chaque commande, un assistant root unique
+(voir root_helper.py) est démarré une fois par session ; les commandes
+VeraCrypt lui sont transmises sur une paire de sockets.
+"""
+
+import atexit
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+from .constants import Constants
+from .sudo_session import sudo_session
+
+logger = logging.getLogger('veracrypt.privileged_helper')
+
+class PrivilegedHelper:
+    _instance = None
+    
+    # Message d'erreur renvoyé quand une commande dépasse son délai
+    TIMEOUT_ERROR = "Délai d'exécution dépassé"
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PrivilegedHelper, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self._lock = threading.Lock()
+            self._write_lock = threading.Lock()
+            self._process = None
+            self._sock = None
+            self._pending: Dict[int, Future] = {}
+            self._output_callbacks: Dict[int, Callable[[str, str], None]] = {}
+            self._next_id = 0
+
+    @staticmethod
+    def _helper_command() -> List[str]:
+        """Retourne la commande de lancement de l'assistant."""
+        if getattr(sys, 'frozen', False):
+            # Exécutable PyInstaller : main.py aiguille vers root_helper.py
+            command = [sys.executable, '--privileged-helper']
+        else:
+            command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'root_helper.py')]
+        return command + ['--veracrypt', Constants.VERACRYPT_PATH]
+
+    def is_running(self) -> bool:
+        """Indique si l'assistant est démarré et vivant."""
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> bool:
+        """Démarre l'assistant s'il ne tourne pas déjà.
+
+        Returns:
+            bool: True si l'assistant est prêt
+        """
+        with self._lock:
+            if self.is_running():
+                return True
+
+            sudo_password = sudo_session.get_sudo_password()
+            if not sudo_password:
+                logger.error("Mot de passe sudo non disponible")
+                return False
+
+            parent_sock, child_sock = socket.socketpair()
+            try:
+                logger.debug("Démarrage de l'assistant privilégié")
+                process = subprocess.Popen(
+                    ['sudo', '-S', '-p', '', '--'] + self._helper_command(),
+                    stdin=child_sock,
+                    stdout=child_sock,
+                    stderr=subprocess.PIPE,
+                    close_fds=True
+                )
+            except Exception:
+                logger.exception("Impossible de lancer l'assistant privilégié")
+                parent_sock.close()
+                return False
+            finally:
+                child_sock.close()
+
+            try:
+                # sudo lit le mot de passe octet par octet jusqu'au retour à la ligne ;
+                # le reste du canal appartient ensuite à l'assistant
+                parent_sock.sendall((sudo_password + '\n').encode('utf-8'))
+                parent_sock.settimeout(Constants.HELPER_START_TIMEOUT)
+                rfile = parent_sock.makefile('rb')
+                ready = json.loads(rfile.readline() or b'{}')
+                if not ready.get('ready'):
+                    raise RuntimeError("l'assistant ne s'est pas annoncé")
+                parent_sock.settimeout(None)
+            except Exception as e:
+                process.kill()
+                stderr = process.communicate()[1].decode('utf-8', 'replace')
+                logger.error(f"Échec du démarrage de l'assistant privilégié : {e} {stderr.strip()}")
+                parent_sock.close()
+                return False
+
+            self._process = process
+            self._sock = parent_sock
+            logger.info(f"Assistant privilégié démarré (pid {ready.get('pid')})")
+
+            threading.Thread(target=self._read_loop, args=(rfile,), daemon=True).start()
+            threading.Thread(target=self._drain_stderr, args=(process,), daemon=True).start()
+            return True
+
+    def _read_loop(self, rfile):
+        """Distribue les réponses de l'assistant aux requêtes en attente."""
+        try:
+            for line in rfile:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                request_id = message.get('id')
+                if 'stream' in message:
+                    callback = self._output_callbacks.get(request_id)
+                    if callback is not None:
+                        try:
+                            callback(message['stream'], message.get('data', ''))
+                        except Exception:
+                            logger.exception("Erreur dans le traitement de la sortie")
+                    continue
+                self._output_callbacks.pop(request_id, None)
+                future = self._pending.pop(request_id, None)
+                # La requête a pu être annulée côté client entre-temps
+                if future is not None and future.set_running_or_notify_cancel():
+                    future.set_result(message)
+        except OSError:
+            pass
+        finally:
+            logger.warning("Canal de l'assistant privilégié fermé")
+            self._fail_pending("L'assistant privilégié s'est arrêté")
+
+    @staticmethod
+    def _drain_stderr(process):
+        """Journalise la sortie d'erreur de l'assistant."""
+        for line in process.stderr:
+            logger.debug(f"Assistant privilégié : {line.decode('utf-8', 'replace').rstrip()}")
+
+    def _fail_pending(self, message: str):
+        """Fait échouer toutes les requêtes en attente."""
+        pending, self._pending = self._pending, {}
+        self._output_callbacks = {}
+        for future in pending.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError(message))
+
+    def submit(self, verb: str, args: List[str], input_data: Optional[str] = None,
+               timeout: Optional[float] = None,
+               on_output: Optional[Callable[[str, str], None]] = None) -> Future:
+        """Envoie une requête à l'assistant sans attendre la réponse.
+
+        Args:
+            verb: Verbe de l'assistant (ex. 'veracrypt')
+            args: Arguments de la commande
+            input_data: Données à envoyer sur l'entrée standard
+            timeout: Délai maximal d'exécution en secondes
+            on_output: Fonction appelée (flux, ligne) pour chaque ligne produite,
+                depuis le thread de lecture du canal
+
+        Returns:
+            Future dont le résultat est le message de réponse de l'assistant ;
+            son attribut request_id permet d'annuler la requête
+        """
+        future = Future()
+        future.request_id = None
+        if not self.start():
+            future.set_exception(RuntimeError("Assistant privilégié indisponible"))
+            return future
+
+        with self._write_lock:
+            self._next_id += 1
+            request_id = self._next_id
+            future.request_id = request_id
+            self._pending[request_id] = future
+            if on_output is not None:
+                self._output_callbacks[request_id] = on_output
+            request = {
+                'id': request_id,
+                'verb': verb,
+                'args': args,
+                'input': input_data,
+                'timeout': timeout,
+                'stream': on_output is not None
+            }
+            try:
+                self._sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                self._output_callbacks.pop(request_id, None)
+                future.set_exception(RuntimeError(f"Envoi impossible à l'assistant privilégié : {e}"))
+        return future
+
+    def cancel(self, request_id: int):
+        """Demande l'interruption d'une requête en cours."""
+        if request_id is None or self._sock is None:
+            return
+        with self._write_lock:
+            try:
+                self._sock.sendall((json.dumps({'verb': 'cancel', 'target': request_id}) + '\n').encode('utf-8'))
+            except OSError:
+                pass
+
+    def run(self, command: list, stdin: str = None, timeout: Optional[float] = None) -> Tuple[bool, str, str]:
+        """Exécute une commande VeraCrypt avec les droits root.
+
+        Args:
+            command: Commande complète, commençant par l'exécutable VeraCrypt
+            stdin: Données à envoyer sur l'entrée standard
+            timeout: Délai maximal d'exécution en secondes
+
+        Returns:
+            Tuple contenant:
+            - Un booléen indiquant si la commande a réussi
+            - La sortie standard
+            - La sortie d'erreur
+        """
+        if not command or os.path.basename(command[0]) != 'veracrypt':
+            return False, '', f"Commande non prise en charge par l'assistant : {command[:1]}"
+
+        # Ne pas journaliser les arguments : ils peuvent contenir des mots de passe
+        logger.debug("Exécution d'une commande VeraCrypt via l'assistant privilégié")
+        try:
+            response = self.submit('veracrypt', list(command[1:]), stdin, timeout).result()
+        except Exception as e:
+            logger.error(f"Échec de la commande privilégiée : {e}")
+            return False, '', str(e)
+
+        if response.get('error') == 'timeout':
+            logger.error("Délai dépassé pour la commande privilégiée")
+            return False, response.get('stdout', ''), self.TIMEOUT_ERROR
+            
+        success = response.get('returncode') == 0 and not response.get('error')
+        if not success:
+            logger.error(f"Échec de la commande : {response.get('stderr')}")
+        return success, response.get('stdout', ''), response.get('stderr', '')
+
+    def stop(self):
+        """Arrête l'assistant."""
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    self._sock.sendall(b'{"verb": "shutdown"}\n')
+                    self._sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                self._sock.close()
+                self._sock = None
+            if self._process is not None:
+                try:
+                    self._process.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    # Processus root : seul sudo peut être tué ici, il relaie le signal
+                    self._process.terminate()
+                self._process = None
+
+# Instance globale
+privileged_helper = PrivilegedHelper()
+atexit.register(privileged_helper.stop)
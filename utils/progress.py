@@ -0,0 +1,279 @@
+"""
+Surveillance de la progression des opérations longues de VeraCrypt.
+
+Au lieu d'un délai fixe, une opération n'est interrompue que si elle cesse
+d'avancer pendant une fenêtre donnée ; le temps restant est estimé à partir
+du débit mesuré.
+"""
+
+import os
+import re
+import time
+from typing import Callable, Optional
+
+# Ligne de progression de VeraCrypt : "Done: 12.345%  Speed: 50 MiB/s  Left: 3 minutes"
+_DONE_PATTERN = re.compile(r'Done:\s*([\d.,]+)\s*%')
+_SPEED_PATTERN = re.compile(r'Speed:\s*([\d.,]+)\s*([KMGTP]?)i?B/s')
+_LEFT_PATTERN = re.compile(r'Left:\s*(\d+)\s*(s|sec|second|min|minute|h|hour|d|day)s?\b')
+
+_UNIT_FACTORS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4, 'P': 1024 ** 5}
+_DURATION_FACTORS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'min': 60, 'minute': 60,
+    'h': 3600, 'hour': 3600,
+    'd': 86400, 'day': 86400
+}
+
+def _parse_number(text: str) -> float:
+    """Convertit un nombre affiché par VeraCrypt (virgule décimale possible)."""
+    return float(text.replace(',', '.'))
+
+def format_duration(seconds: float) -> str:
+    """Formate une durée en texte court (ex: '3 min 20 s')."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} min {seconds:02d} s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes:02d} min"
+
+class ProgressStalled(Exception):
+    """Levée quand une opération n'avance plus depuis la fenêtre autorisée."""
+
+    def __init__(self, stalled_for: float, percent: Optional[float]):
+        self.stalled_for = stalled_for
+        self.percent = percent
+        where = f" (bloquée à {percent:.1f} %)" if percent is not None else ""
+        super().__init__(f"L'opération n'avance plus depuis {format_duration(stalled_for)}{where}")
+
+class ProgressWatchdog:
+    """Suit le pourcentage « Done: » d'une commande et détecte les blocages.
+
+    Tant qu'aucune progression n'a été lue, toute sortie compte comme une
+    activité (invites, dérivation des clés) ; ensuite, seule une hausse du
+    pourcentage repousse l'échéance.
+
+    Si la sortie n'arrive pas (tampon d'un tube), la croissance du fichier
+    conteneur sert de progression de repli.
+    """
+
+    def __init__(self, stall_timeout: float, total_bytes: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 growth_path: Optional[str] = None):
+        self.stall_timeout = stall_timeout
+        self.total_bytes = total_bytes
+        self._clock = clock
+        self.started = clock()
+        self.last_activity = self.started
+        self.percent: Optional[float] = None
+        # Premier point de mesure du débit : (instant, pourcentage)
+        self._first_sample = None
+        # Fichier dont la croissance vaut progression, et dernière taille lue
+        self.growth_path = growth_path
+        self._last_size = None
+        # True dès qu'une ligne « Done: » a été lue
+        self._reported = False
+
+    def touch(self):
+        """Signale une activité, en l'absence de progression chiffrée."""
+        if self.percent is None:
+            self.last_activity = self._clock()
+
+    def feed(self, line: str) -> Optional[float]:
+        """Analyse une ligne de sortie.
+
+        Returns:
+            Le pourcentage lu, ou None si la ligne n'indique pas de progression
+        """
+        match = _DONE_PATTERN.search(line)
+        if not match:
+            self.touch()
+            return None
+
+        try:
+            percent = _parse_number(match.group(1))
+        except ValueError:
+            return None
+
+        self._reported = True
+        self._record(percent)
+        return percent
+
+    def _record(self, percent: float):
+        """Enregistre un pourcentage de progression."""
+        now = self._clock()
+        if self.percent is None or percent > self.percent:
+            self.last_activity = now
+        if self._first_sample is None:
+            self._first_sample = (now, percent)
+        self.percent = percent
+
+    def poll(self):
+        """Relève la taille du fichier surveillé."""
+        if self.growth_path is None:
+            return
+        try:
+            size = os.stat(self.growth_path).st_size
+        except OSError:
+            return
+        if self._last_size is not None and size > self._last_size:
+            if not self._reported and self.total_bytes:
+                self._record(min(100.0, size * 100 / self.total_bytes))
+            else:
+                self.last_activity = self._clock()
+        self._last_size = size
+
+    def stalled_for(self) -> float:
+        """Durée écoulée depuis la dernière progression, en secondes."""
+        return self._clock() - self.last_activity
+
+    def is_stalled(self) -> bool:
+        """Indique si la fenêtre de blocage est dépassée."""
+        self.poll()
+        return self.stall_timeout is not None and self.stalled_for() > self.stall_timeout
+
+    def check(self):
+        """Vérifie que l'opération avance.
+
+        Raises:
+            ProgressStalled: Si la fenêtre de blocage est dépassée
+        """
+        if self.is_stalled():
+            raise ProgressStalled(self.stalled_for(), self.percent)
+
+    def rate(self) -> Optional[float]:
+        """Débit mesuré, en pourcentage par seconde."""
+        if self._first_sample is None or self.percent is None:
+            return None
+        first_time, first_percent = self._first_sample
+        elapsed = self._clock() - first_time
+        if elapsed <= 0 or self.percent <= first_percent:
+            return None
+        return (self.percent - first_percent) / elapsed
+
+    def bytes_per_second(self) -> Optional[float]:
+        """Débit mesuré en octets par seconde, si la taille totale est connue."""
+        rate = self.rate()
+        if rate is None or not self.total_bytes:
+            return None
+        return rate * self.total_bytes / 100
+
+    def eta(self) -> Optional[float]:
+        """Temps restant estimé, en secondes."""
+        rate = self.rate()
+        if rate is None:
+            return None
+        return max(0.0, (100 - self.percent) / rate)
+
+    def describe(self) -> str:
+        """Résumé lisible de la progression (pourcentage, débit, temps restant)."""
+        if self.percent is None:
+            return "en attente de progression"
+        parts = [f"{self.percent:.1f} %"]
+        speed = self.bytes_per_second()
+        if speed is not None:
+            parts.append(f"{speed / (1024 * 1024):.1f} Mio/s")
+        eta = self.eta()
+        if eta is not None:
+            parts.append(f"reste {format_duration(eta)}")
+        return " — ".join(parts)
+
+class ProgressEvent:
+    """Point de progression d'une opération."""
+    __slots__ = ('percent', 'bytes_done', 'rate', 'eta')
+
+    def __init__(self, percent: float, bytes_done: Optional[int] = None,
+                 rate: Optional[float] = None, eta: Optional[float] = None):
+        self.percent = percent
+        # Octets traités, si la taille totale est connue
+        self.bytes_done = bytes_done
+        # Débit lissé, en octets par seconde
+        self.rate = rate
+        # Temps restant lissé, en secondes
+        self.eta = eta
+
+    def describe(self) -> str:
+        """Texte du débit et du temps restant, pour l'affichage."""
+        parts = []
+        if self.rate is not None:
+            parts.append(f"Vitesse : {self.rate / (1024 * 1024):.1f} Mio/s")
+        if self.eta is not None:
+            parts.append(f"Temps restant : {format_duration(self.eta)}")
+        return " | ".join(parts)
+
+    def __repr__(self) -> str:
+        return (f"ProgressEvent(percent={self.percent:.3f}, bytes_done={self.bytes_done}, "
+                f"rate={self.rate}, eta={self.eta})")
+
+class ProgressParser:
+    """Transforme les lignes de progression de VeraCrypt en ProgressEvent.
+
+    Le débit et le temps restant sont lissés par une moyenne mobile
+    exponentielle : les à-coups d'écriture ne font plus sauter l'affichage.
+    """
+
+    def __init__(self, total_bytes: Optional[int] = None, alpha: float = 0.2,
+                 clock: Callable[[], float] = time.monotonic):
+        self.total_bytes = total_bytes
+        self.alpha = alpha
+        self._clock = clock
+        self._last_sample = None
+        self.rate: Optional[float] = None
+        self.eta: Optional[float] = None
+
+    def _smooth(self, previous: Optional[float], value: float) -> float:
+        """Moyenne mobile exponentielle."""
+        if previous is None:
+            return value
+        return previous + self.alpha * (value - previous)
+
+    def parse(self, line: str) -> Optional[ProgressEvent]:
+        """Analyse une ligne de sortie.
+
+        Returns:
+            Événement de progression, ou None si la ligne n'en contient pas
+        """
+        match = _DONE_PATTERN.search(line)
+        if not match:
+            return None
+        try:
+            percent = min(100.0, _parse_number(match.group(1)))
+        except ValueError:
+            return None
+
+        now = self._clock()
+        bytes_done = int(self.total_bytes * percent / 100) if self.total_bytes else None
+
+        # Débit : mesuré entre deux lignes si la taille est connue,
+        # sinon celui qu'annonce VeraCrypt
+        rate = None
+        if bytes_done is not None and self._last_sample is not None:
+            last_time, last_bytes = self._last_sample
+            if now > last_time and bytes_done >= last_bytes:
+                rate = (bytes_done - last_bytes) / (now - last_time)
+        if rate is None:
+            speed = _SPEED_PATTERN.search(line)
+            if speed:
+                try:
+                    rate = _parse_number(speed.group(1)) * _UNIT_FACTORS[speed.group(2)]
+                except ValueError:
+                    pass
+        if bytes_done is not None:
+            self._last_sample = (now, bytes_done)
+        if rate is not None:
+            self.rate = self._smooth(self.rate, rate)
+
+        # Temps restant : déduit du débit lissé, sinon celui de VeraCrypt
+        eta = None
+        if self.rate and bytes_done is not None:
+            eta = (self.total_bytes - bytes_done) / self.rate
+        else:
+            left = _LEFT_PATTERN.search(line)
+            if left:
+                eta = int(left.group(1)) * _DURATION_FACTORS[left.group(2)]
+        if eta is not None:
+            self.eta = self._smooth(self.eta, eta)
+
+        return ProgressEvent(percent, bytes_done, self.rate, self.eta)
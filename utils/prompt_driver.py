@@ -0,0 +1,209 @@
+"""
+Pilotage des commandes interactives via un pseudo-terminal.
+
+La sortie de la commande est lue dès qu'elle est disponible (selectors) et
+comparée à une table d'invites : chaque invite reconnue reçoit aussitôt sa
+réponse, sans attente arbitraire entre les lignes.
+"""
+
+import codecs
+import logging
+import os
+import pty
+import re
+import selectors
+import signal
+import subprocess
+import termios
+import time
+from typing import Callable, List, Optional, Pattern, Tuple, Union
+from .constants import Constants
+from .progress import ProgressStalled, ProgressWatchdog
+
+logger = logging.getLogger('veracrypt.prompt_driver')
+
+# Fin de ligne d'un terminal : '\r' seul pour les barres de progression
+_LINE_END = re.compile(r'\r\n|\r|\n')
+
+# Réponse d'une invite : texte fixe, ou fonction appelée avec la correspondance
+# (None pour ne rien envoyer)
+Response = Union[str, Callable[[re.Match], Optional[str]], None]
+
+class PromptMatcher:
+    """Invite reconnue et réponse associée."""
+    __slots__ = ('name', 'pattern', 'response', 'secret')
+
+    def __init__(self, name: str, pattern: Union[str, Pattern], response: Response = None,
+                 secret: bool = False):
+        self.name = name
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.response = response
+        # Réponse confidentielle : jamais journalisée
+        self.secret = secret
+
+    def answer(self, match: re.Match) -> Optional[str]:
+        """Retourne la réponse à envoyer pour une correspondance."""
+        if callable(self.response):
+            return self.response(match)
+        return self.response
+
+class PromptDriver:
+    """Exécute une commande dans un pseudo-terminal et répond à ses invites.
+
+    Les invites sont cherchées à la fois dans les lignes complètes et dans
+    la ligne en cours, car une invite n'est pas suivie d'un retour à la ligne.
+    L'écho du terminal est désactivé : les réponses n'apparaissent pas dans
+    la sortie.
+    """
+
+    def __init__(self, command: List[str], matchers: List[PromptMatcher],
+                 on_line: Optional[Callable[[str], None]] = None):
+        self.command = command
+        self.matchers = matchers
+        self.on_line = on_line
+        self.output: List[str] = []
+
+    def _spawn(self) -> Tuple[subprocess.Popen, int]:
+        """Lance la commande sur l'esclave d'un nouveau pseudo-terminal."""
+        master, slave = pty.openpty()
+        try:
+            attrs = termios.tcgetattr(slave)
+            attrs[3] &= ~termios.ECHO
+            termios.tcsetattr(slave, termios.TCSANOW, attrs)
+
+            process = subprocess.Popen(
+                self.command,
+                stdin=slave,
+                stdout=slave,
+                stderr=slave,
+                start_new_session=True,
+                close_fds=True
+            )
+        except Exception:
+            os.close(master)
+            raise
+        finally:
+            os.close(slave)
+        return process, master
+
+    def _match(self, text: str) -> Optional[Tuple[PromptMatcher, re.Match]]:
+        """Cherche la première invite reconnue dans un texte."""
+        for matcher in self.matchers:
+            match = matcher.pattern.search(text)
+            if match:
+                return matcher, match
+        return None
+
+    def _respond(self, master: int, matcher: PromptMatcher, match: re.Match):
+        """Envoie la réponse à une invite."""
+        response = matcher.answer(match)
+        if response is None:
+            logger.debug(f"Message reconnu : {matcher.name}")
+            return
+        logger.debug(f"Invite reconnue : {matcher.name}, réponse "
+                     f"{'masquée' if matcher.secret else repr(response)}")
+        os.write(master, (response + '\n').encode('utf-8'))
+
+    def _terminate(self, process: subprocess.Popen):
+        """Arrête la commande (sudo relaie SIGTERM au processus root)."""
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except OSError:
+            process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def run(self, timeout: Optional[float] = None,
+            watchdog: Optional[ProgressWatchdog] = None) -> int:
+        """Exécute la commande jusqu'à sa fin.
+
+        Args:
+            timeout: Délai maximal en secondes (None = illimité)
+            watchdog: Surveillance de la progression ; la commande est arrêtée
+                si elle n'avance plus
+
+        Returns:
+            Code de retour de la commande
+
+        Raises:
+            subprocess.TimeoutExpired: Si le délai est dépassé (la commande est arrêtée)
+            ProgressStalled: Si la progression est bloquée (la commande est arrêtée)
+        """
+        process, master = self._spawn()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        selector = selectors.DefaultSelector()
+        selector.register(master, selectors.EVENT_READ)
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        pending = ''
+
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._terminate(process)
+                    raise subprocess.TimeoutExpired(self.command, timeout)
+
+                if watchdog is not None and watchdog.is_stalled():
+                    self._terminate(process)
+                    raise ProgressStalled(watchdog.stalled_for(), watchdog.percent)
+
+                # Réveil régulier pour la surveillance, même sans sortie
+                wait = remaining
+                if watchdog is not None:
+                    wait = Constants.WATCHDOG_INTERVAL if wait is None else min(wait, Constants.WATCHDOG_INTERVAL)
+                if not selector.select(wait):
+                    continue
+                try:
+                    data = os.read(master, 4096)
+                except OSError:
+                    # EIO : toutes les extrémités esclaves sont fermées
+                    data = b''
+                if not data:
+                    break
+
+                pending += decoder.decode(data)
+                *lines, pending = _LINE_END.split(pending)
+                for line in lines:
+                    if not line:
+                        continue
+                    self.output.append(line)
+                    if watchdog is not None:
+                        watchdog.feed(line)
+                    if self.on_line is not None:
+                        self.on_line(line)
+                    found = self._match(line)
+                    if found:
+                        self._respond(master, *found)
+
+                # Invite en attente de réponse, sans retour à la ligne
+                if pending:
+                    found = self._match(pending)
+                    if found:
+                        self.output.append(pending)
+                        pending = ''
+                        if watchdog is not None:
+                            watchdog.touch()
+                        self._respond(master, *found)
+
+            if pending:
+                self.output.append(pending)
+
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                return process.wait(timeout=remaining)
+            except subprocess.TimeoutExpired:
+                self._terminate(process)
+                raise
+        finally:
+            selector.close()
+            os.close(master)
+            if process.poll() is None:
+                self._terminate(process)
+
+    @property
+    def transcript(self) -> str:
+        """Sortie complète de la commande (sans les réponses envoyées)."""
+        return '\n'.join(self.output)
@@ -0,0 +1,331 @@
+"""
+Provisionnement de volumes en lot à partir d'un manifeste TOML ou JSON.
+
+Exemple de manifeste (TOML) :
+
+    [defaults]
+    encryption = "AES"
+    hash = "SHA-512"
+    filesystem = "EXT4"
+    mkfs_profile = "large_files"
+
+    [[volume]]
+    path = "/data/projets.tc"
+    size = "20G"
+    mount_point = "/mnt/projets"
+    favorite = "Projets"
+    password_env = "VC_PROJETS"
+
+Le mot de passe d'une entrée vient de `password`, `password_env` (variable
+d'environnement) ou `password_file` ; à défaut, il est demandé.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from .constants import Constants
+from .creation_queue import creation_queue, CreationJob, SUCCEEDED
+from .mkfs import PROFILES
+from .volume_creation import VolumeCreation
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+class ManifestError(ValueError):
+    """Manifeste illisible ou entrée invalide."""
+
+class ManifestEntry:
+    """Volume décrit par le manifeste."""
+    __slots__ = (
+        'path',
+        'size',
+        'encryption',
+        'hash_algo',
+        'filesystem',
+        'quick',
+        'mkfs_profile',
+        'mount_point',
+        'favorite',
+        'save_password',
+        'password',
+        'password_env',
+        'password_file'
+    )
+
+    def __init__(self, path: str, size: str, encryption: str = 'AES', hash_algo: str = 'SHA-512',
+                 filesystem: str = 'FAT', quick: bool = False, mkfs_profile: Optional[str] = None,
+                 mount_point: Optional[str] = None,
+                 favorite: Optional[str] = None, save_password: bool = False,
+                 password: Optional[str] = None, password_env: Optional[str] = None,
+                 password_file: Optional[str] = None):
+        self.path = path
+        self.size = size
+        self.encryption = encryption
+        self.hash_algo = hash_algo
+        self.filesystem = filesystem
+        # Allocation rapide (--quick)
+        self.quick = quick
+        # Profil de formatage (mkfs.PROFILES)
+        self.mkfs_profile = mkfs_profile
+        self.mount_point = mount_point
+        # Nom du favori à enregistrer (None : pas de favori)
+        self.favorite = favorite
+        # Enregistrer le mot de passe avec le favori
+        self.save_password = save_password
+        self.password = password
+        self.password_env = password_env
+        self.password_file = password_file
+
+    def resolve_password(self) -> Optional[str]:
+        """Retourne le mot de passe indiqué par le manifeste, s'il y en a un."""
+        if self.password:
+            return self.password
+        if self.password_env:
+            return os.environ.get(self.password_env) or None
+        if self.password_file:
+            try:
+                with open(os.path.expanduser(self.password_file), 'r') as f:
+                    return f.readline().rstrip('\n') or None
+            except OSError as e:
+                raise ManifestError(f"{self.path} : fichier de mot de passe illisible ({e})")
+        return None
+
+    def __repr__(self) -> str:
+        return f"ManifestEntry(path={self.path!r}, size={self.size!r}, favorite={self.favorite!r})"
+
+# Clés acceptées dans une entrée du manifeste, et attribut correspondant
+_ENTRY_KEYS = {
+    'path': 'path',
+    'size': 'size',
+    'encryption': 'encryption',
+    'hash': 'hash_algo',
+    'filesystem': 'filesystem',
+    'quick': 'quick',
+    'mkfs_profile': 'mkfs_profile',
+    'mount_point': 'mount_point',
+    'favorite': 'favorite',
+    'save_password': 'save_password',
+    'password': 'password',
+    'password_env': 'password_env',
+    'password_file': 'password_file'
+}
+
+def _parse_entry(values: Dict, index: int) -> ManifestEntry:
+    """Valide une entrée du manifeste."""
+    unknown = set(values) - set(_ENTRY_KEYS)
+    if unknown:
+        raise ManifestError(f"Volume n°{index} : clés inconnues ({', '.join(sorted(unknown))})")
+    if not values.get('path') or not values.get('size'):
+        raise ManifestError(f"Volume n°{index} : 'path' et 'size' sont obligatoires")
+
+    entry = ManifestEntry(**{_ENTRY_KEYS[key]: value for key, value in values.items()})
+    entry.path = os.path.abspath(os.path.expanduser(entry.path))
+    entry.size = str(entry.size)
+    try:
+        VolumeCreation._parse_size(entry.size)
+    except ValueError as e:
+        raise ManifestError(f"{entry.path} : taille invalide ({e})")
+    if entry.encryption not in VolumeCreation.ENCRYPTION_ALGORITHMS:
+        raise ManifestError(f"{entry.path} : algorithme de chiffrement inconnu ({entry.encryption})")
+    if entry.hash_algo not in VolumeCreation.HASH_ALGORITHMS:
+        raise ManifestError(f"{entry.path} : algorithme de hachage inconnu ({entry.hash_algo})")
+    if entry.filesystem not in VolumeCreation.FILESYSTEMS:
+        raise ManifestError(f"{entry.path} : système de fichiers inconnu ({entry.filesystem})")
+    if entry.mkfs_profile is not None:
+        profile = PROFILES.get(entry.mkfs_profile)
+        if profile is None:
+            raise ManifestError(f"{entry.path} : profil de formatage inconnu ({entry.mkfs_profile})")
+        if profile.filesystem != entry.filesystem:
+            raise ManifestError(f"{entry.path} : le profil {profile.name} demande le système de fichiers {profile.filesystem}")
+    return entry
+
+def load_manifest(path: str) -> List[ManifestEntry]:
+    """Lit un manifeste de provisionnement.
+
+    Args:
+        path: Fichier .toml ou .json
+
+    Returns:
+        Entrées du manifeste, dans l'ordre
+
+    Raises:
+        ManifestError: Si le manifeste est illisible ou invalide
+    """
+    try:
+        if path.endswith('.toml'):
+            if tomllib is None:
+                raise ManifestError("La lecture des manifestes TOML nécessite Python 3.11")
+            with open(path, 'rb') as f:
+                data = tomllib.load(f)
+        else:
+            with open(path, 'r') as f:
+                data = json.load(f)
+    except (OSError, ValueError) as e:
+        if isinstance(e, ManifestError):
+            raise
+        raise ManifestError(f"Manifeste illisible : {e}")
+
+    if not isinstance(data, dict) or not isinstance(data.get('volume'), list):
+        raise ManifestError("Le manifeste doit contenir une liste 'volume'")
+    defaults = data.get('defaults', {})
+
+    entries = [_parse_entry({**defaults, **values}, index)
+               for index, values in enumerate(data['volume'], 1)]
+    paths = [entry.path for entry in entries]
+    duplicates = {p for p in paths if paths.count(p) > 1}
+    if duplicates:
+        raise ManifestError(f"Volumes en double : {', '.join(sorted(duplicates))}")
+    return entries
+
+def _entry_report(entry: ManifestEntry, job: Optional[CreationJob], message: str = '',
+                  favorite: Optional[str] = None) -> Dict:
+    """Ligne du rapport pour une entrée."""
+    size_bytes = VolumeCreation._parse_size(entry.size)
+    report = {
+        'path': entry.path,
+        'size': entry.size,
+        'size_bytes': size_bytes,
+        'device': job.device if job else None,
+        'quick': bool(entry.quick),
+        'mkfs_profile': entry.mkfs_profile,
+        'success': bool(job and job.state == SUCCEEDED),
+        'message': job.message if job else message,
+        'duration': None,
+        'throughput': None,
+        'favorite': favorite
+    }
+    if job and job.started and job.finished:
+        report['duration'] = round(job.finished - job.started, 3)
+        if report['success'] and report['duration'] > 0:
+            # Débit en octets par seconde
+            report['throughput'] = round(size_bytes / report['duration'])
+    return report
+
+def provision(entries: List[ManifestEntry], favorites=None,
+              password_callback: Optional[Callable[[ManifestEntry], Optional[str]]] = None,
+              on_job_finished: Optional[Callable[[CreationJob], None]] = None) -> Dict:
+    """Crée tous les volumes d'un manifeste.
+
+    Les créations passent par la file d'attente : elles s'exécutent en
+    parallèle sur des disques différents, une à la fois par disque.
+
+    Args:
+        entries: Entrées du manifeste
+        favorites: Gestionnaire des favoris où enregistrer les volumes créés
+        password_callback: Fonction qui demande le mot de passe d'une entrée
+            qui n'en fournit pas
+        on_job_finished: Fonction appelée à la fin de chaque création
+
+    Returns:
+        Rapport (sérialisable en JSON) : durée et débit de chaque volume
+    """
+    started = time.time()
+    lines = {}
+    jobs = {}
+    passwords = {}
+
+    for entry in entries:
+        try:
+            password = entry.resolve_password()
+        except ManifestError as e:
+            lines[entry.path] = _entry_report(entry, None, str(e))
+            continue
+        if password is None and password_callback is not None:
+            password = password_callback(entry)
+        if not password:
+            lines[entry.path] = _entry_report(entry, None, "Mot de passe manquant")
+            continue
+        if os.path.exists(entry.path):
+            lines[entry.path] = _entry_report(entry, None, "Un fichier existe déjà à cet emplacement")
+            continue
+        passwords[entry.path] = password
+        jobs[entry.path] = CreationJob(
+            path=entry.path,
+            size=entry.size,
+            password=password,
+            encryption=entry.encryption,
+            hash_algo=entry.hash_algo,
+            filesystem=entry.filesystem,
+            quick=bool(entry.quick),
+            mkfs_profile=entry.mkfs_profile
+        )
+
+    # Attendre la fin de toutes les créations soumises
+    pending = {job.id for job in jobs.values()}
+    all_done = threading.Event()
+    lock = threading.Lock()
+
+    def listener(job: CreationJob):
+        if job.id not in pending or not job.is_finished:
+            return
+        with lock:
+            if job.id not in pending:
+                return
+            pending.discard(job.id)
+            remaining = len(pending)
+        if on_job_finished is not None:
+            on_job_finished(job)
+        if not remaining:
+            all_done.set()
+
+    creation_queue.add_listener(listener)
+    try:
+        for job in jobs.values():
+            creation_queue.submit(job)
+        creation_queue.start()
+        # Une notification perdue (échec d'enregistrement ou d'un abonné) ne
+        # doit pas bloquer : l'état des créations est aussi relu périodiquement
+        while pending and not all_done.wait(Constants.PROVISION_POLL_INTERVAL):
+            for job in jobs.values():
+                listener(job)
+    finally:
+        creation_queue.remove_listener(listener)
+
+    for entry in entries:
+        job = jobs.get(entry.path)
+        if job is None:
+            continue
+        favorite = None
+        if job.state == SUCCEEDED and entry.favorite and favorites is not None:
+            password = passwords[entry.path] if entry.save_password else None
+            if favorites.add_favorite(entry.favorite, entry.path, False, entry.mount_point, password):
+                favorite = entry.favorite
+        # Le mot de passe n'est plus utile
+        job.password = None
+        lines[entry.path] = _entry_report(entry, job, favorite=favorite)
+
+    volumes = [lines[entry.path] for entry in entries]
+    finished = time.time()
+    return {
+        'started': started,
+        'finished': finished,
+        'duration': round(finished - started, 3),
+        'succeeded': sum(1 for line in volumes if line['success']),
+        'failed': sum(1 for line in volumes if not line['success']),
+        'volumes': volumes
+    }
+
+async def provision_async(entries: List[ManifestEntry], favorites=None,
+                          on_job_finished: Optional[Callable[[CreationJob], None]] = None) -> Dict:
+    """Version asynchrone de provision, pour le moteur de commandes.
+
+    Les mots de passe doivent être déjà résolus (aucune question n'est posée).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, lambda: provision(entries, favorites, on_job_finished=on_job_finished)
+    )
+
+def write_report(report: Dict, path: Optional[str] = None):
+    """Écrit le rapport en JSON dans un fichier, ou sur la sortie standard."""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if path is None:
+        print(text)
+        return
+    with open(path, 'w') as f:
+        f.write(text + '\n')
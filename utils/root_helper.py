@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Assistant privilégié de l'application VeraCrypt GUI.
+
+Lancé une seule fois par session via sudo, il lit sur son entrée standard des
+requêtes JSON (une par ligne), exécute les commandes VeraCrypt autorisées (et
+le formatage des volumes qu'elles ont mappés) et répond sur sa sortie standard. Ce module n'utilise que la bibliothèque
+standard : il est exécuté directement par son chemin, sans importer le
+paquet utils (et donc sans PyQt).
+
+Protocole :
+    -> {"id": 1, "verb": "veracrypt", "args": ["--text", "--list"], "input": null, "timeout": 30, "stream": false}
+    <- {"id": 1, "returncode": 0, "stdout": "...", "stderr": "", "error": null}
+
+Avec "stream": true, chaque ligne produite est aussi envoyée au fil de l'eau
+({"id": 1, "stream": "stdout", "data": "..."}) avant la réponse finale.
+Une requête en cours peut être interrompue par {"verb": "cancel", "target": 1}.
+
+Le verbe "mkfs" formate un volume mappé par VeraCrypt :
+    -> {"id": 2, "verb": "mkfs", "args": ["ext4", "-q", "-F", "/dev/mapper/veracrypt3"], ...}
+
+Le verbe "rename" place à sa destination un conteneur créé dans un
+répertoire sans copie sur écriture, sans jamais remplacer un fichier
+existant ; returncode vaut alors le code errno de l'échec (EEXIST...) :
+    -> {"id": 3, "verb": "rename", "args": ["/home/u/.veracrypt-nocow-x1/v.hc", "/home/u/v.hc"], ...}
+
+Le verbe "chown" rend à l'utilisateur qui a lancé l'assistant (SUDO_UID) un
+conteneur que VeraCrypt vient de créer en tant que root :
+    -> {"id": 4, "verb": "chown", "args": ["/home/u/v.hc"], ...}
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import re
+import shutil
+import signal
+import stat
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Options d'action reconnues par VeraCrypt
+VERACRYPT_ACTIONS = {
+    '--auto-mount', '--backup-headers', '-C', '--change', '-c', '--create',
+    '--create-keyfile', '--delete-token-keyfiles', '-d', '--dismount',
+    '--export-token-keyfile', '--import-token-keyfile', '-l', '--list',
+    '--list-token-keyfiles', '--list-securitytoken-keyfiles',
+    '--list-emvtoken-keyfiles', '--mount', '--restore-headers',
+    '--save-preferences', '--test', '--version', '-h', '--help'
+}
+
+# Actions que l'interface a le droit de demander
+VERACRYPT_ALLOWED_ACTIONS = {
+    '--mount', '-d', '--dismount', '-l', '--list',
+    '-C', '--change', '-c', '--create', '--version'
+}
+
+def check_veracrypt_args(args: List[str]):
+    """Vérifie qu'une ligne de commande VeraCrypt ne demande qu'une action autorisée.
+
+    Raises:
+        ValueError: Si les arguments sont invalides ou l'action interdite
+    """
+    if not all(isinstance(arg, str) for arg in args):
+        raise ValueError("Les arguments doivent être des chaînes")
+
+    actions = [arg.split('=', 1)[0] for arg in args if arg.split('=', 1)[0] in VERACRYPT_ACTIONS]
+    if len(actions) != 1:
+        raise ValueError("Une et une seule action VeraCrypt doit être demandée")
+    if actions[0] not in VERACRYPT_ALLOWED_ACTIONS:
+        raise ValueError(f"Action non autorisée : {actions[0]}")
+
+# Programme de formatage de chaque système de fichiers
+MKFS_PROGRAMS = {
+    'ext4': 'mkfs.ext4',
+    'btrfs': 'mkfs.btrfs'
+}
+
+# Options de mkfs autorisées, et si elles attendent une valeur
+MKFS_OPTIONS = {
+    'ext4': {'-b': True, '-E': True, '-i': True, '-I': True, '-J': True, '-L': True,
+             '-m': True, '-O': True, '-T': True, '-q': False, '-F': False},
+    'btrfs': {'-d': True, '-L': True, '-m': True, '-n': True, '-s': True, '-O': True,
+              '-R': True, '-q': False, '-f': False}
+}
+
+# Seuls les volumes VeraCrypt mappés peuvent être formatés
+MKFS_DEVICE_PATTERN = re.compile(r'^/dev/mapper/veracrypt\d+$')
+
+# Recherche des programmes système, indépendante du PATH de l'appelant
+SYSTEM_PATH = '/usr/sbin:/sbin:/usr/bin:/bin'
+
+def mkfs_command(args: List[str]) -> List[str]:
+    """Construit la commande de formatage d'une requête mkfs.
+
+    Args:
+        args: [système de fichiers, options..., périphérique mappé]
+
+    Raises:
+        ValueError: Si le système de fichiers, une option ou le périphérique est refusé
+    """
+    if len(args) < 2 or not all(isinstance(arg, str) for arg in args):
+        raise ValueError("Arguments de mkfs invalides")
+    filesystem, options, device = args[0], args[1:-1], args[-1]
+    if filesystem not in MKFS_PROGRAMS:
+        raise ValueError(f"Système de fichiers non autorisé : {filesystem}")
+    if not MKFS_DEVICE_PATTERN.match(device):
+        raise ValueError(f"Périphérique non autorisé : {device}")
+
+    allowed = MKFS_OPTIONS[filesystem]
+    index = 0
+    while index < len(options):
+        option = options[index]
+        if option not in allowed:
+            raise ValueError(f"Option de mkfs non autorisée : {option}")
+        index += 2 if allowed[option] else 1
+    if index != len(options):
+        raise ValueError(f"Valeur manquante pour l'option {options[-1]}")
+
+    program = shutil.which(MKFS_PROGRAMS[filesystem], path=SYSTEM_PATH)
+    if program is None:
+        raise ValueError(f"{MKFS_PROGRAMS[filesystem]} introuvable")
+    return [program] + options + [device]
+
+# Préfixe des répertoires sans copie sur écriture (filesystem.nocow_staging_dir)
+NOCOW_STAGING_PREFIX = '.veracrypt-nocow-'
+
+# renameat2 : échoue avec EEXIST au lieu de remplacer la destination
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
+
+_libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+def _renameat2(source: str, destination: str):
+    """Renomme un fichier sans remplacer la destination (appel système renameat2).
+
+    Raises:
+        OSError: EEXIST si la destination existe, EINVAL ou ENOSYS si le
+            système ne gère pas RENAME_NOREPLACE
+    """
+    renameat2 = getattr(_libc, 'renameat2', None)
+    if renameat2 is None:
+        raise OSError(errno.ENOSYS, os.strerror(errno.ENOSYS))
+    if renameat2(AT_FDCWD, os.fsencode(source), AT_FDCWD, os.fsencode(destination), RENAME_NOREPLACE) != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error), destination)
+
+def rename_noreplace(args: List[str]):
+    """Place un conteneur créé dans un répertoire NOCOW à sa destination.
+
+    Le conteneur, créé par root, n'est lisible que par root : l'utilisateur
+    ne peut pas le lier lui-même (fs.protected_hardlinks).
+
+    Args:
+        args: [.../.veracrypt-nocow-XXXX/nom, .../nom]
+
+    Raises:
+        ValueError: Si les chemins ne désignent pas un conteneur en attente et sa destination
+        OSError: Si le renommage échoue (EEXIST : la destination existe)
+    """
+    if len(args) != 2 or not all(isinstance(arg, str) and os.path.isabs(arg) for arg in args):
+        raise ValueError("Arguments de rename invalides")
+    source, destination = (os.path.normpath(arg) for arg in args)
+    staging = os.path.dirname(source)
+    if (not os.path.basename(staging).startswith(NOCOW_STAGING_PREFIX)
+            or os.path.dirname(staging) != os.path.dirname(destination)
+            or os.path.basename(source) != os.path.basename(destination)):
+        raise ValueError(f"Renommage non autorisé : {source}")
+    # Ni le répertoire ni le conteneur ne peuvent être des liens symboliques
+    if not stat.S_ISDIR(os.lstat(staging).st_mode) or not stat.S_ISREG(os.lstat(source).st_mode):
+        raise ValueError(f"Renommage non autorisé : {source}")
+
+    try:
+        _renameat2(source, destination)
+    except OSError as e:
+        if e.errno not in (errno.EINVAL, errno.ENOSYS):
+            raise
+        # Sans RENAME_NOREPLACE : un lien échoue aussi si la destination existe
+        os.link(source, destination)
+        os.unlink(source)
+
+class RootHelper:
+    """Boucle de service de l'assistant privilégié."""
+
+    def __init__(self, veracrypt_path: str, rfile, wfile, owner: Optional[Tuple[int, int]] = None):
+        self.rfile = rfile
+        self.wfile = wfile
+        self._write_lock = threading.Lock()
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._cancelled = set()
+        self.veracrypt_path = veracrypt_path
+        # (uid, gid) de l'utilisateur qui a lancé l'assistant
+        self.owner = owner
+        # Verbe -> fonction qui valide les arguments et construit la commande
+        self.verbs = {
+            'veracrypt': self._veracrypt_command,
+            'mkfs': mkfs_command,
+        }
+        # Verbe -> opération exécutée directement par l'assistant
+        self.operations = {
+            'rename': rename_noreplace,
+            'chown': self._chown_container,
+        }
+
+    def _veracrypt_command(self, args: List[str]) -> List[str]:
+        """Construit une commande VeraCrypt après validation."""
+        check_veracrypt_args(args)
+        return [self.veracrypt_path] + args
+
+    def _chown_container(self, args: List[str]):
+        """Donne à l'utilisateur un conteneur créé par root dans un de ses répertoires.
+
+        Raises:
+            ValueError: Si le fichier n'est pas un conteneur de root à son seul nom,
+                dans un répertoire de l'utilisateur
+            OSError: Si le changement de propriétaire échoue
+        """
+        if self.owner is None:
+            raise ValueError("Utilisateur appelant inconnu (SUDO_UID absent)")
+        if len(args) != 1 or not isinstance(args[0], str) or not os.path.isabs(args[0]):
+            raise ValueError("Arguments de chown invalides")
+        path = os.path.normpath(args[0])
+        uid, gid = self.owner
+        if os.lstat(os.path.dirname(path)).st_uid != uid:
+            raise ValueError(f"{os.path.dirname(path)} n'appartient pas à l'utilisateur")
+
+        fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW | os.O_NONBLOCK)
+        try:
+            st = os.fstat(fd)
+            # Un second lien pourrait désigner un fichier système
+            if not stat.S_ISREG(st.st_mode) or st.st_uid != 0 or st.st_nlink != 1:
+                raise ValueError(f"Changement de propriétaire non autorisé : {path}")
+            os.fchown(fd, uid, gid)
+        finally:
+            os.close(fd)
+
+    def send(self, message: Dict):
+        """Envoie un message JSON sur une ligne."""
+        data = (json.dumps(message) + '\n').encode('utf-8')
+        with self._write_lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+    def handle(self, request: Dict):
+        """Exécute une requête et envoie la réponse."""
+        request_id = request.get('id')
+        response = {'id': request_id, 'returncode': -1, 'stdout': '', 'stderr': '', 'error': None}
+
+        try:
+            verb = request.get('verb')
+            if verb == 'ping':
+                response['returncode'] = 0
+                return
+            if verb in self.operations:
+                try:
+                    self.operations[verb](request.get('args') or [])
+                    response['returncode'] = 0
+                except OSError as e:
+                    response['returncode'] = e.errno or -1
+                    response['stderr'] = str(e)
+                return
+            if verb not in self.verbs:
+                raise ValueError(f"Verbe inconnu : {verb}")
+
+            command = self.verbs[verb](request.get('args') or [])
+
+            response.update(self._execute(
+                request_id,
+                command,
+                request.get('input'),
+                request.get('timeout'),
+                bool(request.get('stream'))
+            ))
+
+        except Exception as e:
+            response['error'] = 'rejected' if isinstance(e, ValueError) else 'failed'
+            response['stderr'] = str(e)
+        finally:
+            self.send(response)
+
+    def _execute(self, request_id, command: List[str], input_data: Optional[str],
+                 timeout: Optional[float], stream: bool) -> Dict:
+        """Lance une commande, relaie éventuellement sa sortie et attend sa fin."""
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if input_data is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            # Groupe de processus propre : un délai dépassé ou une annulation
+            # arrête aussi les processus fils (ex. service FUSE bloqué)
+            start_new_session=True
+        )
+        self._processes[request_id] = process
+        output = {'stdout': [], 'stderr': []}
+
+        def pump(name, pipe):
+            # Lecture en mode texte : '\r' termine aussi une ligne (progression)
+            for line in iter(pipe.readline, ''):
+                output[name].append(line)
+                if stream:
+                    self.send({'id': request_id, 'stream': name, 'data': line})
+            pipe.close()
+
+        pumps = [
+            threading.Thread(target=pump, args=('stdout', process.stdout), daemon=True),
+            threading.Thread(target=pump, args=('stderr', process.stderr), daemon=True)
+        ]
+        for thread in pumps:
+            thread.start()
+
+        if input_data is not None:
+            try:
+                process.stdin.write(input_data)
+                process.stdin.close()
+            except OSError:
+                pass
+
+        error = None
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._kill(process)
+            process.wait()
+            error = 'timeout'
+        finally:
+            self._processes.pop(request_id, None)
+
+        # Un processus fils détaché (ex. service FUSE) peut garder les tubes
+        # ouverts : ne pas attendre indéfiniment la fin de leur lecture
+        deadline = time.monotonic() + 5
+        for thread in pumps:
+            thread.join(timeout=max(0, deadline - time.monotonic()))
+
+        if request_id in self._cancelled:
+            self._cancelled.discard(request_id)
+            error = 'cancelled'
+
+        result = {
+            'returncode': process.returncode,
+            'stdout': ''.join(output['stdout']),
+            'stderr': ''.join(output['stderr']),
+            'error': error
+        }
+        if error == 'timeout':
+            result['stderr'] += "Délai d'exécution dépassé"
+        return result
+
+    @staticmethod
+    def _kill(process: subprocess.Popen):
+        """Tue une commande et tous les processus de son groupe."""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            process.kill()
+
+    def cancel(self, request_id):
+        """Interrompt la commande associée à une requête."""
+        process = self._processes.get(request_id)
+        if process is not None and process.poll() is None:
+            self._cancelled.add(request_id)
+            self._kill(process)
+
+    def serve(self):
+        """Traite les requêtes jusqu'à la fermeture du canal ou une demande d'arrêt."""
+        self.send({'ready': True, 'pid': os.getpid()})
+
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(request, dict):
+                continue
+            if request.get('verb') == 'shutdown':
+                break
+            if request.get('verb') == 'cancel':
+                self.cancel(request.get('target'))
+                continue
+
+            # Chaque requête dans son propre thread : les montages parallèles
+            # ne s'attendent pas les uns les autres
+            threading.Thread(target=self.handle, args=(request,), daemon=True).start()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Assistant privilégié VeraCrypt GUI")
+    parser.add_argument('--veracrypt', default='/usr/bin/veracrypt', help="Chemin de l'exécutable VeraCrypt")
+    options = parser.parse_args(argv)
+
+    if not os.path.isabs(options.veracrypt) or not os.access(options.veracrypt, os.X_OK):
+        print(f"Exécutable VeraCrypt invalide : {options.veracrypt}", file=sys.stderr)
+        return 1
+
+    os.umask(0o077)
+    os.chdir('/')
+
+    owner = None
+    if os.environ.get('SUDO_UID', '').isdigit() and os.environ.get('SUDO_GID', '').isdigit():
+        owner = (int(os.environ['SUDO_UID']), int(os.environ['SUDO_GID']))
+
+    RootHelper(options.veracrypt, sys.stdin.buffer, sys.stdout.buffer, owner).serve()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
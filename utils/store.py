@@ -0,0 +1,280 @@
+"""
+Stockage SQLite (WAL) des favoris, des préférences et de l'historique.
+
+Facultatif : il est activé par VERACRYPT_GUI_STORAGE=sqlite, puis reste
+actif tant que la base ~/.veracrypt/veracrypt.db existe
+(VERACRYPT_GUI_STORAGE=json revient aux fichiers JSON). À la première
+ouverture, favorites.json et preferences.json sont importés une fois puis
+renommés en *.migrated.
+
+En mode WAL, plusieurs instances de l'application lisent et écrivent la
+base en même temps : chaque modification ne touche que sa ligne, sans
+réécrire les données des autres. Les modifications faites par une autre
+connexion sont repérées par PRAGMA data_version (voir data_version()).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from .constants import Constants
+
+# Variable d'environnement qui choisit le stockage ('sqlite' ou 'json')
+STORAGE_ENV = 'VERACRYPT_GUI_STORAGE'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS favorites (
+    volume_path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    is_device INTEGER NOT NULL DEFAULT 0,
+    mount_point TEXT,
+    uuid TEXT,
+    password TEXT,
+    pim INTEGER,
+    last_mounted REAL
+);
+CREATE INDEX IF NOT EXISTS favorites_name ON favorites (name);
+CREATE INDEX IF NOT EXISTS favorites_uuid ON favorites (uuid);
+CREATE INDEX IF NOT EXISTS favorites_last_mounted ON favorites (last_mounted);
+CREATE TABLE IF NOT EXISTS favorite_tags (
+    volume_path TEXT NOT NULL REFERENCES favorites (volume_path) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (volume_path, tag)
+);
+CREATE INDEX IF NOT EXISTS favorite_tags_tag ON favorite_tags (tag);
+CREATE TABLE IF NOT EXISTS preferences (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    action TEXT NOT NULL,
+    volume_path TEXT,
+    mount_point TEXT,
+    success INTEGER NOT NULL,
+    duration REAL,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS history_volume ON history (volume_path, timestamp);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+"""
+
+# Colonnes d'un favori, dans l'ordre des requêtes
+FAVORITE_COLUMNS = ('volume_path', 'name', 'is_device', 'mount_point', 'uuid', 'password', 'pim', 'last_mounted')
+
+# Colonnes ajoutées après la création du schéma : table -> (colonne, type)
+ADDED_COLUMNS = {
+    'favorites': [('pim', 'INTEGER')]
+}
+
+class Store:
+    """Accès à la base SQLite, une connexion par thread."""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Store, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.db_file = os.path.expanduser('~/.veracrypt/veracrypt.db')
+            self.favorites_file = os.path.expanduser('~/.veracrypt/favorites.json')
+            self.preferences_file = os.path.expanduser('~/.veracrypt/preferences.json')
+            self._local = threading.local()
+
+    def enabled(self) -> bool:
+        """Indique si le stockage SQLite est choisi."""
+        choice = os.environ.get(STORAGE_ENV, '').lower()
+        if choice == 'json':
+            return False
+        return choice == 'sqlite' or os.path.exists(self.db_file)
+
+    def connection(self) -> sqlite3.Connection:
+        """Retourne la connexion du thread courant (ouverte et migrée si besoin)."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+            connection = sqlite3.connect(self.db_file, timeout=Constants.STORE_BUSY_TIMEOUT)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            # En WAL, NORMAL ne perd que les dernières transactions en cas de
+            # coupure de courant, sans jamais corrompre la base
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            connection.executescript(SCHEMA)
+            self._add_columns(connection)
+            os.chmod(self.db_file, 0o600)
+            self._migrate(connection)
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _add_columns(connection: sqlite3.Connection):
+        """Ajoute aux bases existantes les colonnes apparues depuis leur création."""
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row['name'] for row in connection.execute(f'PRAGMA table_info({table})')}
+            for column, column_type in columns:
+                if column not in existing:
+                    try:
+                        connection.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+                    except sqlite3.OperationalError:
+                        # Ajoutée entre-temps par une autre instance
+                        pass
+
+    def _migrate(self, connection: sqlite3.Connection):
+        """Importe une fois les fichiers JSON existants.
+
+        La transaction est prise en écriture dès le début : deux instances
+        qui démarrent ensemble n'importent pas deux fois.
+        """
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            done = connection.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+            if done is None:
+                migrated = [self._migrate_favorites(connection), self._migrate_preferences(connection)]
+                connection.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (str(time.time()),))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        if done is None:
+            for path in migrated:
+                if path:
+                    try:
+                        os.replace(path, path + '.migrated')
+                    except OSError as e:
+                        print(f"Impossible de renommer {path} : {e}")
+
+    def _migrate_favorites(self, connection: sqlite3.Connection) -> Optional[str]:
+        """Importe favorites.json ; retourne le fichier importé."""
+        # Import local : favorites dépend de ce module
+        from .favorites import Favorites
+        entries = self._read_json(self.favorites_file)
+        if not isinstance(entries, list):
+            return None
+        # Une entrée mal formée ne doit pas faire échouer toute la migration
+        for favorite in Favorites._valid_entries(entries):
+            try:
+                connection.execute(
+                    'INSERT OR IGNORE INTO favorites (volume_path, name, is_device, mount_point, uuid, password, pim, last_mounted) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (favorite['volume_path'], favorite['name'], int(bool(favorite.get('is_device'))),
+                     favorite.get('mount_point'), favorite.get('uuid'), favorite.get('password'),
+                     favorite.get('pim'), favorite.get('last_mounted'))
+                )
+                tags = favorite.get('tags')
+                for tag in tags if isinstance(tags, list) else []:
+                    connection.execute('INSERT OR IGNORE INTO favorite_tags (volume_path, tag) VALUES (?, ?)',
+                                       (favorite['volume_path'], tag))
+            except sqlite3.Error as e:
+                # Valeur d'un type inattendu : seule cette requête est annulée
+                print(f"Favori ignoré à la migration ({favorite.get('volume_path')}) : {e}")
+        return self.favorites_file
+
+    def _migrate_preferences(self, connection: sqlite3.Connection) -> Optional[str]:
+        """Importe preferences.json ; retourne le fichier importé."""
+        values = self._read_json(self.preferences_file)
+        if not isinstance(values, dict):
+            return None
+        for key, value in values.items():
+            connection.execute('INSERT OR IGNORE INTO preferences (key, value) VALUES (?, ?)',
+                               (key, json.dumps(value)))
+        return self.preferences_file
+
+    @staticmethod
+    def _read_json(path: str) -> Any:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def watched_files(self) -> List[str]:
+        """Fichiers modifiés par une écriture dans la base (base et journal WAL)."""
+        return [self.db_file, self.db_file + '-wal']
+
+    def data_version(self) -> int:
+        """Version des données vue par la connexion du thread courant.
+
+        La valeur change quand une autre connexion (autre instance, script ou
+        autre thread) a validé une modification ; les écritures de la
+        connexion elle-même ne la changent pas. Elle n'est comparable qu'entre
+        deux appels depuis le même thread.
+        """
+        return self.connection().execute('PRAGMA data_version').fetchone()[0]
+
+    def execute(self, sql: str, parameters=()) -> sqlite3.Cursor:
+        """Exécute une requête dans sa propre transaction."""
+        connection = self.connection()
+        with connection:
+            return connection.execute(sql, parameters)
+
+    def query(self, sql: str, parameters=()) -> List[sqlite3.Row]:
+        """Exécute une requête de lecture."""
+        return self.connection().execute(sql, parameters).fetchall()
+
+    # Préférences
+
+    def get_preferences(self) -> Dict[str, Any]:
+        """Retourne toutes les préférences enregistrées."""
+        return {row['key']: json.loads(row['value']) for row in self.query('SELECT key, value FROM preferences')}
+
+    def set_preference(self, key: str, value: Any):
+        """Enregistre une préférence (seule sa ligne est écrite)."""
+        self.set_preferences({key: value})
+
+    def set_preferences(self, values: Dict[str, Any]):
+        """Enregistre plusieurs préférences dans une même transaction."""
+        connection = self.connection()
+        with connection:
+            connection.executemany('INSERT INTO preferences (key, value) VALUES (?, ?) '
+                                   'ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+                                   [(key, json.dumps(value)) for key, value in values.items()])
+
+    # Historique
+
+    def record_event(self, action: str, volume_path: Optional[str] = None,
+                     mount_point: Optional[str] = None, success: bool = True,
+                     duration: Optional[float] = None, message: str = ''):
+        """Ajoute une entrée à l'historique d'utilisation (montage, démontage...).
+
+        Sans effet si le stockage SQLite n'est pas choisi.
+        """
+        if not self.enabled():
+            return
+        now = time.time()
+        try:
+            connection = self.connection()
+            with connection:
+                connection.execute(
+                    'INSERT INTO history (timestamp, action, volume_path, mount_point, success, duration, message) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (now, action, volume_path, mount_point, int(success), duration, message)
+                )
+                if action == 'mount' and success and volume_path:
+                    connection.execute('UPDATE favorites SET last_mounted = ? WHERE volume_path = ?',
+                                       (now, volume_path))
+        except sqlite3.Error as e:
+            print(f"Erreur lors de l'enregistrement de l'historique : {e}")
+
+    def history(self, volume_path: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Retourne les dernières entrées de l'historique, les plus récentes d'abord."""
+        if volume_path is None:
+            rows = self.query('SELECT * FROM history ORDER BY timestamp DESC LIMIT ?', (limit,))
+        else:
+            rows = self.query('SELECT * FROM history WHERE volume_path = ? ORDER BY timestamp DESC LIMIT ?',
+                              (volume_path, limit))
+        return [dict(row) for row in rows]
+
+# Instance globale
+store = Store()
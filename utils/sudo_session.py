@@ -7,8 +7,10 @@ import time
 import threading
 import logging
 import os
-from typing import Optional
+from typing import Callable, Optional
+from PyQt6.QtCore import QCoreApplication, QThread
 from PyQt6.QtWidgets import QInputDialog, QLineEdit
+from .constants import Constants
 
 # Configuration du logging
 logging.basicConfig(
@@ -21,6 +23,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger('veracrypt.sudo_session')
 
+def _on_gui_thread() -> bool:
+    """Indique si l'appelant est le thread de l'interface Qt."""
+    app = QCoreApplication.instance()
+    return app is not None and QThread.currentThread() == app.thread()
+
 class SudoSession:
     _instance = None
     _sudo_timestamp = 0
@@ -37,23 +44,43 @@ class SudoSession:
         if not hasattr(self, 'initialized'):
             self.initialized = True
             self._sudo_timestamp = 0
+            # Incrémenté à chaque ouverture de session : les clés dérivées du
+            # mot de passe sudo sont liées à une génération
+            self.generation = 0
+            # Fonctions appelées quand un thread de travail a besoin d'une
+            # authentification que seule l'interface peut demander
+            self._authentication_listeners = []
             
-    def initialize_session(self) -> bool:
+    def initialize_session(self, password: Optional[str] = None) -> bool:
         """Initialise la session sudo en demandant le mot de passe.
         
+        Args:
+            password: Mot de passe déjà saisi (mode ligne de commande) ;
+                s'il est absent, il est demandé par une boîte de dialogue
+                (thread de l'interface seulement : ailleurs, l'interface est
+                prévenue et l'appel échoue)
+        
         Returns:
             bool: True si la session est initialisée avec succès
         """
         try:
-            # Demander le mot de passe sudo via une boîte de dialogue
-            password, ok = QInputDialog.getText(
-                None,
-                "Authentification sudo",
-                "Entrez votre mot de passe sudo :",
-                QLineEdit.EchoMode.Password
-            )
-            
-            if not ok or not password:
+            if password is None and not _on_gui_thread():
+                self._request_authentication()
+                return False
+                
+            if password is None:
+                # Demander le mot de passe sudo via une boîte de dialogue
+                password, ok = QInputDialog.getText(
+                    None,
+                    "Authentification sudo",
+                    "Entrez votre mot de passe sudo :",
+                    QLineEdit.EchoMode.Password
+                )
+                
+                if not ok:
+                    return False
+                    
+            if not password:
                 return False
                 
             logger.debug("Tentative d'initialisation de la session sudo")
@@ -63,12 +90,14 @@ class SudoSession:
                 ['sudo', '-S', '-v'],
                 input=password + '\n',
                 capture_output=True,
-                text=True
+                text=True,
+                timeout=Constants.SUDO_TIMEOUT
             )
             
             if process.returncode == 0:
                 self._sudo_timestamp = time.time()
                 self._sudo_password = password
+                self.generation += 1
                 # Démarrer le thread de rafraîchissement
                 self._start_refresh_thread()
                 logger.info("Session sudo initialisée avec succès")
@@ -81,63 +110,65 @@ class SudoSession:
             logger.exception("Erreur lors de l'initialisation de la session sudo")
             return False
             
+    def is_active(self) -> bool:
+        """Indique si la session sudo est ouverte et n'a pas expiré."""
+        return self._sudo_password is not None and time.time() - self._sudo_timestamp <= 300
+        
     def get_sudo_password(self) -> Optional[str]:
         """Retourne le mot de passe sudo.
         
+        Une session expirée (ex. après une mise en veille) est d'abord
+        revalidée sans interaction avec le mot de passe connu. Le mot de passe
+        n'est redemandé que depuis le thread de l'interface : depuis un autre
+        thread, l'interface est prévenue et None est retourné.
+        
         Returns:
             Le mot de passe sudo ou None si pas disponible
         """
         if self._sudo_password is None or time.time() - self._sudo_timestamp > 300:
-            if not self.initialize_session():
+            if not self._revalidate() and not self.initialize_session():
                 return None
         return self._sudo_password
         
-    def run_with_sudo(self, command: list, stdin: bytes = None) -> tuple[bool, str, str]:
-        """Exécute une commande avec sudo.
-        
-        Args:
-            command: La commande à exécuter
-            stdin: Données à envoyer sur l'entrée standard
-            
-        Returns:
-            Tuple contenant:
-            - Un booléen indiquant si la commande a réussi
-            - La sortie standard
-            - La sortie d'erreur
-        """
+    def _revalidate(self) -> bool:
+        """Renouvelle la session avec le mot de passe connu, sans interaction."""
+        if self._sudo_password is None:
+            return False
         try:
-            # Vérifier si la session est active
-            if time.time() - self._sudo_timestamp > 300:  # 5 minutes
-                if not self.initialize_session():
-                    return False, '', 'Session sudo expirée'
-                    
-            # Construire l'entrée standard
-            input_data = self._sudo_password + '\n'
-            if stdin:
-                input_data += stdin.decode('utf-8')
-                
-            logger.debug(f"Exécution de la commande sudo : {' '.join(command)}")
-            logger.debug(f"Données stdin (longueur) : {len(input_data)} caractères")
-            
-            # Exécuter la commande avec sudo
             process = subprocess.run(
-                ['sudo', '-S'] + command,
-                input=input_data,
+                ['sudo', '-S', '-v'],
+                input=self._sudo_password + '\n',
                 capture_output=True,
-                text=True
+                text=True,
+                timeout=Constants.SUDO_TIMEOUT
             )
-            
-            if process.returncode == 0:
-                logger.debug("Commande exécutée avec succès")
-            else:
-                logger.error(f"Échec de la commande : {process.stderr}")
-                
-            return process.returncode == 0, process.stdout, process.stderr
-            
-        except Exception as e:
-            logger.exception("Erreur lors de l'exécution de la commande sudo")
-            return False, '', str(e)
-            
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.error(f"Impossible de renouveler la session sudo : {e}")
+            return False
+        if process.returncode != 0:
+            logger.error(f"Échec du renouvellement de la session sudo : {process.stderr}")
+            return False
+        self._sudo_timestamp = time.time()
+        logger.debug("Session sudo renouvelée")
+        return True
+        
+    def add_authentication_listener(self, callback: Callable[[], None]):
+        """Enregistre une fonction appelée quand le mot de passe doit être redemandé.
+        
+        La fonction est appelée depuis un thread de travail : les composants
+        Qt doivent relayer l'appel par un signal.
+        """
+        self._authentication_listeners.append(callback)
+        
+    def _request_authentication(self):
+        """Prévient l'interface qu'un thread de travail attend une authentification."""
+        logger.warning("Session sudo expirée : authentification demandée à l'interface")
+        for callback in list(self._authentication_listeners):
+            try:
+                callback()
+            except Exception:
+                logger.exception("Erreur dans un abonné de la session sudo")
+        
     def _refresh_sudo(self):
         """Rafraîchit la session sudo en arrière-plan."""
         while not self._stop_refresh:
@@ -147,9 +178,10 @@ class SudoSession:
                     logger.debug("Rafraîchissement de la session sudo")
                     process = subprocess.run(
                         ['sudo', '-S', '-v'],
-                        input=(self._sudo_password + '\n').encode(),
+                        input=self._sudo_password + '\n',
                         capture_output=True,
-                        text=True
+                        text=True,
+                        timeout=Constants.SUDO_TIMEOUT
                     )
                     if process.returncode == 0:
                         self._sudo_timestamp = time.time()
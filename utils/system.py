@@ -3,11 +3,17 @@ Utilitaires système pour la gestion des fichiers et périphériques.
 """
 
 import os
+import re
+import errno
 import subprocess
 import stat
-from typing import List, Tuple, Optional
+import time
+from typing import List, Set, Tuple, Optional
 from utils.constants import Constants  # Importation correcte de Constants
 
+# Le noyau échappe espace, tabulation, retour à la ligne et antislash en octal
+_MOUNT_ESCAPE = re.compile(r'\\([0-7]{3})')
+
 def _is_valid_device(path: str) -> bool:
     """Vérifie si un périphérique est valide."""
     try:
@@ -111,6 +117,145 @@ def cleanup_mount_point(mount_point: str) -> Tuple[bool, str]:
     except Exception as e:
         return False, str(e)
 
+class CleanupReport:
+    """Résultat d'un nettoyage de points de montage."""
+    
+    def __init__(self):
+        self.cleaned: List[str] = []
+        self.skipped: List[str] = []
+        self.errors: List[Tuple[str, str]] = []
+        self.scanned = 0
+        self.elapsed = 0.0
+        
+    def summary(self) -> str:
+        """Retourne un résumé lisible du nettoyage."""
+        return (f"{len(self.cleaned)} supprimé(s), {len(self.skipped)} ignoré(s), "
+                f"{len(self.errors)} erreur(s) sur {self.scanned} répertoire(s) "
+                f"en {self.elapsed * 1000:.1f} ms")
+
+def _unescape_mount_field(field: str) -> str:
+    """Décode les séquences octales de /proc/mounts (\\040 pour l'espace...)."""
+    return _MOUNT_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+def read_proc_mounts() -> Set[str]:
+    """Retourne l'ensemble des points de montage actifs.
+    
+    Returns:
+        Ensemble des points de montage lus dans /proc/mounts
+        
+    Raises:
+        OSError: Si /proc/mounts ne peut pas être lu
+    """
+    mounted = set()
+    with open('/proc/mounts', 'r') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 2:
+                mounted.add(os.path.normpath(_unescape_mount_field(fields[1])))
+    return mounted
+
+def find_busy_processes(mount_point: str) -> List[Tuple[int, str]]:
+    """Liste les processus qui utilisent un point de montage.
+    
+    Parcourt /proc/<pid>/cwd, /proc/<pid>/root et les descripteurs de
+    /proc/<pid>/fd. Sans droits root, seuls les processus de l'utilisateur
+    sont visibles, ce qui couvre le cas courant (terminal ou gestionnaire
+    de fichiers ouvert dans le volume).
+    
+    Args:
+        mount_point: Point de montage à examiner
+        
+    Returns:
+        Liste de tuples (pid, nom du processus)
+    """
+    mount_point = os.path.normpath(mount_point)
+    inside = mount_point.rstrip('/') + '/'
+    
+    def uses(link: str) -> bool:
+        try:
+            target = os.readlink(link)
+        except OSError:
+            return False
+        return target == mount_point or target.startswith(inside)
+        
+    busy = []
+    try:
+        entries = list(os.scandir('/proc'))
+    except OSError:
+        return busy
+        
+    for entry in entries:
+        if not entry.name.isdigit():
+            continue
+        pid = int(entry.name)
+        if pid == os.getpid():
+            continue
+            
+        found = uses(f'{entry.path}/cwd') or uses(f'{entry.path}/root')
+        if not found:
+            try:
+                with os.scandir(f'{entry.path}/fd') as fds:
+                    found = any(uses(fd.path) for fd in fds)
+            except OSError:
+                continue
+                
+        if found:
+            try:
+                with open(f'{entry.path}/comm', 'r') as f:
+                    name = f.read().strip()
+            except OSError:
+                name = '?'
+            busy.append((pid, name))
+            
+    return busy
+
+def remove_empty_mount_dirs(base_dir: str, mounted: Set[str], prefix: str = '') -> CleanupReport:
+    """Supprime en une passe les répertoires vides et non montés d'un dossier.
+    
+    Args:
+        base_dir: Répertoire contenant les points de montage
+        mounted: Ensemble des points de montage actifs (chemins normalisés)
+        prefix: Ne traiter que les répertoires dont le nom commence par ce préfixe
+        
+    Returns:
+        Rapport du nettoyage
+    """
+    report = CleanupReport()
+    start = time.perf_counter()
+    
+    try:
+        with os.scandir(base_dir) as entries:
+            for entry in entries:
+                if prefix and not entry.name.startswith(prefix):
+                    continue
+                try:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                except OSError:
+                    continue
+                    
+                report.scanned += 1
+                path = os.path.normpath(entry.path)
+                if path in mounted:
+                    report.skipped.append(path)
+                    continue
+                    
+                # rmdir échoue de lui-même si le répertoire n'est pas vide :
+                # inutile de le lister au préalable
+                try:
+                    os.rmdir(path)
+                    report.cleaned.append(path)
+                except OSError as e:
+                    if e.errno in (errno.ENOTEMPTY, errno.EEXIST, errno.EBUSY):
+                        report.skipped.append(path)
+                    else:
+                        report.errors.append((path, str(e)))
+    except OSError as e:
+        report.errors.append((base_dir, str(e)))
+        
+    report.elapsed = time.perf_counter() - start
+    return report
+
 def cleanup_mount_points() -> Tuple[bool, str]:
     """Nettoie les points de montage non utilisés.
     
@@ -125,34 +270,18 @@ def cleanup_mount_points() -> Tuple[bool, str]:
             return True, "Aucun point de montage à nettoyer"
             
         # Lister les points de montage existants
-        mounted = []
         try:
-            with open('/proc/mounts', 'r') as f:
-                for line in f:
-                    if base_mount_dir in line:
-                        mounted.append(line.split()[1])
+            mounted = read_proc_mounts()
         except Exception as e:
             return False, f"Erreur lors de la lecture de /proc/mounts: {str(e)}"
         
-        # Parcourir les répertoires dans le dossier de montage
-        cleaned = []
-        for dir_name in os.listdir(base_mount_dir):
-            dir_path = os.path.join(base_mount_dir, dir_name)
-            
-            # Vérifier si c'est un répertoire et s'il n'est pas monté
-            if os.path.isdir(dir_path) and dir_path not in mounted:
-                try:
-                    # Vérifier si le répertoire est vide
-                    if not os.listdir(dir_path):
-                        os.rmdir(dir_path)
-                        cleaned.append(dir_path)
-                    else:
-                        print(f"Répertoire non vide, ignoré: {dir_path}")
-                except Exception as e:
-                    print(f"Erreur lors de la suppression de {dir_path}: {str(e)}")
+        report = remove_empty_mount_dirs(base_mount_dir, mounted)
+        print(f"Nettoyage de {base_mount_dir} : {report.summary()}")
+        for dir_path, error in report.errors:
+            print(f"Erreur lors de la suppression de {dir_path}: {error}")
         
-        if cleaned:
-            return True, f"Points de montage nettoyés: {', '.join(cleaned)}"
+        if report.cleaned:
+            return True, f"Points de montage nettoyés: {', '.join(report.cleaned)}"
         return True, "Aucun point de montage à nettoyer"
         
     except Exception as e:
@@ -2,12 +2,15 @@
 Utilitaires pour interagir avec VeraCrypt en ligne de commande.
 """
 
+import asyncio
 import os
 import subprocess
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from . import system
 import time
-from .sudo_session import sudo_session
+from .command_engine import command_engine, execute_sync, run_privileged, timeout_for
+from .mount_table import mount_table, MountedVolume, MountSnapshot, parse_volume_list
+from .pim_calibration import mount_timeout
 import datetime
 
 def get_user_mount_dir() -> str:
@@ -44,16 +47,21 @@ def check_mount_point(mount_point: str) -> Tuple[bool, str]:
             
     return True, ""
 
-def generate_mount_point() -> str:
-    """Génère un point de montage unique dans le répertoire utilisateur."""
+def generate_mount_point(reserved: Optional[Set[str]] = None) -> str:
+    """Génère un point de montage unique dans le répertoire utilisateur.
+    
+    Args:
+        reserved: Points de montage déjà attribués mais pas encore créés
+    """
     # Utiliser un timestamp pour le nom du répertoire
     mount_dir = get_user_mount_dir()
     timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
     mount_point = os.path.join(mount_dir, f"veracrypt_{timestamp}")
+    reserved = reserved or set()
     
     # S'assurer que le point de montage n'existe pas déjà
     counter = 0
-    while os.path.exists(mount_point):
+    while os.path.exists(mount_point) or mount_point in reserved:
         counter += 1
         mount_point = os.path.join(mount_dir, f"veracrypt_{timestamp}_{counter}")
         
@@ -64,7 +72,7 @@ def run_veracrypt_command(command: list, need_admin: bool = False) -> Tuple[bool
     
     Args:
         command: Liste contenant la commande et ses arguments
-        need_admin: Si True, exécute la commande avec sudo
+        need_admin: Si True, exécute la commande via l'assistant privilégié
         
     Returns:
         Tuple contenant:
@@ -73,82 +81,76 @@ def run_veracrypt_command(command: list, need_admin: bool = False) -> Tuple[bool
         - La sortie d'erreur
     """
     try:
-        if need_admin:
-            success, stdout, stderr = sudo_session.run_with_sudo(command)
-        else:
-            process = subprocess.run(
-                command,
-                capture_output=True,
-                text=True
-            )
-            success = process.returncode == 0
-            stdout = process.stdout
-            stderr = process.stderr
-            
-        return success, stdout, stderr
+        # Délai propre à l'action VeraCrypt : une commande bloquée ne fige plus l'application
+        return execute_sync(command, privileged=need_admin).as_tuple()
         
     except Exception as e:
         return False, '', str(e)
 
-def list_mounted_volumes() -> List[Tuple[str, str]]:
+def list_mounted_volumes() -> List[MountedVolume]:
     """Liste les volumes VeraCrypt montés.
     
+    La liste provient de la table des montages partagée, qui ne relance
+    VeraCrypt que lorsque les montages du système ont changé.
+    
     Returns:
-        Liste de tuples contenant:
-        - Le numéro de slot
-        - Le point de montage
+        Liste des volumes montés
+    """
+    return mount_table.volumes()
+
+def get_mount_snapshot() -> MountSnapshot:
+    """Retourne l'instantané des volumes montés avec ses index.
+    
+    Returns:
+        Instantané indexé par slot, point de montage et conteneur
+    """
+    return mount_table.snapshot()
+
+def query_mounted_volumes() -> List[MountedVolume]:
+    """Interroge VeraCrypt sur les volumes montés.
+    
+    Returns:
+        Liste des volumes montés, analysée depuis la sortie détaillée
     """
     try:
         command = [
             system.Constants.VERACRYPT_PATH,
             '--text',
             '--non-interactive',
-            '--list'
+            '--list',
+            '--verbose'
         ]
         
         print(f"Exécution de la commande: {' '.join(command)}")
         
-        # La liste des volumes ne nécessite pas sudo
+        # La liste des volumes ne nécessite pas sudo ; appelée aussi depuis
+        # les threads de la table des montages, d'où un appel direct borné
         process = subprocess.run(
             command,
             capture_output=True,
-            text=True
+            text=True,
+            timeout=timeout_for(command)
         )
         
         stdout = process.stdout
         stderr = process.stderr
         
-        print(f"Sortie standard:\n{stdout}")
-        print(f"Sortie d'erreur:\n{stderr}")
-        
         # "No volumes mounted" est une sortie normale quand aucun volume n'est monté
         if "No volumes mounted" in stderr:
             print("Aucun volume monté")
             return []
             
-        if process.returncode != 0 and stderr and "No volumes mounted" not in stderr:
+        if process.returncode != 0 and stderr:
             print(f"Erreur lors de la liste des volumes: {stderr}")
             return []
             
-        volumes = []
-        for line in stdout.splitlines():
-            print(f"Analyse de la ligne: {line}")
-            if not line.strip():
-                continue
-                
-            # Format: "1: /dev/sdc2 /dev/loop32 /media/jayces/veracrypt_20241226_205820"
-            parts = line.strip().split()
-            if len(parts) >= 2 and parts[0].endswith(':'):
-                slot = parts[0].rstrip(':')  # Extraire le numéro de slot
-                mount_point = parts[-1] if len(parts) >= 4 else ""  # Le point de montage est le dernier élément
-                device = parts[1]  # Le périphérique est le deuxième élément
-                if mount_point:
-                    print(f"Volume trouvé - slot: {slot}, device: {device}, mount_point: {mount_point}")
-                    volumes.append((slot, mount_point))
-                    
+        volumes = parse_volume_list(stdout)
         print(f"Volumes trouvés: {volumes}")
         return volumes
         
+    except subprocess.TimeoutExpired:
+        print("Délai dépassé lors de la liste des volumes")
+        return []
     except Exception as e:
         print(f"Erreur lors de la liste des volumes: {str(e)}")
         return []
@@ -160,13 +162,9 @@ def check_mount_points() -> List[Tuple[str, str]]:
         Liste de tuples (point de montage, erreur)
     """
     issues = []
-    mounted_volumes = list_mounted_volumes()
-    
-    # Récupérer tous les points de montage
-    mount_points = [mount_point for _, mount_point in mounted_volumes]
     
     # Vérifier chaque point de montage
-    for _, mount_point in mounted_volumes:
+    for mount_point in get_mount_snapshot().by_mount_point:
         # Vérifier si le point de montage existe
         if not os.path.exists(mount_point):
             issues.append((mount_point, "Le point de montage n'existe pas"))
@@ -183,33 +181,83 @@ def check_mount_points() -> List[Tuple[str, str]]:
 def clean_empty_mount_points() -> List[str]:
     """Nettoie les points de montage vides.
     
+    Un seul instantané des montages est pris, puis le répertoire personnel
+    est parcouru une seule fois.
+    
     Returns:
         Liste des points de montage nettoyés
     """
-    cleaned = []
-    user_dir = get_user_mount_dir()
+    mounted = set(get_mount_snapshot().by_mount_point)
+    try:
+        mounted |= system.read_proc_mounts()
+    except OSError as e:
+        print(f"Impossible de lire /proc/mounts: {e}")
+        
+    report = system.remove_empty_mount_dirs(
+        get_user_mount_dir(),
+        mounted,
+        prefix=system.Constants.MOUNT_PREFIX
+    )
     
-    # Parcourir les répertoires de montage
-    for item in os.listdir(user_dir):
-        mount_point = os.path.join(user_dir, item)
-        if os.path.isdir(mount_point) and item.startswith("veracrypt_"):
-            try:
-                # Vérifier si le répertoire est vide et n'est pas monté
-                if not os.listdir(mount_point) and not any(mp == mount_point for _, mp in list_mounted_volumes()):
-                    os.rmdir(mount_point)
-                    cleaned.append(mount_point)
-            except Exception as e:
-                print(f"Erreur lors du nettoyage de {mount_point}: {e}")
+    print(f"Nettoyage des points de montage : {report.summary()}")
+    for mount_point, error in report.errors:
+        print(f"Erreur lors du nettoyage de {mount_point}: {error}")
                 
-    return cleaned
+    return report.cleaned
 
-def mount_volume(volume_path: str, mount_point: str, password: str) -> Tuple[bool, str]:
-    """Monte un volume VeraCrypt.
+def check_not_mounted(volume_path: str, mount_point: str, snapshot: MountSnapshot = None) -> Tuple[bool, str]:
+    """Vérifie qu'un volume et un point de montage ne sont pas déjà utilisés.
+    
+    La recherche se fait dans les index de l'instantané : par inode pour un
+    conteneur fichier, par numéro de périphérique pour un périphérique bloc
+    et par chemin ou inode pour le point de montage.
+    
+    Args:
+        volume_path: Chemin vers le volume à monter
+        mount_point: Point de montage envisagé
+        snapshot: Instantané à utiliser (par défaut, celui de la table des montages)
+        
+    Returns:
+        Tuple contenant:
+        - Un booléen indiquant si le montage est possible
+        - Un message d'erreur sinon
+    """
+    if snapshot is None:
+        snapshot = get_mount_snapshot()
+        
+    existing = snapshot.find_by_container(volume_path)
+    if existing is not None:
+        return False, f"Le volume {volume_path} est déjà monté sur {existing.mount_point or existing.virtual_device}"
+        
+    if snapshot.find_by_mount_point(mount_point) is not None:
+        return False, f"Le point de montage {mount_point} est déjà utilisé"
+        
+    return True, ""
+
+def _remove_empty_dir(path: str):
+    """Supprime un répertoire de montage s'il est vide."""
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
+
+async def mount_volume_async(volume_path: str, mount_point: str, password: str,
+                             slot: Optional[int] = None,
+                             snapshot: Optional[MountSnapshot] = None,
+                             pim: Optional[int] = None) -> Tuple[bool, str]:
+    """Monte un volume VeraCrypt, sans bloquer la boucle du moteur de commandes.
+    
+    Le montage est interrompu au-delà du délai configuré pour --mount,
+    allongé du temps de déverrouillage estimé d'un PIM élevé ;
+    l'annulation de la tâche interrompt aussi la commande.
     
     Args:
         volume_path: Chemin vers le volume à monter
         mount_point: Point de montage
         password: Mot de passe du volume
+        slot: Slot VeraCrypt à utiliser (par défaut, le premier libre)
+        snapshot: Instantané des montages déjà pris par l'appelant
+        pim: PIM du volume (par défaut, celui de VeraCrypt)
         
     Returns:
         Tuple contenant:
@@ -223,27 +271,20 @@ def mount_volume(volume_path: str, mount_point: str, password: str) -> Tuple[boo
         if not os.path.exists(volume_path):
             return False, f"Le volume {volume_path} n'existe pas"
             
+        # Vérifier que ni le volume ni le point de montage ne sont déjà utilisés,
+        # avant que check_mount_point ne crée le répertoire ; l'instantané
+        # peut relancer VeraCrypt, il est donc pris hors de la boucle
+        if snapshot is None:
+            snapshot = await asyncio.get_running_loop().run_in_executor(None, get_mount_snapshot)
+        valid, error = check_not_mounted(volume_path, mount_point, snapshot)
+        if not valid:
+            return False, error
+            
         # Vérifier le point de montage
         valid, error = check_mount_point(mount_point)
         if not valid:
             return False, error
             
-        # Vérifier si le volume est déjà monté
-        mounted_volumes = list_mounted_volumes()
-        for _, existing_mount in mounted_volumes:
-            if os.path.exists(existing_mount):
-                try:
-                    # Vérifier si le volume est déjà monté quelque part
-                    if os.path.samefile(volume_path, existing_mount):
-                        return False, f"Le volume {volume_path} est déjà monté sur {existing_mount}"
-                except OSError:
-                    # Ignorer les erreurs de comparaison de fichiers
-                    pass
-                    
-            # Vérifier si le point de montage est déjà utilisé
-            if os.path.exists(mount_point) and os.path.samefile(existing_mount, mount_point):
-                return False, f"Le point de montage {mount_point} est déjà utilisé"
-            
         # Monter le volume
         command = [
             system.Constants.VERACRYPT_PATH,
@@ -255,28 +296,39 @@ def mount_volume(volume_path: str, mount_point: str, password: str) -> Tuple[boo
             '--password', password,  # Mot de passe
             '--verbose'  # Plus de détails dans la sortie
         ]
+        if slot is not None:
+            command.append(f'--slot={slot}')
+        if pim is not None:
+            command.append(f'--pim={pim}')
+        timeout = mount_timeout(pim)
         
-        print(f"Exécution de la commande: {' '.join(command)}")
+        # Ne jamais afficher le mot de passe
+        shown = ['***' if i and command[i - 1] == '--password' else arg for i, arg in enumerate(command)]
+        print(f"Exécution de la commande: {' '.join(shown)}")
         
-        # Le montage nécessite sudo
-        success, stdout, stderr = sudo_session.run_with_sudo(command)
+        # Le montage nécessite les droits root : passer par l'assistant privilégié
+        try:
+            result = await run_privileged(command, timeout=timeout)
+        except asyncio.CancelledError:
+            _remove_empty_dir(mount_point)
+            raise
         
-        print(f"Sortie standard du montage:\n{stdout}")
-        print(f"Sortie d'erreur du montage:\n{stderr}")
+        print(f"Sortie standard du montage:\n{result.stdout}")
+        print(f"Sortie d'erreur du montage:\n{result.stderr}")
         
-        if success:
+        if result.success:
             print("Montage réussi")
+            mount_table.invalidate()
             return True, ''
         else:
             # Nettoyer le point de montage en cas d'erreur
-            try:
-                if os.path.exists(mount_point) and not os.listdir(mount_point):
-                    os.rmdir(mount_point)
-            except:
-                pass
+            _remove_empty_dir(mount_point)
+            
+            if result.timed_out:
+                return False, f"Le montage a dépassé le délai de {timeout:.0f} s"
                 
             # Extraire le message d'erreur pertinent
-            error_msg = stderr.strip()
+            error_msg = result.stderr.strip()
             if "already mounted" in error_msg.lower():
                 return False, "Le volume est déjà monté"
             elif "incorrect password" in error_msg.lower():
@@ -288,11 +340,117 @@ def mount_volume(volume_path: str, mount_point: str, password: str) -> Tuple[boo
         print(f"Exception lors du montage: {str(e)}")
         return False, str(e)
 
-def unmount_volume(mount_point: str) -> Tuple[bool, str]:
-    """Démonte un volume VeraCrypt.
+def mount_volume(volume_path: str, mount_point: str, password: str,
+                 pim: Optional[int] = None) -> Tuple[bool, str]:
+    """Monte un volume VeraCrypt (version bloquante de mount_volume_async).
+    
+    Args:
+        volume_path: Chemin vers le volume à monter
+        mount_point: Point de montage
+        password: Mot de passe du volume
+        pim: PIM du volume (par défaut, celui de VeraCrypt)
+        
+    Returns:
+        Tuple contenant:
+        - Un booléen indiquant si le montage a réussi
+        - Un message d'erreur si le montage a échoué
+    """
+    return command_engine.run(mount_volume_async(volume_path, mount_point, password, pim=pim))
+
+class MountSpec:
+    """Volume à monter dans un montage groupé."""
+    __slots__ = ('volume_path', 'mount_point', 'password', 'pim')
+    
+    def __init__(self, volume_path: str, password: str, mount_point: Optional[str] = None,
+                 pim: Optional[int] = None):
+        self.volume_path = volume_path
+        self.password = password
+        # None : un point de montage est généré au moment du montage
+        self.mount_point = mount_point
+        # None : PIM par défaut de VeraCrypt
+        self.pim = pim
+        
+    def __repr__(self) -> str:
+        # Ne jamais afficher le mot de passe
+        return f"MountSpec(volume_path={self.volume_path!r}, mount_point={self.mount_point!r})"
+
+async def mount_many_async(specs: Iterable[MountSpec],
+                           max_parallel: Optional[int] = None) -> Dict[str, Tuple[bool, str]]:
+    """Monte plusieurs volumes en parallèle.
+    
+    Chaque volume reçoit d'avance un slot libre distinct : les invocations
+    concurrentes de VeraCrypt ne se disputent pas le même slot. Le
+    déchiffrement des en-têtes étant limité par le processeur, le nombre de
+    montages simultanés est borné par défaut au nombre de cœurs.
+    
+    Args:
+        specs: Volumes à monter
+        max_parallel: Nombre maximal de montages simultanés
+        
+    Returns:
+        Dictionnaire chemin du volume -> (succès, message d'erreur)
+    """
+    specs = list(specs)
+    max_parallel = max(1, max_parallel or os.cpu_count() or 1)
+    
+    # Un seul instantané pour tout le lot
+    snapshot = await asyncio.get_running_loop().run_in_executor(None, get_mount_snapshot)
+    free_slots = (slot for slot in range(1, system.Constants.MAX_SLOTS + 1)
+                  if slot not in snapshot.by_slot)
+    
+    results: Dict[str, Tuple[bool, str]] = {}
+    reserved: Set[str] = set()
+    jobs = []
+    for spec in specs:
+        if spec.volume_path in results or any(job[0].volume_path == spec.volume_path for job in jobs):
+            results[spec.volume_path] = (False, "Volume demandé plusieurs fois")
+            continue
+            
+        mount_point = spec.mount_point or generate_mount_point(reserved)
+        if mount_point in reserved:
+            results[spec.volume_path] = (False, f"Le point de montage {mount_point} est demandé plusieurs fois")
+            continue
+            
+        slot = next(free_slots, None)
+        if slot is None:
+            results[spec.volume_path] = (False, "Aucun slot VeraCrypt libre")
+            continue
+            
+        reserved.add(mount_point)
+        jobs.append((spec, mount_point, slot))
+        
+    semaphore = asyncio.Semaphore(max_parallel)
+    
+    async def mount_one(spec: MountSpec, mount_point: str, slot: int) -> Tuple[bool, str]:
+        async with semaphore:
+            return await mount_volume_async(spec.volume_path, mount_point, spec.password, slot, snapshot,
+                                            pim=spec.pim)
+            
+    outcomes = await asyncio.gather(*(mount_one(*job) for job in jobs))
+    for (spec, _, _), outcome in zip(jobs, outcomes):
+        results[spec.volume_path] = outcome
+        
+    # Rendre les résultats dans l'ordre de la demande
+    return {spec.volume_path: results[spec.volume_path] for spec in specs}
+
+def mount_many(specs: Iterable[MountSpec], max_parallel: Optional[int] = None) -> Dict[str, Tuple[bool, str]]:
+    """Monte plusieurs volumes en parallèle (version bloquante de mount_many_async).
+    
+    Args:
+        specs: Volumes à monter
+        max_parallel: Nombre maximal de montages simultanés
+        
+    Returns:
+        Dictionnaire chemin du volume -> (succès, message d'erreur)
+    """
+    return command_engine.run(mount_many_async(specs, max_parallel))
+
+async def unmount_volume_async(mount_point: str, force: bool = False) -> Tuple[bool, str]:
+    """Démonte un volume VeraCrypt, sans bloquer la boucle du moteur de commandes.
     
     Args:
         mount_point: Point de montage du volume à démonter
+        force: Si True, force le démontage même si le volume est utilisé
         
     Returns:
         Tuple contenant:
@@ -307,19 +465,127 @@ def unmount_volume(mount_point: str) -> Tuple[bool, str]:
             '--dismount',
             mount_point
         ]
+        if force:
+            command.append('--force')
         
-        # Le démontage nécessite sudo
-        success, stdout, stderr = sudo_session.run_with_sudo(command)
+        # Le démontage nécessite les droits root : passer par l'assistant privilégié
+        result = await run_privileged(command)
         
-        if success:
+        if result.success:
+            mount_table.invalidate()
             # Supprimer le répertoire de montage s'il est vide
-            try:
-                os.rmdir(mount_point)
-            except:
-                pass
+            _remove_empty_dir(mount_point)
             return True, ''
+        elif result.timed_out:
+            return False, f"Le démontage a dépassé le délai de {timeout_for(command)} s"
         else:
-            return False, stderr
+            return False, result.stderr
             
     except Exception as e:
         return False, str(e)
+
+def unmount_volume(mount_point: str, force: bool = False) -> Tuple[bool, str]:
+    """Démonte un volume VeraCrypt (version bloquante de unmount_volume_async).
+    
+    Args:
+        mount_point: Point de montage du volume à démonter
+        force: Si True, force le démontage même si le volume est utilisé
+        
+    Returns:
+        Tuple contenant:
+        - Un booléen indiquant si le démontage a réussi
+        - Un message d'erreur si le démontage a échoué
+    """
+    return command_engine.run(unmount_volume_async(mount_point, force))
+
+class DismountResult:
+    """Résultat du démontage d'un volume dans un démontage groupé."""
+    __slots__ = ('target', 'success', 'error', 'elapsed', 'forced', 'busy')
+    
+    def __init__(self, target: str, success: bool, error: str = '', elapsed: float = 0.0,
+                 forced: bool = False, busy: Optional[List[Tuple[int, str]]] = None):
+        self.target = target
+        self.success = success
+        self.error = error
+        self.elapsed = elapsed
+        # True si le démontage n'a abouti qu'avec --force
+        self.forced = forced
+        # Processus (pid, nom) qui utilisaient encore le volume en cas d'échec
+        self.busy = busy or []
+        
+    def describe(self) -> str:
+        """Retourne une description lisible du résultat."""
+        if self.success:
+            return f"démonté en {self.elapsed:.1f} s" + (" (forcé)" if self.forced else "")
+        description = self.error.strip() or "échec du démontage"
+        if self.busy:
+            processes = ', '.join(f"{name} ({pid})" for pid, name in self.busy)
+            description += f" — utilisé par : {processes}"
+        return description
+        
+    def __repr__(self) -> str:
+        return (f"DismountResult(target={self.target!r}, success={self.success}, "
+                f"elapsed={self.elapsed:.2f}, forced={self.forced})")
+
+async def dismount_many_async(targets: Iterable[str], max_parallel: Optional[int] = None,
+                              force: bool = False) -> Dict[str, DismountResult]:
+    """Démonte plusieurs volumes en parallèle.
+    
+    Chaque démontage qui échoue est retenté avec --force si demandé. En cas
+    d'échec définitif, les processus qui utilisent encore le point de montage
+    sont recherchés. Les répertoires de montage vides sont supprimés au fil
+    des démontages.
+    
+    Args:
+        targets: Points de montage (ou chemins des volumes) à démonter
+        max_parallel: Nombre maximal de démontages simultanés
+        force: Si True, retente avec --force les démontages qui échouent
+        
+    Returns:
+        Dictionnaire cible -> résultat, dans l'ordre de la demande
+    """
+    targets = list(dict.fromkeys(targets))
+    semaphore = asyncio.Semaphore(max(1, max_parallel or system.Constants.MAX_PARALLEL_DISMOUNTS))
+    loop = asyncio.get_running_loop()
+    
+    async def dismount_one(target: str) -> DismountResult:
+        async with semaphore:
+            start = time.monotonic()
+            success, error = await unmount_volume_async(target)
+            forced = False
+            if not success and force:
+                success, error = await unmount_volume_async(target, force=True)
+                forced = success
+                
+            busy = []
+            if not success and os.path.isdir(target):
+                busy = await loop.run_in_executor(None, system.find_busy_processes, target)
+            return DismountResult(target, success, error, time.monotonic() - start, forced, busy)
+            
+    results = await asyncio.gather(*(dismount_one(target) for target in targets))
+    return dict(zip(targets, results))
+
+async def dismount_all_async(max_parallel: Optional[int] = None,
+                             force: bool = False) -> Dict[str, DismountResult]:
+    """Démonte tous les volumes VeraCrypt montés.
+    
+    Args:
+        max_parallel: Nombre maximal de démontages simultanés
+        force: Si True, retente avec --force les démontages qui échouent
+        
+    Returns:
+        Dictionnaire cible -> résultat
+    """
+    snapshot = await asyncio.get_running_loop().run_in_executor(None, get_mount_snapshot)
+    # Un volume monté sans système de fichiers n'a pas de point de montage
+    targets = [volume.mount_point or volume.volume_path for volume in snapshot]
+    return await dismount_many_async(targets, max_parallel, force)
+
+def dismount_many(targets: Iterable[str], max_parallel: Optional[int] = None,
+                  force: bool = False) -> Dict[str, DismountResult]:
+    """Démonte plusieurs volumes en parallèle (version bloquante de dismount_many_async)."""
+    return command_engine.run(dismount_many_async(targets, max_parallel, force))
+
+def dismount_all(max_parallel: Optional[int] = None, force: bool = False) -> Dict[str, DismountResult]:
+    """Démonte tous les volumes montés (version bloquante de dismount_all_async)."""
+    return command_engine.run(dismount_all_async(max_parallel, force))
@@ -2,14 +2,24 @@
 Utilitaires pour la création de volumes VeraCrypt.
 """
 
+import errno
 import os
+import re
+import shutil
 import logging
-import subprocess
 from typing import List, Tuple, Dict, Optional
 from .sudo_session import sudo_session
-import time
-import random
+from .prompt_driver import PromptDriver, PromptMatcher
+from .progress import ProgressParser, ProgressStalled, ProgressWatchdog
+from .filesystem import filesystem_type, is_copy_on_write, nocow_staging_dir, supports_fast_allocation
+from .command_engine import command_engine, execute_sync, run_privileged, run_privileged_watched
+from .mkfs import PROFILES, MkfsProfile, device_geometry
+from .pim_calibration import mount_timeout
+from .mount_table import mount_table
+from .constants import Constants
+import secrets
 import string
+import tempfile
 
 # Configuration du logging
 logging.basicConfig(
@@ -23,6 +33,9 @@ logging.basicConfig(
 logger = logging.getLogger('veracrypt.volume_creation')
 
 class VolumeCreation:
+    # Prise en charge de --stdin par VeraCrypt (None : pas encore vérifiée)
+    _stdin_supported = None
+    
     # Algorithmes de chiffrement disponibles
     ENCRYPTION_ALGORITHMS = {
         'AES': 'aes',
@@ -87,9 +100,19 @@ class VolumeCreation:
         hidden_pim: Optional[int] = None,
         random_data: Optional[str] = None,
         keyfiles: Optional[List[str]] = None,
+        quick: bool = False,
+        mkfs_profile: Optional[str] = None,
         progress_callback = None
     ) -> Tuple[bool, str]:
-        """Crée un nouveau volume VeraCrypt."""
+        """Crée un nouveau volume VeraCrypt.
+        
+        Avec quick, VeraCrypt alloue le conteneur (fallocate) au lieu de
+        l'écrire en entier : l'espace libre n'est pas chiffré.
+        
+        Avec mkfs_profile (clé de mkfs.PROFILES), VeraCrypt crée le volume sans
+        système de fichiers ; il est ensuite mappé, formaté avec les options
+        du profil, puis démappé.
+        """
         try:
             # Validation des paramètres
             logger.debug("Validation des paramètres d'entrée...")
@@ -120,6 +143,20 @@ class VolumeCreation:
                 logger.error(f"Système de fichiers invalide : {filesystem}")
                 return False, f"Système de fichiers invalide. Valeurs possibles : {', '.join(VolumeCreation.FILESYSTEMS.keys())}"
                 
+            # Vérifier le profil de formatage
+            profile = None
+            if mkfs_profile is not None:
+                profile = PROFILES.get(mkfs_profile)
+                if profile is None:
+                    logger.error(f"Profil de formatage invalide : {mkfs_profile}")
+                    return False, f"Profil de formatage invalide. Valeurs possibles : {', '.join(PROFILES.keys())}"
+                if profile.filesystem != filesystem:
+                    logger.error(f"Profil {mkfs_profile} incompatible avec {filesystem}")
+                    return False, f"Le profil « {profile.label} » ne s'applique qu'au système de fichiers {profile.filesystem}"
+                if hidden:
+                    logger.error("Profil de formatage demandé pour un volume caché")
+                    return False, "Les profils de formatage sont incompatibles avec un volume caché"
+                
             # Vérifier l'espace disque disponible
             try:
                 size_bytes = VolumeCreation._parse_size(size)
@@ -140,193 +177,381 @@ class VolumeCreation:
             logger.info(f"- Hash : {hash_algo}")
             logger.info(f"- Système de fichiers : {filesystem}")
             logger.info(f"- Volume caché : {hidden}")
+            logger.info(f"- Allocation rapide : {quick}")
+            if profile:
+                logger.info(f"- Profil de formatage : {profile.name}")
             if hidden:
                 logger.info(f"- Taille du volume caché : {hidden_size}")
             
-            # Construire la commande de base
-            command = [
-                'veracrypt',
-                '--text',  # Mode texte
-                '--create', path,  # Chemin du volume
+            if not password:
+                logger.error("Le mot de passe est vide")
+                return False, "Le mot de passe ne peut pas être vide"
+                
+            # Options de création communes aux deux modes
+            options = [
                 '--encryption', VolumeCreation.ENCRYPTION_ALGORITHMS[encryption],  # Algorithme de chiffrement
                 '--hash', VolumeCreation.HASH_ALGORITHMS[hash_algo],  # Algorithme de hachage
-                '--filesystem', VolumeCreation.FILESYSTEMS[filesystem],  # Système de fichiers
+                # Système de fichiers (formaté par nos soins avec un profil)
+                '--filesystem', 'none' if profile else VolumeCreation.FILESYSTEMS[filesystem],
                 '--size', size,  # Taille du volume
                 '--volume-type=normal'  # Type de volume normal
             ]
             
-            if pim is not None:
-                command.extend(['--pim', str(pim)])
-            
+            if quick:
+                if hidden:
+                    logger.error("Allocation rapide demandée pour un volume caché")
+                    return False, "L'allocation rapide est incompatible avec un volume caché"
+                if not supports_fast_allocation(path):
+                    logger.warning(f"{filesystem_type(path)} ne gère pas fallocate : "
+                                   "VeraCrypt écrira tout le conteneur")
+                options.append('--quick')
+                
             if hidden:
-                command.extend(['--hidden'])
+                options.extend(['--hidden'])
                 if hidden_pim is not None:
-                    command.extend(['--hidden-pim', str(hidden_pim)])
-            
-            # Log de la commande
-            log_cmd = command.copy()
-            logger.debug(f"Commande préparée : {' '.join(log_cmd)}")
-            
-            # Préparer les réponses aux prompts dans l'ordre exact
-            responses = []
-            
-            # 1. Mot de passe
-            if not password:
-                logger.error("Le mot de passe est vide")
-                return False, "Le mot de passe ne peut pas être vide"
+                    options.extend(['--hidden-pim', str(hidden_pim)])
+                    
+            # Sur btrfs, le conteneur naît dans un répertoire sans copie sur
+            # écriture (attribut hérité avant toute écriture), puis est renommé
+            staging = nocow_staging_dir(path)
+            target = os.path.join(staging, os.path.basename(path)) if staging else path
+            if staging:
+                logger.info("- Copie sur écriture : désactivée (NOCOW)")
+            elif is_copy_on_write(path):
+                logger.warning(f"{filesystem_type(path)} : copie sur écriture conservée, "
+                               "le conteneur se fragmentera à l'usage")
                 
-            logger.debug(f"Longueur du mot de passe : {len(password)}")
-            responses.append(password)  # Une seule fois dans la liste
-            
-            # 2. PIM (vide si non spécifié)
-            pim_value = str(pim) if pim is not None else ''
-            responses.append(pim_value)
-            logger.debug(f"PIM : {'(spécifié)' if pim else '(vide)'}")
-            
-            # 3. Keyfile (vide si non spécifié)
-            keyfile = keyfiles[0] if keyfiles else ''
-            responses.append(keyfile)
-            logger.debug(f"Keyfile : {'(spécifié)' if keyfile else '(vide)'}")
-            
-            # 4. Données aléatoires
-            if random_data:
-                responses.append(random_data)
-                logger.debug("Utilisation des données aléatoires fournies")
-            else:
-                random_chars = ''.join(random.choices(string.ascii_letters + string.digits, k=320))
-                responses.append(random_chars)
-                logger.debug("Génération de 320 caractères aléatoires")
-            
-            logger.debug(f"Nombre de réponses préparées : {len(responses)}")
-            
-            # Exécuter la commande avec sudo
-            logger.debug("Démarrage du processus VeraCrypt...")
+            # Conteneur créé mais pas encore à sa place : le répertoire
+            # temporaire est alors conservé pour ne pas le perdre
+            stranded = False
             try:
-                process = subprocess.Popen(
-                    ['sudo', '-S'] + command,
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    bufsize=1  # Line buffered
-                )
-                
-                # Récupérer et envoyer le mot de passe sudo
-                logger.debug("Récupération du mot de passe sudo...")
-                sudo_password = sudo_session.get_sudo_password()
-                if not sudo_password:
-                    logger.error("Mot de passe sudo non disponible")
-                    return False, "Mot de passe sudo non disponible"
-                
-                logger.debug("Envoi du mot de passe sudo...")
-                process.stdin.write(f"{sudo_password}\n")
-                process.stdin.flush()
-                time.sleep(0.2)  # Attendre que sudo soit prêt
-                
-                # Lire et traiter les prompts de VeraCrypt
-                logger.debug("Traitement des prompts VeraCrypt...")
-                current_response_index = 0
-                
-                while True:
-                    line = process.stdout.readline()
-                    if not line:
-                        break
-                        
-                    line = line.strip()
-                    logger.debug(f"Sortie VeraCrypt : {line}")
+                # VeraCrypt ne voit que le chemin temporaire : vérifier à sa place
+                # que la destination est libre, au moment où la création démarre
+                if staging and os.path.lexists(path):
+                    logger.error(f"{path} existe déjà")
+                    return False, "Un fichier existe déjà à cet emplacement"
                     
-                    # Appeler le callback de progression si fourni
-                    if progress_callback and "Done:" in line:
-                        progress_callback(line)
+                # Pas de délai fixe : seule une progression bloquée interrompt la
+                # création ; la croissance du fichier compte aussi comme progression
+                watchdog = ProgressWatchdog(Constants.CREATION_STALL_TIMEOUT, size_bytes, growth_path=target)
+                on_line = VolumeCreation._progress_handler(watchdog, ProgressParser(size_bytes), progress_callback)
+                
+                if VolumeCreation.supports_stdin():
+                    success, output = VolumeCreation._create_non_interactive(
+                        target, password, options, pim, keyfiles, random_data, watchdog, on_line
+                    )
+                else:
+                    logger.info("VeraCrypt ne prend pas en charge --stdin : création interactive")
+                    success, output = VolumeCreation._create_interactive(
+                        target, password, options, pim, keyfiles, random_data, watchdog, on_line
+                    )
                     
-                    # Gérer les différents prompts
-                    if "Enter password:" in line or "Re-enter password:" in line:
-                        # Pour le mot de passe et sa confirmation, toujours envoyer password
-                        logger.debug(f"Prompt détecté : {line}")
-                        logger.debug(f"Envoi du mot de passe : '{password}'")
-                        process.stdin.write(f"{password}\n")
-                        process.stdin.flush()
-                    elif "Enter PIM:" in line:
-                        # Pour les autres prompts, utiliser les réponses préparées
-                        if current_response_index < len(responses):
-                            response = responses[current_response_index]
-                            logger.debug(f"Prompt détecté : {line}")
-                            logger.debug(f"Envoi de la réponse {current_response_index + 1}/{len(responses)} : '{response}'")
-                            process.stdin.write(f"{response}\n")
-                            process.stdin.flush()
-                            current_response_index += 1
-                    elif "Enter keyfile path" in line:
-                        if current_response_index < len(responses):
-                            response = responses[current_response_index]
-                            logger.debug(f"Prompt détecté : {line}")
-                            logger.debug(f"Envoi du chemin du keyfile : '{response}'")
-                            process.stdin.write(f"{response}\n")
-                            process.stdin.flush()
-                            current_response_index += 1
-                    elif "randomly chosen characters" in line:
-                        if current_response_index < len(responses):
-                            response = responses[current_response_index]
-                            logger.debug(f"Prompt détecté : {line}")
-                            logger.debug(f"Envoi de {len(response)} caractères aléatoires : '{response}'")
-                            process.stdin.write(f"{response}\n")
-                            process.stdin.flush()
-                            current_response_index += 1
-                    elif "Passwords do not match" in line:
-                        logger.error("Les mots de passe ne correspondent pas !")
+                if success and staging:
+                    # Le conteneur appartient à root : l'assistant le déplace, sans
+                    # remplacer une destination apparue entre-temps (autre création,
+                    # autre programme)
+                    moved = command_engine.run(run_privileged(['rename', target, path], verb='rename'))
+                    if not moved.success:
+                        stranded = True
+                        logger.error(f"Impossible de placer le conteneur {target} : {moved.stderr}")
+                        if moved.returncode == errno.EEXIST:
+                            return False, f"Un fichier existe déjà à cet emplacement ; le volume créé a été conservé sous {target}"
+                        return False, f"Le volume a été créé mais n'a pas pu être déplacé ; il a été conservé sous {target}"
+            except OSError as e:
+                logger.error(f"Erreur lors de la création de {path} : {e}")
+                return False, f"Erreur : {e}"
+            finally:
+                if staging and not stranded:
+                    shutil.rmtree(staging, ignore_errors=True)
                     
-                    time.sleep(0.2)  # Attendre entre chaque réponse
-                
-                # Attendre la fin du processus
-                logger.debug("Attente de la fin du processus...")
-                stdout, stderr = process.communicate(timeout=300)
-                return_code = process.returncode
+            if not success:
+                logger.error("Erreur lors de la création du volume :")
+                logger.error(f"Sortie : {output}")
                 
-                if return_code != 0:
-                    logger.error("Erreur lors de la création du volume :")
-                    logger.error(f"Code de retour : {return_code}")
-                    logger.error(f"Sortie standard : {stdout}")
-                    logger.error(f"Erreur standard : {stderr}")
+                # Analyser l'erreur
+                if "too long" in output.lower():
+                    return False, "Le mot de passe est trop long"
+                elif "do not match" in output.lower():
+                    return False, "Les mots de passe ne correspondent pas"
+                else:
+                    return False, "Erreur lors de la création du volume"
                     
-                    # Analyser l'erreur
-                    if "too long" in stderr.lower():
-                        return False, "Le mot de passe est trop long"
-                    elif "do not match" in stdout.lower():
-                        return False, "Les mots de passe ne correspondent pas"
-                    else:
-                        return False, "Erreur lors de la création du volume"
+            # Créé par root : rendre le conteneur à l'utilisateur, qui doit
+            # pouvoir le lire (analyse de fragmentation, sauvegarde...)
+            owned = command_engine.run(run_privileged(['chown', path], verb='chown'))
+            if not owned.success:
+                logger.warning(f"Le conteneur {path} reste la propriété de root : {owned.stderr}")
                     
-                logger.info("Volume créé avec succès")
-                return True, "Volume créé avec succès"
-                
-            except subprocess.TimeoutExpired:
-                logger.error("Timeout lors de la création du volume")
-                if 'process' in locals():
-                    process.kill()
-                return False, "La création du volume a pris trop de temps"
-                
-            except Exception as e:
-                logger.error(f"Exception lors de la création du volume : {str(e)}")
-                return False, str(e)
-                
-            finally:
-                # S'assurer que le processus est terminé
-                if 'process' in locals():
-                    try:
-                        process.terminate()
-                    except:
-                        pass
+            if profile:
+                success, error = VolumeCreation._format_volume(path, password, profile, pim, keyfiles)
+                if not success:
+                    return False, f"Le volume a été créé mais son formatage a échoué : {error}"
+                    
+            logger.info("Volume créé avec succès")
+            return True, "Volume créé avec succès"
+            
+        except ProgressStalled as e:
+            logger.error(f"Création du volume bloquée : {e}")
+            return False, f"La création du volume est bloquée : {e}"
                 
         except Exception as e:
             logger.exception("Exception lors de la création du volume")
             return False, f"Erreur : {str(e)}"
             
+    @staticmethod
+    def _format_volume(path: str, password: str, profile: MkfsProfile,
+                       pim: Optional[int] = None, keyfiles: Optional[List[str]] = None) -> Tuple[bool, str]:
+        """Formate un volume créé sans système de fichiers.
+        
+        Le volume est mappé sans être monté (--filesystem=none), formaté via
+        l'assistant privilégié, puis démappé dans tous les cas.
+        
+        Returns:
+            Tuple (succès, message d'erreur)
+        """
+        command = [
+            Constants.VERACRYPT_PATH,
+            '--text',
+            '--non-interactive',
+            '--filesystem=none',
+            '--mount', path
+        ]
+        if pim is not None:
+            command.append(f'--pim={pim}')
+        if keyfiles:
+            command.append(f'--keyfiles={",".join(keyfiles)}')
+        if VolumeCreation.supports_stdin():
+            command.append('--stdin')
+            input_data = password + '\n'
+        else:
+            command.extend(['--password', password])
+            input_data = None
+            
+        logger.debug("Mappage du volume pour le formatage...")
+        # Un PIM élevé allonge le déverrouillage au-delà du délai habituel de --mount
+        result = command_engine.run(run_privileged(command, input_data, mount_timeout(pim)))
+        mount_table.invalidate()
+        if not result.success:
+            error = result.stderr.strip() or "Erreur inconnue"
+            logger.error(f"Impossible de mapper le volume : {error}")
+            return False, f"mappage impossible ({error})"
+            
+        try:
+            volume = mount_table.snapshot().find_by_container(path)
+            if volume is None or not volume.virtual_device:
+                return False, "périphérique mappé introuvable"
+                
+            mkfs_command = profile.command(volume.virtual_device, device_geometry(path))
+            logger.info(f"Formatage : {' '.join(mkfs_command)}")
+            result = command_engine.run(run_privileged(
+                mkfs_command,
+                timeout=Constants.MKFS_TIMEOUT,
+                verb='mkfs'
+            ))
+            if not result.success:
+                error = result.stderr.strip() or "Erreur inconnue"
+                logger.error(f"Erreur lors du formatage : {error}")
+                return False, error
+            logger.info(f"Volume formaté ({profile.label})")
+            return True, ''
+        finally:
+            result = command_engine.run(run_privileged([
+                Constants.VERACRYPT_PATH,
+                '--text',
+                '--non-interactive',
+                '--dismount', path
+            ]))
+            mount_table.invalidate()
+            if not result.success:
+                logger.error(f"Impossible de démapper {path} : {result.stderr.strip()}")
+                
+    @staticmethod
+    def supports_stdin() -> bool:
+        """Indique si VeraCrypt accepte le mot de passe sur l'entrée standard (--stdin).
+        
+        Le résultat est mis en cache pour la durée de la session.
+        """
+        if VolumeCreation._stdin_supported is None:
+            version = None
+            try:
+                result = execute_sync([Constants.VERACRYPT_PATH, '--text', '--version'])
+                match = re.search(r'(\d+)\.(\d+)', result.stdout)
+                if match:
+                    version = (int(match.group(1)), int(match.group(2)))
+            except Exception as e:
+                logger.error(f"Impossible de déterminer la version de VeraCrypt : {e}")
+            VolumeCreation._stdin_supported = version is not None and version >= Constants.VERACRYPT_STDIN_VERSION
+            logger.debug(f"Version de VeraCrypt : {version}, --stdin : {VolumeCreation._stdin_supported}")
+        return VolumeCreation._stdin_supported
+        
+    @staticmethod
+    def _progress_handler(watchdog: ProgressWatchdog, parser: ProgressParser, progress_callback):
+        """Retourne la fonction de traitement des lignes de sortie de la création."""
+        last_logged = [None]
+        
+        def on_line(line: str):
+            logger.debug(f"Sortie VeraCrypt : {line}")
+            # Journaliser le débit mesuré et le temps restant à chaque point gagné
+            if watchdog.percent is not None and int(watchdog.percent) != last_logged[0]:
+                last_logged[0] = int(watchdog.percent)
+                logger.info(f"Progression : {watchdog.describe()}")
+            # Transmettre la progression analysée (ProgressEvent) si demandé
+            if progress_callback:
+                event = parser.parse(line)
+                if event is not None:
+                    progress_callback(event)
+                    
+        return on_line
+        
+    @staticmethod
+    def _write_random_source(random_data: Optional[str]) -> str:
+        """Écrit les données aléatoires dans un fichier temporaire privé (0600).
+        
+        L'entropie collectée est complétée par l'aléa du système.
+        
+        Returns:
+            Chemin du fichier, à supprimer par l'appelant
+        """
+        fd, random_path = tempfile.mkstemp(prefix='veracrypt-random-')
+        with os.fdopen(fd, 'wb') as f:
+            if random_data:
+                f.write(random_data.encode('utf-8'))
+            f.write(os.urandom(Constants.RANDOM_SOURCE_SIZE))
+        return random_path
+        
+    @staticmethod
+    def _remove_random_source(random_path: str):
+        """Efface puis supprime le fichier de données aléatoires."""
+        try:
+            size = os.path.getsize(random_path)
+            with open(random_path, 'r+b') as f:
+                f.write(b'\0' * size)
+            os.unlink(random_path)
+        except OSError as e:
+            logger.error(f"Impossible de supprimer {random_path} : {e}")
+            
+    @staticmethod
+    def _create_non_interactive(path, password, options, pim, keyfiles, random_data,
+                                watchdog, on_line) -> Tuple[bool, str]:
+        """Crée le volume en une seule commande, sans dialogue avec VeraCrypt.
+        
+        Le mot de passe passe par l'entrée standard, l'aléa par un fichier
+        temporaire ; la commande s'exécute via l'assistant privilégié et sa
+        sortie est relayée au fil de l'eau.
+        
+        Returns:
+            Tuple (succès, sortie de la commande)
+        """
+        random_path = VolumeCreation._write_random_source(random_data)
+        try:
+            command = [
+                Constants.VERACRYPT_PATH,
+                '--text',
+                '--non-interactive',
+                '--create', path,
+                *options,
+                '--stdin',
+                f'--random-source={random_path}'
+            ]
+            if pim is not None:
+                command.append(f'--pim={pim}')
+            if keyfiles:
+                command.append(f'--keyfiles={",".join(keyfiles)}')
+                
+            logger.debug(f"Commande préparée : {' '.join(command)}")
+            logger.debug("Démarrage du processus VeraCrypt...")
+            result = command_engine.run(run_privileged_watched(
+                command,
+                watchdog,
+                input_data=password + '\n',
+                on_output=lambda stream, data: on_line(data.rstrip('\r\n'))
+            ))
+            return result.success, result.stdout + result.stderr
+        finally:
+            VolumeCreation._remove_random_source(random_path)
+            
+    @staticmethod
+    def _create_interactive(path, password, options, pim, keyfiles, random_data,
+                            watchdog, on_line) -> Tuple[bool, str]:
+        """Crée le volume en répondant aux invites de VeraCrypt dans un pseudo-terminal.
+        
+        Utilisé pour les versions de VeraCrypt sans --stdin.
+        
+        Returns:
+            Tuple (succès, sortie de la commande)
+        """
+        command = ['veracrypt', '--text', '--create', path, *options]
+        if pim is not None:
+            command.extend(['--pim', str(pim)])
+        logger.debug(f"Commande préparée : {' '.join(command)}")
+        
+        # Données aléatoires
+        if random_data:
+            logger.debug("Utilisation des données aléatoires fournies")
+        else:
+            alphabet = string.ascii_letters + string.digits
+            random_data = ''.join(secrets.choice(alphabet) for _ in range(320))
+            logger.debug("Génération de 320 caractères aléatoires")
+            
+        # Récupérer le mot de passe sudo
+        logger.debug("Récupération du mot de passe sudo...")
+        sudo_password = sudo_session.get_sudo_password()
+        if not sudo_password:
+            return False, "Mot de passe sudo non disponible"
+            
+        # Fichiers clés proposés un à un, puis une réponse vide pour terminer
+        remaining_keyfiles = iter(keyfiles or [])
+        
+        # Table des invites : reconnues dès leur affichage, sans attente
+        sudo_prompt = f"[veracrypt-gui-sudo-{os.getpid()}]"
+        matchers = [
+            PromptMatcher('sudo', re.escape(sudo_prompt), sudo_password, secret=True),
+            PromptMatcher('mot de passe', r'(?:Re-enter|Enter) password:', password, secret=True),
+            PromptMatcher('PIM', r'Enter PIM:', str(pim) if pim is not None else ''),
+            PromptMatcher('fichier clé', r'Enter keyfile path',
+                          lambda match: next(remaining_keyfiles, '')),
+            PromptMatcher('données aléatoires', r'randomly chosen characters', random_data, secret=True),
+            PromptMatcher('mots de passe différents', r'Passwords do not match'),
+        ]
+        
+        # Exécuter la commande avec sudo dans un pseudo-terminal
+        logger.debug("Démarrage du processus VeraCrypt...")
+        driver = PromptDriver(['sudo', '-S', '-p', sudo_prompt, '--'] + command, matchers, on_line)
+        return_code = driver.run(watchdog=watchdog)
+        logger.debug(f"Code de retour : {return_code}")
+        return return_code == 0, driver.transcript
+        
     @staticmethod
     def change_password(
         volume_path: str,
         current_password: str,
         new_password: str,
         current_keyfile: str = None,
-        new_keyfile: str = None
+        new_keyfile: str = None,
+        new_pim: Optional[int] = None,
+        current_pim: Optional[int] = None
+    ) -> Tuple[bool, str]:
+        """Change le mot de passe d'un volume VeraCrypt existant.
+        
+        Version synchrone de change_password_async (bloque jusqu'à la fin :
+        à ne pas appeler depuis le thread Qt).
+        
+        Returns:
+            Tuple[bool, str]: (Succès, Message)
+        """
+        return command_engine.run(VolumeCreation.change_password_async(
+            volume_path, current_password, new_password, current_keyfile, new_keyfile, new_pim, current_pim
+        ))
+        
+    @staticmethod
+    async def change_password_async(
+        volume_path: str,
+        current_password: str,
+        new_password: str,
+        current_keyfile: str = None,
+        new_keyfile: str = None,
+        new_pim: Optional[int] = None,
+        current_pim: Optional[int] = None
     ) -> Tuple[bool, str]:
         """Change le mot de passe d'un volume VeraCrypt existant.
         
@@ -336,6 +561,8 @@ class VolumeCreation:
             new_password: Nouveau mot de passe
             current_keyfile: Fichier clé actuel (optionnel)
             new_keyfile: Nouveau fichier clé (optionnel)
+            new_pim: Nouveau PIM (optionnel, par défaut celui de VeraCrypt)
+            current_pim: PIM actuel (optionnel, par défaut celui de VeraCrypt)
             
         Returns:
             Tuple[bool, str]: (Succès, Message)
@@ -362,30 +589,23 @@ class VolumeCreation:
                 command.extend(['--keyfile', current_keyfile])
             if new_keyfile:
                 command.extend(['--new-keyfile', new_keyfile])
+            # Sans le PIM actuel, VeraCrypt essaie d'ouvrir l'en-tête avec le PIM par défaut
+            if current_pim is not None:
+                command.append(f'--pim={current_pim}')
+            if new_pim is not None:
+                command.append(f'--new-pim={new_pim}')
                 
-            # Exécuter la commande avec sudo
-            process = subprocess.Popen(
-                ['sudo', '-S'] + command,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Récupérer et envoyer le mot de passe sudo
-            sudo_password = sudo_session.get_sudo_password()
-            if not sudo_password:
-                logger.error("Mot de passe sudo non disponible")
-                return False, "Mot de passe sudo non disponible"
-                
+            # Exécuter la commande via l'assistant privilégié, sans délai fixe :
+            # la dérivation des clés peut être longue avec un PIM élevé
+            watchdog = ProgressWatchdog(Constants.PASSWORD_CHANGE_STALL_TIMEOUT)
             try:
-                stdout, stderr = process.communicate(input=f"{sudo_password}\n", timeout=30)
-            except subprocess.TimeoutExpired:
-                process.kill()
-                logger.error("Timeout lors du changement de mot de passe")
-                return False, "L'opération a pris trop de temps"
+                result = await run_privileged_watched(command, watchdog)
+            except ProgressStalled as e:
+                logger.error(f"Changement de mot de passe bloqué : {e}")
+                return False, f"L'opération est bloquée : {e}"
                 
-            if process.returncode != 0:
+            success, stdout, stderr = result.as_tuple()
+            if not success:
                 error_msg = stderr.strip() if stderr else "Erreur inconnue"
                 logger.error(f"Erreur lors du changement de mot de passe : {error_msg}")
                 return False, f"Erreur : {error_msg}"